@@ -0,0 +1,78 @@
+# "Cube Libre" - star field benchmark
+#
+# Per-frame cost of drawing the stars: the old immediate-mode loop
+# (one glVertex3fv per star) against the static VBO in starfield.py.
+# "cpu" is the time spent in the draw call itself (what the Python side pays),
+# "frame" also waits for the GPU / software rasterizer with glFinish.
+# The VBO path always makes the same handful of GL calls, whatever the star
+# count. On a GPU its cpu column stays flat; on a software renderer
+# (llvmpipe) the driver transforms the vertices inside the draw call itself,
+# so there it grows with the count but still has no per-star Python work.
+# "drawn" is how many stars survive chunk frustum culling from this camera.
+#
+# Needs an OpenGL context: opens a small hidden pygame window.
+# Usage: python benchmarks/starfield_bench.py [count ...]
+
+import os
+import sys
+import time
+
+import numpy as np
+import pygame
+from pygame.locals import DOUBLEBUF, HIDDEN, OPENGL
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starfield import StarField
+
+default_counts = (1000, 10000, 100000, 1000000)
+immediate_limit = 100000  # The immediate-mode loop gets too slow to bother beyond this
+frames = 20
+
+def draw_immediate(stars):
+    glPointSize(2)
+    glBegin(GL_POINTS)
+    for star in stars:
+        glVertex3fv(star)
+    glEnd()
+
+# Best-of-frames cpu and frame time of draw(), in seconds
+def time_frames(draw):
+    cpu, frame = [], []
+    for _ in range(frames):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glFinish()
+        start = time.perf_counter()
+        draw()
+        issued = time.perf_counter()
+        glFinish()
+        done = time.perf_counter()
+        cpu.append(issued - start)
+        frame.append(done - start)
+    return min(cpu), min(frame)
+
+def bench_count(count):
+    star_field = StarField(count, rng=np.random.default_rng(count))
+    cpu, frame = time_frames(star_field.draw)
+    line = (f"{count:>9} stars   VBO cpu: {cpu * 1e3:8.3f} ms  frame: {frame * 1e3:8.3f} ms"
+            f"  drawn: {star_field.drawn:>8}")
+    if count <= immediate_limit:
+        stars = [tuple(star) for star in star_field.positions.tolist()]
+        immediate_cpu, immediate_frame = time_frames(lambda: draw_immediate(stars))
+        line += f"   immediate cpu: {immediate_cpu * 1e3:9.3f} ms  frame: {immediate_frame * 1e3:9.3f} ms"
+    print(line)
+    glDeleteBuffers(1, [star_field.vbo])
+    glDeleteVertexArrays(1, [star_field.vao])
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or default_counts
+    pygame.init()
+    display = (800, 600)
+    pygame.display.set_mode(display, DOUBLEBUF | OPENGL | HIDDEN)
+    gluPerspective(45, (display[0] / display[1]), 0.1, 150.0)
+    glTranslatef(0.0, 0.0, -60)
+    for count in counts:
+        bench_count(count)
+    pygame.quit()
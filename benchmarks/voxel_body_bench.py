@@ -0,0 +1,126 @@
+# "Cube Libre" - voxel body benchmark
+#
+# Compares the old nested cubes[x][y][z] grid of Cube objects against the
+# structure-of-arrays VoxelBody (+ its DebrisPool) for the passes the game (cube_libre/simulation.py)
+# runs every frame: moving the body, updating destroyed cubes, the horizon
+# collision check and the "all cubes destroyed" check. Also shows how many
+# cubes the renderer is handed once hidden interior cubes are skipped, and
+# how many quads the greedy mesher (mesher.py) turns the body into.
+#
+# Usage: python benchmarks/voxel_body_bench.py [size ...]
+
+import os
+import random
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from debris import DebrisPool
+from mesher import slice_vertices, vertices_per_quad
+from voxel_body import VoxelBody
+
+default_sizes = (5, 16, 32, 48)
+horizon_y = -5
+destroyed_fraction = 0.25  # Share of cubes flying off while we measure
+
+# The pre-VoxelBody representation, as it was in cube_libre.py
+class LegacyCube:
+    def __init__(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.color = [random.uniform(0, 1) for _ in range(3)]
+        self.is_destroyed = False
+        self.flash_duration = 0.2
+        self.time_since_destroyed = 0
+        self.rotation = 0.0
+        self.velocity = [0.0, 0.0, 0.0]
+        self.angular_velocity = 0.0
+
+    def destroy(self):
+        self.velocity = [random.uniform(-0.5, 0.5), random.uniform(0.5, 1), random.uniform(-0.5, 0.5)]
+        self.angular_velocity = random.uniform(-3, 3)
+        self.is_destroyed = True
+        self.time_since_destroyed = 0
+
+def legacy_grid(size):
+    span = range(-size // 2, size // 2)
+    return [[[LegacyCube(x, y, z) for z in span] for y in span] for x in span]
+
+def legacy_move(cubes, dx):
+    for row in cubes:
+        for layer in row:
+            for cube in layer:
+                cube.x += dx
+
+def legacy_update(cubes, delta_time):
+    for row in cubes:
+        for layer in row:
+            for cube in layer:
+                if cube.is_destroyed:
+                    cube.time_since_destroyed += delta_time
+                    if cube.time_since_destroyed > cube.flash_duration:
+                        cube.x += cube.velocity[0] * delta_time
+                        cube.y += cube.velocity[1] * delta_time
+                        cube.z += cube.velocity[2] * delta_time
+                        cube.rotation += cube.angular_velocity * delta_time
+
+def legacy_collision(cubes):
+    hits = 0
+    for row in cubes:
+        for layer in row:
+            for cube in layer:
+                if not cube.is_destroyed and cube.y <= horizon_y:
+                    hits += 1
+    return hits
+
+def legacy_all_destroyed(cubes):
+    return all(cube.is_destroyed for row in cubes for layer in row for cube in layer)
+
+def time_per_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+def bench_size(size):
+    random.seed(size)
+    cubes = legacy_grid(size)
+    flat = [cube for row in cubes for layer in row for cube in layer]
+    for cube in random.sample(flat, int(len(flat) * destroyed_fraction)):
+        cube.destroy()
+        cube.time_since_destroyed = 1.0
+
+    debris = DebrisPool(size ** 3, owners=size ** 3, lifetime=1e9, bounds_min=(-1e9,) * 3, bounds_max=(1e9,) * 3)
+    body = VoxelBody(size, debris=debris, rng=random.Random(size))
+    picked = np.random.default_rng(size).random(body.count) < destroyed_fraction
+    for i in np.flatnonzero(picked):
+        body.destroy(int(i))
+    debris.ages[debris.alive] = 1.0
+
+    number = max(1, 20000 // body.count)
+    passes = {
+        "move": (lambda: legacy_move(cubes, 0.1), lambda: body.translate(dx=0.1)),
+        "update": (lambda: legacy_update(cubes, 0.016), lambda: debris.update(0.016)),
+        "collision": (lambda: legacy_collision(cubes), lambda: body.colliding(horizon_y).sum()),
+        "all_destroyed": (lambda: legacy_all_destroyed(cubes), body.all_destroyed),
+    }
+    # What the renderer gets handed: every cube vs. only the exposed shell
+    # of a fresh body, before anything breaks off
+    fresh = VoxelBody(size, debris=DebrisPool(1), rng=random.Random(size))
+    print(f"{size:>5}^3 {'instances':<14} all: {fresh.count:>10}   surface: {int(fresh.visible.sum()):>10}   "
+          f"x{fresh.count / fresh.visible.sum():7.1f}")
+    mesh = lambda: sum(len(slice_vertices(fresh, face, c)) for face in range(6) for c in range(size)) // vertices_per_quad
+    quads = mesh()
+    print(f"{size:>5}^3 {'quads':<14} cubes: {fresh.count * 6:>8}   greedy: {quads:>10}   "
+          f"x{fresh.count * 6 / quads:7.1f}   (meshing: {time_per_call(mesh, 1) * 1e3:.1f} ms)")
+    for name, (legacy, vectorized) in passes.items():
+        legacy_time = time_per_call(legacy, number)
+        vectorized_time = time_per_call(vectorized, number)
+        print(f"{size:>5}^3 {name:<14} nested: {legacy_time * 1e3:9.3f} ms   "
+              f"VoxelBody: {vectorized_time * 1e3:8.3f} ms   x{legacy_time / vectorized_time:7.1f}")
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or default_sizes
+    for size in sizes:
+        bench_size(size)
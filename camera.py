@@ -0,0 +1,61 @@
+# "Cube Libre" - camera frustum culling
+#
+# The six clip planes of the view frustum, pulled out of the current
+# projection * modelview (Gribb/Hartmann), and vectorized visibility tests
+# against them: spheres for voxels and debris, boxes for star chunks. A point
+# is inside when it is on the positive side of all six planes; a sphere or box
+# is only culled when it is entirely outside one of them, so the tests are
+# conservative (never drop something that could show).
+#
+# The planes live in whatever space the mvp maps from: take the mvp with the
+# body transform applied and the tests work on body-space offsets directly.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import numpy as np
+
+from shaders import fixed_function_mvp
+
+plane_names = ("left", "right", "bottom", "top", "near", "far")
+
+class Frustum:
+    # mvp in GL memory order (what fixed_function_mvp() returns); defaults to
+    # the current fixed-function matrices
+    def __init__(self, mvp=None):
+        if mvp is None:
+            mvp = fixed_function_mvp()
+        rows = np.asarray(mvp, dtype=np.float64).T  # Row i of P * MV
+        planes = np.array([rows[3] + rows[0], rows[3] - rows[0],
+                           rows[3] + rows[1], rows[3] - rows[1],
+                           rows[3] + rows[2], rows[3] - rows[2]])
+        planes /= np.linalg.norm(planes[:, :3], axis=1)[:, None]  # Unit normals: distances in world units
+        self.planes = planes
+        self.normals = planes[:, :3]
+        self.distances = planes[:, 3]
+
+    # Signed distance of every point (n, 3) to every plane: (n, 6)
+    def signed_distances(self, points):
+        return np.asarray(points, dtype=np.float64) @ self.normals.T + self.distances
+
+    # Mask of the spheres (centres (n, 3), radius scalar or (n,)) that can be in view
+    def spheres_visible(self, centers, radii):
+        if not len(centers):
+            return np.zeros(0, dtype=bool)
+        radii = np.asarray(radii, dtype=np.float64)
+        if radii.ndim:
+            radii = radii[:, None]
+        return (self.signed_distances(centers) >= -radii).all(axis=1)
+
+    def sphere_visible(self, center, radius):
+        return bool(self.spheres_visible(np.reshape(center, (1, 3)), radius)[0])
+
+    # Mask of the axis-aligned boxes (corners (n, 3) each) that can be in view:
+    # for every plane, test the box corner furthest along its normal
+    def boxes_visible(self, mins, maxs):
+        mins = np.asarray(mins, dtype=np.float64)
+        maxs = np.asarray(maxs, dtype=np.float64)
+        if not len(mins):
+            return np.zeros(0, dtype=bool)
+        positive = self.normals > 0  # (6, 3)
+        corners = np.where(positive[None], maxs[:, None, :], mins[:, None, :])  # (n, 6, 3)
+        return ((corners * self.normals[None]).sum(axis=2) + self.distances >= 0).all(axis=1)
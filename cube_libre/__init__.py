@@ -0,0 +1,19 @@
+# "Cube Libre"
+#
+# This is a "cubistic" puzzle/adventure game, where you are a cube consisting of smaller cubes.
+# The idea is that whenever you hit something, your main cube (that consists of smaller cubes) breaks a little.
+# Another core concept is that you must navigate through a laser maze to a portal with your cube, and keep as many cubes of your main cube intact while at it.
+# The idea is to finally transcend as a 1x1 single cube into the heavens and join the stars.
+#
+# Run it with `python -m cube_libre`. The package:
+#   settings.py   - every tunable of the game
+#   simulation.py - game state and the fixed tick (no window, no GL)
+#   renderer.py   - draws a simulation into the current GL context
+#   input.py      - keyboard state to simulation controls
+#   app.py        - the Game object: window, main loop, frame pacing
+# Importing any of these has no side effects; nothing opens until a Game is made.
+#
+# By FlyingFathead (w/ a little help from imaginary digital friends) // Dec 2023 - Dec 2024
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+version_number = "0.15.9"
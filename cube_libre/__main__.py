@@ -0,0 +1,14 @@
+# "Cube Libre" - `python -m cube_libre`
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import sys
+
+# Start the clock before anything heavy is imported
+from cube_libre.startup import StartupProfile
+
+startup = StartupProfile()
+with startup.phase("imports"):
+    from cube_libre.app import main
+
+sys.exit(main(startup))
@@ -0,0 +1,262 @@
+# "Cube Libre" - app
+#
+# The Game object ties the simulation, the renderer and the input together and
+# runs the main loop: fixed simulation ticks (sim_clock.py), one interpolated
+# render per displayed frame, paced by frame_pacer.py.
+#
+#   game = Game()          # Opens the window
+#   game.run()
+#
+# Tools can drive the game a frame or a tick at a time instead, and without a
+# window at all (Game(window=False)): step() runs one simulation tick, render()
+# draws once a renderer exists (create_renderer() sets one up in whatever GL
+# context is current). Without a window, frame() reads no events or keys (set
+# game.controls instead) and presents nothing.
+#
+# Every frame is timed by phase (input, sim with its ticks and collisions,
+# render, hud, flip) into the flight recorder (flight_recorder.py), which
+# writes a Chrome trace of the last frames when one goes over hitch_budget,
+# and feeds the performance HUD (hud.py), which F3 toggles. `--trace FILE`
+# writes the last frames out on exit as well.
+#
+# F9 profiles the next profile_frames frames (frame_profiler.py): a pstats
+# file, collapsed stacks for a flame graph and the capture's frame times, body
+# size and voxel counts, in profile_dir. `--profile N` does the same for N
+# frames from frame 120 on (`--profile-start FRAME`), past startup.
+#
+# Startup is timed phase by phase into a StartupProfile (startup.py); the
+# star field is built right after the first present, not before it.
+#
+# `--record FILE` records the session's input for replay (replay.py); `--seed N`
+# makes the body, debris and stars come out the same every run.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import argparse
+import os
+import random
+
+import pygame
+from pygame.locals import DOUBLEBUF, OPENGL
+
+from flight_recorder import FlightRecorder
+from frame_pacer import FramePacer
+from frame_profiler import FrameProfiler
+from sim_clock import SimClock
+
+from cube_libre import settings, version_number
+from cube_libre.hud import PerformanceHud
+from cube_libre.input import read_controls
+from cube_libre.renderer import Renderer, check_gl_version
+from cube_libre.replay import Recorder
+from cube_libre.simulation import Simulation, no_input
+from cube_libre.startup import StartupProfile
+
+# Initialize Pygame and open the game window with an OpenGL 3.3 compatibility
+# context (flags are added to the window flags, e.g. HIDDEN); returns the frame
+# pacer that presents its frames
+def open_window(display=None, flags=0):
+    display = display or settings.display
+
+    # Detect if running under Wayland
+    if 'WAYLAND_DISPLAY' in os.environ:
+        # Attempt to use native Wayland support if available
+        print("[INFO] Detected Wayland. Attempting to use native Wayland support.")
+    else:
+        # Default to X11
+        print("[INFO] Using X11 as the windowing system.")
+
+    # Only the display: the game has no sound, fonts or joysticks, and opening
+    # the audio device can take a while on some machines
+    pygame.display.init()
+
+    # # Request an OpenGL 3.3 core profile context
+    # pygame.display.gl_set_attribute(pygame.GL_CONTEXT_PROFILE_MASK, pygame.GL_CONTEXT_PROFILE_CORE)
+
+    # Request OpenGL 3.3 compatibility profile
+    pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MAJOR_VERSION, 3)
+    pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MINOR_VERSION, 3)
+    pygame.display.gl_set_attribute(pygame.GL_CONTEXT_PROFILE_MASK, pygame.GL_CONTEXT_PROFILE_COMPATIBILITY)
+
+    frame_pacer = FramePacer(settings.frame_pacing, target_fps=settings.target_fps)
+    frame_pacer.open_display(display, DOUBLEBUF | OPENGL | flags)
+
+    # Set the window title with version number
+    pygame.display.set_caption(f"Cube Libre (demo, v.{version_number})")
+    return frame_pacer
+
+class Game:
+    def __init__(self, window=True, rng=None, startup=None, recorder=None):
+        self.startup = startup if startup is not None else StartupProfile()
+        self.recorder = recorder  # Gets every tick's controls and resulting state
+        self.sim_clock = SimClock(settings.sim_tick_rate)
+        self.controls = no_input
+        self.running = True
+        self.frame_count = 0
+        self.frame_pacer = None
+        self.renderer = None
+        self.hud = PerformanceHud()
+        self.flight_recorder = FlightRecorder(settings.flight_recorder_frames, budget=settings.hitch_budget,
+                                              trace_dir=settings.trace_dir)
+        self.profiler = FrameProfiler(settings.profile_dir, settings.profile_sample_interval,
+                                      annotate=self.profile_annotations)
+        self.profile_start = None  # (frame, frames): profile that many frames once frame_count gets there
+        if window:
+            with self.startup.phase("context"):
+                self.frame_pacer = open_window()
+        with self.startup.phase("world"):
+            self.sim = Simulation(rng=rng)
+            self.sim.collision_scope = self.flight_recorder.scope("collision")
+        if window:
+            with self.startup.phase("buffers"):
+                self.create_renderer()
+        if settings.show_hud:
+            self.hud.show()
+
+    # Set up the renderer in the current GL context
+    def create_renderer(self, display=None):
+        check_gl_version()
+        self.renderer = Renderer(self.sim, display)
+        return self.renderer
+
+    # One fixed simulation tick with the current (or the given) controls
+    def step(self, delta_time=None, controls=None):
+        controls = self.controls if controls is None else controls
+        self.sim.step(self.sim_clock.dt if delta_time is None else delta_time, controls)
+        if self.recorder is not None:
+            self.recorder.record(controls, self.sim)
+
+    # Draw the current state; alpha interpolates between the last two ticks
+    def render(self, alpha=1.0):
+        if self.renderer is not None:
+            self.renderer.render(alpha)
+
+    # What a profile capture was of (frame_profiler.py)
+    def profile_annotations(self):
+        body = self.sim.cubes
+        return {"version": version_number, "cube_size": settings.cube_size,
+                "body_render_mode": settings.body_render_mode, "live_voxels": body.live_count,
+                "voxels": body.count, "debris": self.sim.debris.count, "last_frame": self.frame_count - 1}
+
+    # Events and input, the ticks due for the time that has passed, one render
+    # and the present. frame_time overrides the real time that has passed.
+    def frame(self, frame_time=None):
+        if self.profile_start is not None and self.frame_count >= self.profile_start[0]:
+            self.profiler.start(self.profile_start[1])
+            self.profile_start = None
+        self.profiler.begin_frame()
+        recorder = self.flight_recorder
+        recorder.begin_frame()
+        # Without a window there are no events or keys: self.controls is
+        # whatever the caller set
+        if self.frame_pacer is not None:
+            with recorder.scope("input"):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self.running = False
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                        self.hud.toggle()
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                        self.profiler.start(settings.profile_frames)
+
+                # Get the state of all keyboard keys
+                self.controls = read_controls(pygame.key.get_pressed())
+                self.frame_pacer.input_sampled()
+        if not self.running:
+            self.profiler.end_frame(recorder.end_frame())
+            return
+
+        # Run the simulation in fixed ticks for the real time that has passed
+        with recorder.scope("sim"):
+            tick = recorder.scope("tick")
+            for delta_time in self.sim_clock.ticks(frame_time):
+                with tick:
+                    self.step(delta_time)
+
+        with recorder.scope("render"):
+            self.render(self.sim_clock.alpha)
+        if self.hud.visible and self.renderer is not None:
+            with recorder.scope("hud"):
+                self.hud.draw(self.renderer.display)
+
+        # Flip, then wait until the next frame is due
+        if self.frame_pacer is not None:
+            with recorder.scope("flip"):
+                self.frame_pacer.present()
+        self.frame_count += 1
+        if self.frame_count == 1 and self.renderer is not None:
+            with recorder.scope("deferred"):
+                self.after_first_frame()
+
+        duration = recorder.end_frame()
+        phases = {}
+        if self.hud.visible:
+            phases = recorder.frame_phases()
+            phases["sim"] = phases.get("sim", 0.0) - phases.get("collision", 0.0)
+        self.hud.update(duration, phases, self.sim)
+        self.profiler.end_frame(duration)
+
+    # The first frame is out: build what it went without
+    def after_first_frame(self):
+        self.startup.mark_first_present()
+        with self.startup.deferred_phase("stars"):
+            self.renderer.build_deferred()
+        if settings.startup_report:
+            print(f"[INFO] Startup: {self.startup.report()}")
+
+    # Main game loop
+    def run(self):
+        while self.running:
+            self.frame()
+        if self.frame_pacer is not None:
+            print(f"[INFO] Frame pacing: {self.frame_pacer.report()}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cube_libre", description="Cube Libre (demo)")
+    parser.add_argument("--seed", type=int, help="seed for the body, debris and stars (random when recording)")
+    parser.add_argument("--record", metavar="FILE", help="record the session's input for replay")
+    parser.add_argument("--trace", metavar="FILE", help="write the last frames' timings as a Chrome trace on exit")
+    parser.add_argument("--profile", type=int, metavar="N", help=f"profile N frames into {settings.profile_dir}/")
+    parser.add_argument("--profile-start", type=int, default=120, metavar="FRAME",
+                        help="frame the --profile capture starts at (default: 120)")
+    return parser.parse_args(argv)
+
+def main(startup=None, argv=None):
+    args = parse_args(argv)
+    seed = args.seed
+    if seed is None and args.record:
+        seed = random.randrange(2 ** 32)
+    rng = None
+    if seed is not None:
+        rng = random.Random(seed)
+        random.seed(seed)  # Screen shake
+        if settings.star_seed is None:
+            settings.star_seed = seed
+    recorder = Recorder(seed) if args.record else None
+
+    try:
+        game = Game(rng=rng, startup=startup, recorder=recorder)
+    except (pygame.error, RuntimeError) as e:
+        print(f"Failed to start: {e}")
+        pygame.quit()
+        return 1
+    if args.profile:
+        game.profile_start = (args.profile_start, args.profile)
+    game.run()
+    pygame.quit()
+    flight_recorder = game.flight_recorder
+    if args.trace:
+        flight_recorder.dump(args.trace)
+        print(f"[INFO] Wrote the last {min(flight_recorder.frame_count, flight_recorder.capacity)} frames "
+              f"to {args.trace}")
+    if flight_recorder.hitches:
+        print(f"[INFO] Hitches (frames over {settings.hitch_budget * 1e3:.0f} ms): {flight_recorder.hitches}; "
+              f"traces: {', '.join(flight_recorder.dumps) or 'none written'}")
+    flight_recorder.close()
+    game.profiler.close()
+    for capture in game.profiler.captures:
+        print(f"[INFO] Profile: {capture}.pstats, {capture}.collapsed (flame graph), {capture}.json")
+    if recorder is not None:
+        recorder.save(args.record)
+        print(f"[INFO] Recorded {len(recorder.recording)} ticks (seed {seed}) to {args.record}")
+    return 0
@@ -0,0 +1,346 @@
+# "Cube Libre" - headless benchmark
+#
+# Runs a scripted scene for a fixed number of frames in an offscreen OpenGL
+# context and prints the results as JSON: frame time percentiles, CPU time per
+# phase of the frame and GL calls per frame. Needs no display and no GPU: on
+# a plain Linux box Mesa's llvmpipe software rasterizer does the drawing.
+#
+#   python -m cube_libre.bench --frames 600 --cube-size 16 --stars 100000 --debris 2000
+#
+# Context backends (--backend):
+#   egl    - EGL surfaceless pbuffer through PyOpenGL (Mesa; the default)
+#   osmesa - Mesa's off-screen renderer through PyOpenGL (needs libOSMesa)
+#   sdl    - pygame window on SDL's "offscreen" video driver (EGL underneath)
+#   window - hidden pygame window on the real display
+#   null   - no context at all: the null GL backend (gl_backend.py) takes the
+#            calls, so the frame times are the game's own Python time for
+#            culling, sorting and submitting the scene
+# Software rendering is forced (LIBGL_ALWAYS_SOFTWARE) unless --hardware.
+#
+# The scene is the game itself, stepped one fixed tick per frame with scripted
+# controls (down onto the horizon, across, back up...), seeded, so two runs
+# render the same frames. --debris keeps that many broken-off cubes in the air.
+# --replay plays a recorded session instead (replay.py; looped if it is shorter
+# than the run), with the seed and gameplay settings it was recorded with.
+#
+# Phases (milliseconds, per frame):
+#   simulation - the tick: movement, collisions, debris
+#   scene      - culling, sorting and submitting the scene to the render queue
+#   flush      - the render queue issuing its GL calls
+#   finish     - glFinish(): waiting for the rasterizer
+#   present    - swapping buffers (sdl / window backends)
+# GL calls are counted in a separate pass after the timed frames, so counting
+# doesn't slow down the frames that are measured: the recording GL backend
+# (gl_backend.py) sits in front of the real one and reports calls, state
+# changes (and redundant ones) and bytes uploaded per frame.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import argparse
+import contextlib
+import ctypes
+import ctypes.util
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+backends = ("egl", "osmesa", "sdl", "window", "null")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cube_libre.bench",
+                                     description="Headless Cube Libre benchmark; prints JSON.")
+    parser.add_argument("--backend", choices=backends, default="egl", help="offscreen context to render into")
+    parser.add_argument("--frames", type=int, default=600, help="measured frames")
+    parser.add_argument("--warmup", type=int, default=60, help="frames run before measuring")
+    parser.add_argument("--size", default="800x600", help="framebuffer size, WIDTHxHEIGHT")
+    parser.add_argument("--cube-size", type=int, default=5, help="cubes per side of the body")
+    parser.add_argument("--stars", type=int, default=1000, help="number of stars")
+    parser.add_argument("--debris", type=int, default=0, help="broken-off cubes kept in the air")
+    parser.add_argument("--render-mode", choices=("mesh", "instanced"), default="mesh", help="body rendering")
+    parser.add_argument("--no-culling", action="store_true", help="turn frustum culling off")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the body, stars and debris")
+    parser.add_argument("--replay", metavar="FILE", help="play a recorded session instead of the scripted scene "
+                                                         "(its seed and settings override --seed and --cube-size)")
+    parser.add_argument("--gl-frames", type=int, default=10, help="frames to count GL calls over (0 = skip)")
+    parser.add_argument("--hardware", action="store_true", help="don't force software rendering")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    try:
+        args.width, args.height = (int(value) for value in args.size.lower().split("x"))
+    except ValueError:
+        parser.error(f"--size must look like 800x600, not {args.size!r}")
+    return args
+
+# Environment for the backend; has to happen before PyOpenGL or SDL load anything
+def prepare_environment(args):
+    if args.backend == "null":
+        return
+    if not args.hardware:
+        os.environ["LIBGL_ALWAYS_SOFTWARE"] = "1"
+        os.environ.setdefault("GALLIUM_DRIVER", "llvmpipe")
+    if args.backend == "egl":
+        os.environ["PYOPENGL_PLATFORM"] = "egl"
+        os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+    elif args.backend == "osmesa":
+        # PyOpenGL fails obscurely when the library isn't there; say what is missing
+        if ctypes.util.find_library("OSMesa") is None:
+            raise SystemExit("The osmesa backend needs Mesa's libOSMesa (e.g. the libosmesa6 package); "
+                             "try --backend egl")
+        os.environ["PYOPENGL_PLATFORM"] = "osmesa"
+    elif args.backend == "sdl":
+        os.environ["PYOPENGL_PLATFORM"] = "egl"
+        os.environ["SDL_VIDEODRIVER"] = "offscreen"
+
+# OpenGL 3.3 compatibility context on an EGL pbuffer, no window system at all
+class EGLContext:
+    def __init__(self, size):
+        from OpenGL import EGL
+
+        self.display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self.display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("eglInitialize failed")
+        config_attributes = (EGL.EGLint * 13)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8,
+            EGL.EGL_BLUE_SIZE, 8, EGL.EGL_DEPTH_SIZE, 24, EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE)
+        config, count = EGL.EGLConfig(), EGL.EGLint()
+        if not EGL.eglChooseConfig(self.display, config_attributes, ctypes.pointer(config), 1, ctypes.pointer(count)) \
+                or not count.value:
+            raise RuntimeError("No EGL config with a pbuffer and desktop OpenGL")
+        self.surface = EGL.eglCreatePbufferSurface(
+            self.display, config, (EGL.EGLint * 5)(EGL.EGL_WIDTH, size[0], EGL.EGL_HEIGHT, size[1], EGL.EGL_NONE))
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self.context = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, (EGL.EGLint * 7)(
+            EGL.EGL_CONTEXT_MAJOR_VERSION, 3, EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+            EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_COMPATIBILITY_PROFILE_BIT, EGL.EGL_NONE))
+        if not self.context or not EGL.eglMakeCurrent(self.display, self.surface, self.surface, self.context):
+            raise RuntimeError("Could not create an OpenGL 3.3 compatibility context over EGL")
+
+    def present(self):
+        pass
+
+# The same through OSMesa, rendering into a buffer in main memory
+class OSMesaContext:
+    def __init__(self, size):
+        from OpenGL import GL, osmesa
+
+        attributes = np.array([osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA, osmesa.OSMESA_DEPTH_BITS, 24,
+                               osmesa.OSMESA_PROFILE, osmesa.OSMESA_COMPAT_PROFILE,
+                               osmesa.OSMESA_CONTEXT_MAJOR_VERSION, 3, osmesa.OSMESA_CONTEXT_MINOR_VERSION, 3,
+                               0], dtype=np.int32)
+        self.context = osmesa.OSMesaCreateContextAttribs(attributes, None)
+        self.buffer = (ctypes.c_ubyte * (size[0] * size[1] * 4))()
+        if not self.context or not osmesa.OSMesaMakeCurrent(self.context, self.buffer, GL.GL_UNSIGNED_BYTE,
+                                                            size[0], size[1]):
+            raise RuntimeError("Could not create an OpenGL 3.3 compatibility context with OSMesa")
+
+    def present(self):
+        pass
+
+# A pygame window (SDL offscreen driver, or hidden on the real display)
+class WindowContext:
+    def __init__(self, size, hidden):
+        import pygame
+
+        from cube_libre.app import open_window
+
+        self.pygame = pygame
+        self.frame_pacer = open_window(size, pygame.HIDDEN if hidden else 0)
+
+    def present(self):
+        self.pygame.display.flip()
+
+# No context: every GL call goes to the null backend
+class NullContext:
+    def __init__(self):
+        from gl_backend import NullBackend, use_backend
+
+        use_backend(NullBackend())
+
+    def present(self):
+        pass
+
+def create_context(backend, size):
+    if backend == "null":
+        return NullContext()
+    if backend == "egl":
+        return EGLContext(size)
+    if backend == "osmesa":
+        return OSMesaContext(size)
+    return WindowContext(size, hidden=backend == "window")
+
+# Scripted controls: (seconds, Controls) segments, played in a loop
+def scene_script():
+    from cube_libre.simulation import Controls
+
+    return ((1.5, Controls(y=-1)), (1.0, Controls(x=1)), (1.5, Controls(y=1)),
+            (1.0, Controls(x=-1, z=1)), (1.0, Controls(z=-1, fast=True)), (1.0, Controls()))
+
+def controls_at(script, seconds):
+    seconds %= sum(duration for duration, _ in script)
+    for duration, controls in script:
+        if seconds < duration:
+            return controls
+        seconds -= duration
+    return script[-1][1]
+
+# Keep the debris pool at `target` live particles around the body
+def top_up_debris(sim, target, rng):
+    debris = sim.debris
+    for _ in range(target - debris.count):
+        position = sim.cubes.position + rng.uniform(-4.0, 4.0, 3)
+        debris.spawn(position, rng.uniform(-1.0, 1.0, 3), angular_velocity=rng.uniform(-90.0, 90.0),
+                     spin_axis=rng.uniform(-1.0, 1.0, 3) + 1e-3)
+
+def percentiles(samples):
+    samples = np.asarray(samples) * 1e3
+    return {"mean": float(samples.mean()), "p50": float(np.percentile(samples, 50)),
+            "p95": float(np.percentile(samples, 95)), "p99": float(np.percentile(samples, 99)),
+            "max": float(samples.max())}
+
+def run(args):
+    prepare_environment(args)
+
+    from event_log import WARNING, events
+
+    from cube_libre import settings, version_number
+    from cube_libre.startup import StartupProfile
+
+    events.level = WARNING  # The scripted scene collides a lot; keep the output to the JSON
+    settings.display = (args.width, args.height)
+    settings.cube_size = args.cube_size
+    seed = args.seed
+    recording = None
+    if args.replay:
+        from cube_libre.replay import Recording, apply_settings
+
+        try:
+            recording = Recording.load(args.replay)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"Can't read the recording {args.replay}: {e}")
+        apply_settings(recording.settings)
+        if recording.seed is not None:
+            seed = recording.seed
+    settings.num_stars = args.stars
+    settings.star_seed = seed
+    settings.body_render_mode = args.render_mode
+    settings.frustum_culling = not args.no_culling
+    settings.debris_capacity = max(settings.debris_capacity, args.debris)
+    settings.frame_pacing = "uncapped"
+    settings.startup_report = False
+    random.seed(seed)  # Screen shake
+
+    startup = StartupProfile()
+    with startup.phase("imports"):
+        from OpenGL.GL import GL_RENDERER, GL_VENDOR, GL_VERSION
+
+        from gl_backend import RecordingBackend, gl, use_backend
+
+        from cube_libre.app import Game
+    with startup.phase("context"):
+        context = create_context(args.backend, settings.display)
+    game = Game(window=False, rng=random.Random(seed), startup=startup)  # Times "world" itself
+    with startup.phase("buffers"):
+        renderer = game.create_renderer(settings.display)
+        renderer.build_deferred()
+    sim = game.sim
+
+    # Time the render queue's flush on its own, inside the renderer's frame
+    render_queue = renderer.render_queue
+    flush = render_queue.flush
+    flush_time = [0.0]
+
+    def timed_flush():
+        start = time.perf_counter()
+        flush()
+        flush_time[0] += time.perf_counter() - start
+    render_queue.flush = timed_flush
+
+    script = scene_script()
+    debris_rng = np.random.default_rng(seed)
+    dt = game.sim_clock.dt
+    phase_names = ("simulation", "scene", "flush", "finish", "present")
+    phases = {name: [] for name in phase_names}
+    frame_times = []
+    frame = 0
+
+    def run_frame():
+        nonlocal frame
+        top_up_debris(sim, args.debris, debris_rng)
+        flush_time[0] = 0.0
+        start = time.perf_counter()
+        controls = recording.controls_at(frame % len(recording)) if recording else controls_at(script, frame * dt)
+        game.step(dt, controls)
+        stepped = time.perf_counter()
+        renderer.render(1.0)
+        rendered = time.perf_counter()
+        gl.glFinish()
+        finished = time.perf_counter()
+        context.present()
+        presented = time.perf_counter()
+        frame += 1
+        return (presented - start, {"simulation": stepped - start, "scene": rendered - stepped - flush_time[0],
+                                    "flush": flush_time[0], "finish": finished - rendered,
+                                    "present": presented - finished})
+
+    for _ in range(args.warmup):
+        run_frame()
+    for _ in range(args.frames):
+        frame_time, frame_phases = run_frame()
+        frame_times.append(frame_time)
+        for name in phase_names:
+            phases[name].append(frame_phases[name])
+
+    gl_calls = None
+    if args.gl_frames > 0:
+        recorder = RecordingBackend(gl.backend, history=args.gl_frames)
+        previous = use_backend(recorder)
+        try:
+            for _ in range(args.gl_frames):
+                run_frame()
+                recorder.end_frame()
+        finally:
+            use_backend(previous)
+        summary = recorder.summary()
+        gl_calls = {"per_frame": summary["calls"], "state_changes": summary["state_changes"],
+                    "redundant_state_changes": summary["redundant_state_changes"],
+                    "bytes_uploaded": summary["bytes_uploaded"], "by_function": summary["by_function"]}
+
+    return {
+        "version": version_number,
+        "backend": args.backend,
+        "gl": {"vendor": gl.glGetString(GL_VENDOR).decode(), "renderer": gl.glGetString(GL_RENDERER).decode(),
+               "version": gl.glGetString(GL_VERSION).decode()},
+        "config": {"frames": args.frames, "warmup": args.warmup, "size": [args.width, args.height],
+                   "cube_size": settings.cube_size, "stars": args.stars, "debris": args.debris,
+                   "render_mode": args.render_mode, "frustum_culling": not args.no_culling, "seed": seed,
+                   "replay": args.replay},
+        "startup_ms": startup.summary()["phases_ms"],
+        "fps": len(frame_times) / sum(frame_times) if frame_times else None,
+        "frame_ms": percentiles(frame_times) if frame_times else None,
+        "phases_ms": {name: percentiles(samples) for name, samples in phases.items() if samples},
+        "gl_calls": gl_calls,
+        "live_debris": int(sim.debris.count),
+        "stars_drawn": int(renderer.star_field.drawn),
+    }
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Anything the game prints goes to stderr; stdout is for the JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
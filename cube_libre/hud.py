@@ -0,0 +1,137 @@
+# "Cube Libre" - performance HUD
+#
+# FPS, a frame time sparkline, CPU time per phase of the frame (input, sim,
+# collision, render, hud, flip), live voxel and debris counts and draw calls,
+# over the scene. F3 toggles it (settings.show_hud shows it from the start).
+#
+# The text comes from a glyph atlas built once with pygame.font and the whole
+# HUD is one batch, one draw call (overlay_text.py), drawn with the same
+# orthographic overlay set-up as the flash effects (transitions.py). The
+# numbers are averaged and the text rebuilt a few times a second; the
+# sparkline moves every frame. Draw calls are counted with gl_backend's
+# DrawCounter, which is only in place while the HUD is shown.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import numpy as np
+
+from gl_backend import DrawCounter, gl, use_backend
+
+from cube_libre import settings
+
+phase_names = ("input", "sim", "collision", "render", "hud", "flip")
+
+text_color = (1.0, 1.0, 1.0, 1.0)
+dim_color = (0.7, 0.7, 0.7, 1.0)
+panel_color = (0.0, 0.0, 0.0, 0.55)
+budget_color = (1.0, 1.0, 1.0, 0.35)
+# Sparkline bars: within the frame budget, up to twice it, over that
+bar_colors = np.array([(0.3, 0.9, 0.3, 0.9), (1.0, 0.8, 0.2, 0.9), (1.0, 0.25, 0.2, 0.9)], dtype=np.float32)
+
+class PerformanceHud:
+    def __init__(self, history=120, refresh=0.25, font_size=None, margin=8, bar_width=2, graph_height=40):
+        self.visible = False
+        self.refresh = refresh  # Seconds between text updates
+        self.font_size = font_size or settings.hud_font_size
+        self.margin = margin
+        self.bar_width = bar_width
+        self.graph_height = graph_height
+        self.frame_times = np.zeros(history, dtype=np.float32)  # Ring buffer, seconds
+        self.cursor = 0
+        self.batch = None  # Glyph atlas and batch, built the first time the HUD is drawn
+        self.draw_counter = None
+        self._previous_backend = None
+        self.lines = []  # (text, colour) as of the last refresh
+        self._text_quads = None  # The panel and the lines laid out, until the next refresh
+        self._reset_sums()
+
+    def _reset_sums(self):
+        self._phase_sums = dict.fromkeys(phase_names, 0.0)
+        self._frame_sum = 0.0
+        self._frame_max = 0.0
+        self._draw_sum = 0
+        self._frames = 0
+
+    def toggle(self):
+        self.show(not self.visible)
+
+    def show(self, visible=True):
+        if visible and not self.visible:
+            self.draw_counter = DrawCounter(gl.backend)
+            self._previous_backend = use_backend(self.draw_counter)
+        elif not visible and self.visible:
+            use_backend(self._previous_backend)
+            self.draw_counter = None
+        self.visible = visible
+        self._reset_sums()
+
+    # One frame's timings (seconds): the time since the previous frame and the
+    # CPU time of each phase; sim is the Simulation for the counts
+    def update(self, frame_time, phases, sim):
+        self.frame_times[self.cursor] = frame_time
+        self.cursor = (self.cursor + 1) % len(self.frame_times)
+        if not self.visible:
+            return
+        for name in phase_names:
+            self._phase_sums[name] += phases.get(name, 0.0)
+        self._frame_sum += frame_time
+        self._frame_max = max(self._frame_max, frame_time)
+        self._draw_sum += self.draw_counter.take()
+        self._frames += 1
+        if self._frame_sum >= self.refresh:
+            self._refresh_text(sim)
+
+    def _refresh_text(self, sim):
+        frames = self._frames
+        frame_ms = self._frame_sum / frames * 1e3
+        phase_ms = {name: total / frames * 1e3 for name, total in self._phase_sums.items()}
+        body = sim.cubes
+        self.lines = [
+            (f"FPS {frames / self._frame_sum:6.1f}   {frame_ms:5.2f} ms  (max {self._frame_max * 1e3:.2f})",
+             text_color),
+            ("  ".join(f"{name} {phase_ms[name]:.2f}" for name in phase_names[:3]) + " ms", dim_color),
+            ("  ".join(f"{name} {phase_ms[name]:.2f}" for name in phase_names[3:]) + " ms", dim_color),
+            (f"voxels {body.live_count}/{body.count}   debris {sim.debris.count}", text_color),
+            (f"draw calls {self._draw_sum / frames:.1f}", text_color),
+        ]
+        self._text_quads = None
+        self._reset_sums()
+
+    # Draw over whatever has been drawn; needs the GL context the game renders in
+    def draw(self, display):
+        if self.batch is None:
+            from overlay_text import GlyphAtlas, OverlayBatch
+
+            self.batch = OverlayBatch(GlyphAtlas(self.font_size))
+        from transitions import screen_overlay
+
+        batch = self.batch
+        margin = self.margin
+        history = len(self.frame_times)
+        graph_width = history * self.bar_width
+        graph_top = margin * 2 + batch.atlas.line_height * len(self.lines)
+        if self._text_quads is None:
+            text_width = max([batch.atlas.text_width(text) for text, _ in self.lines] + [graph_width])
+            batch.rect(margin / 2, margin / 2, text_width + margin, graph_top + self.graph_height + margin / 2,
+                       panel_color)
+            for row, (text, color) in enumerate(self.lines):
+                batch.text(margin, margin + row * batch.atlas.line_height, text, color)
+            self._text_quads = batch.take()
+        batch.add(self._text_quads)
+
+        # Sparkline of the frame times, oldest on the left, the frame budget
+        # half way up (so the top is twice the budget)
+        budget = 1.0 / settings.target_fps
+        frame_times = np.roll(self.frame_times, -self.cursor)
+        heights = np.minimum(frame_times / (2 * budget), 1.0) * self.graph_height
+        positions = np.empty((history, 2), dtype=np.float32)
+        positions[:, 0] = margin + np.arange(history) * self.bar_width
+        positions[:, 1] = graph_top + self.graph_height - heights
+        sizes = np.empty((history, 2), dtype=np.float32)
+        sizes[:, 0] = max(self.bar_width - 1, 1)
+        sizes[:, 1] = heights
+        batch.rects(positions, sizes, bar_colors[np.searchsorted((budget, 2 * budget), frame_times)])
+        batch.rect(margin, graph_top + self.graph_height / 2, graph_width, 1, budget_color)
+
+        with screen_overlay(0, display[0], display[1], 0):
+            batch.draw()
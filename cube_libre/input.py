@@ -0,0 +1,35 @@
+# "Cube Libre" - input
+#
+# Turns the keyboard state into the Controls the simulation steps with
+# (see simulation.py). The key bindings:
+#   W/S or Up/Down      - move along Y
+#   A/D or Left/Right   - move along X (along Z with Ctrl held)
+#   Q/E                 - move along Z
+#   Shift               - move faster
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import pygame
+
+from cube_libre.simulation import Controls
+
+def read_controls(keys=None):
+    if keys is None:
+        keys = pygame.key.get_pressed()
+    fast = bool(keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT])
+    ctrl_pressed = keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL]
+    left = keys[pygame.K_LEFT] or keys[pygame.K_a]
+    right = keys[pygame.K_RIGHT] or keys[pygame.K_d]
+
+    # Vertical movement (Y-axis)
+    y = bool(keys[pygame.K_UP] or keys[pygame.K_w]) - bool(keys[pygame.K_DOWN] or keys[pygame.K_s])
+    # Z-axis movement keys (Q/E) always move along Z-axis
+    z = bool(keys[pygame.K_q]) - bool(keys[pygame.K_e])
+    x = 0
+    if ctrl_pressed:
+        # If CTRL is pressed, A/LEFT increase Z and D/RIGHT decrease Z
+        z += bool(left) - bool(right)
+    else:
+        # Normal behavior (no CTRL): A/LEFT and D/RIGHT move along X-axis
+        x = bool(right) - bool(left)
+    return Controls(x, y, z, fast)
@@ -0,0 +1,321 @@
+# "Cube Libre" - renderer
+#
+# Draws a Simulation: sets up the GL state and the GPU-side resources (cube
+# VBO, instanced renderer, greedy body mesh, ground grid, stars, portal) and
+# submits the scene to the render queue every frame. Needs a current OpenGL
+# 3.3 compatibility context; creating the window is up to the caller (app.py).
+# All GL calls go through gl_backend.gl, so with the null or recording backend
+# it runs without any context.
+#
+# Only what the first frame needs is set up in the constructor. The star field
+# is procedural and waits for build_deferred(), which the game calls after the
+# first present; the greedy mesher is only imported in "mesh" mode.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import random
+
+import numpy as np
+import OpenGL.error
+from OpenGL.GL import *
+
+from camera import Frustum
+from gl_backend import gl
+from ground_grid import GroundGrid
+from instanced_renderer import InstancedCubeRenderer
+from portal_renderer import PortalRenderer
+from render_queue import OPAQUE, TRANSPARENT, RenderQueue, far_away
+from shaders import eye_position, fixed_function_mvp
+from sim_clock import lerp
+from transitions import draw_screen_overlay
+
+from cube_libre import settings
+
+# Define the vertices for a cube
+vertices = [
+    # Front face
+    -0.5, -0.5, 0.5,
+    0.5, -0.5, 0.5,
+    0.5, 0.5, 0.5,
+    -0.5, 0.5, 0.5,
+
+    # Back face
+    0.5, -0.5, -0.5,
+    -0.5, -0.5, -0.5,
+    -0.5, 0.5, -0.5,
+    0.5, 0.5, -0.5,
+
+    # Top face
+    -0.5, 0.5, 0.5,
+    0.5, 0.5, 0.5,
+    0.5, 0.5, -0.5,
+    -0.5, 0.5, -0.5,
+
+    # Bottom face
+    -0.5, -0.5, 0.5,
+    0.5, -0.5, 0.5,
+    0.5, -0.5, -0.5,
+    -0.5, -0.5, -0.5,
+
+    # Left face
+    -0.5, -0.5, 0.5,
+    -0.5, 0.5, 0.5,
+    -0.5, 0.5, -0.5,
+    -0.5, -0.5, -0.5,
+
+    # Right face
+    0.5, -0.5, 0.5,
+    0.5, 0.5, 0.5,
+    0.5, 0.5, -0.5,
+    0.5, -0.5, -0.5,
+]
+
+# Bounding sphere radius of one cube, in lattice units
+voxel_radius = np.sqrt(3) / 2
+
+# gluPerspective without GLU: the same matrix through glFrustum
+def set_perspective(fovy, aspect, near, far):
+    top = near * np.tan(np.radians(fovy) / 2)
+    gl.glFrustum(-top * aspect, top * aspect, -top, top, near, far)
+
+# Verify the OpenGL version of the current context; returns the version string
+def check_gl_version():
+    version = gl.glGetString(GL_VERSION)
+    if not version:
+        raise RuntimeError("Failed to retrieve OpenGL version.")
+    version_string = version.decode()
+    print(f"OpenGL version: {version_string}")
+
+    # Extract major and minor version numbers
+    major_minor = version_string.split(' ')[0].split('.')[:2]
+    try:
+        major, minor = map(int, major_minor)
+    except ValueError:
+        raise RuntimeError(f"Unexpected OpenGL version format: {version_string}")
+    if major < 3:
+        raise RuntimeError("OpenGL version is below 3.0. VAOs and VBOs may not be supported.")
+    return version_string
+
+class Renderer:
+    # Set up everything needed to draw sim in the current GL context.
+    # Setup failures are raised as RuntimeError with what went wrong.
+    def __init__(self, sim, display=None):
+        self.sim = sim
+        self.display = display or settings.display
+        self.step_size = sim.step_size
+        self.body_render_mode = settings.body_render_mode
+        self.frustum_culling = settings.frustum_culling
+        self.portal_position = settings.portal_position
+
+        # Enable depth testing
+        gl.glEnable(GL_DEPTH_TEST)
+
+        # Set perspective and translate
+        try:
+            set_perspective(45, (self.display[0] / self.display[1]), 0.1, 50.0)
+            gl.glTranslatef(0.0, 0.0, -20.0)  # Move the view farther back
+        except OpenGL.error.GLError as e:
+            raise RuntimeError(f"OpenGL Error during the perspective setup: {e}")
+
+        # Create a VBO to store the vertex data
+        try:
+            self.vbo = gl.glGenBuffers(1)
+            gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            gl.glBufferData(GL_ARRAY_BUFFER, len(vertices) * 4, (GLfloat * len(vertices))(*vertices), GL_STATIC_DRAW)
+        except OpenGL.error.GLError as e:
+            raise RuntimeError(f"OpenGL Error during VBO setup: {e}")
+        gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        # Instanced renderer: every cube of the body (and every piece of debris) in one draw call.
+        # It owns the VAO for the cube VBO and colours the cubes in its voxel shader (see shaders.py).
+        try:
+            self.cube_renderer = InstancedCubeRenderer(self.vbo, vertex_count=len(vertices) // 3,
+                                                       body_size=settings.cube_size,
+                                                       destroyed_tint=settings.debris_color,
+                                                       destroyed_alpha=settings.debris_opacity)
+        except (OpenGL.error.GLError, RuntimeError) as e:
+            raise RuntimeError(f"OpenGL Error during instanced renderer setup: {e}")
+
+        # Greedy-meshed body geometry, remeshed slice by slice as cubes break off
+        self.body_mesh = None
+        if self.body_render_mode == "mesh":
+            from mesher import BodyMesh
+            try:
+                self.body_mesh = BodyMesh(sim.cubes)
+            except (OpenGL.error.GLError, RuntimeError) as e:
+                raise RuntimeError(f"OpenGL Error during body mesh setup: {e}")
+
+        # Bounding sphere radius of the whole body around its origin (the lattice is off-centre for odd sizes)
+        self.body_radius = float(np.linalg.norm(sim.cubes.lattice, axis=1).max()) + voxel_radius
+
+        # The horizon grid is drawn procedurally in a shader and never ends (see ground_grid.py)
+        self.ground_grid = GroundGrid(spacing=2.0, line_width=1.0, color=(1.0, 1.0, 1.0))
+
+        # The scene is submitted to a render queue every frame and drawn sorted by
+        # pass, program, VAO and depth (see render_queue.py)
+        self.render_queue = RenderQueue()
+
+        # Built by build_deferred()
+        self.star_field = None
+
+        # The portal and its glow: one quad, the glow falloff is worked out in a shader (see portal_renderer.py)
+        self.portal_renderer = PortalRenderer((settings.portal_size, settings.portal_size),
+                                              color=settings.portal_color,
+                                              reach=settings.portal_glow_reach,
+                                              glow_alpha=settings.portal_glow_alpha,
+                                              falloff=settings.portal_glow_falloff)
+        # Bounding sphere of the portal quad, glow included
+        self.portal_radius = settings.portal_size / 2 * max(settings.portal_glow_reach, 1.0) * np.sqrt(2)
+
+    # Procedural content the first frame goes without
+    def build_deferred(self):
+        if self.star_field is None:
+            from starfield import StarField
+            # Generate random positions for stars once, into a static VBO (see starfield.py)
+            self.star_field = StarField(settings.num_stars, extent=settings.star_extent,
+                                        point_size=settings.star_point_size,
+                                        rng=np.random.default_rng(settings.star_seed), cull=self.frustum_culling)
+
+    # Draw one frame; alpha (0..1) interpolates the moving parts between the
+    # last two simulation ticks
+    def render(self, alpha=1.0):
+        sim = self.sim
+
+        # Clear the screen
+        gl.glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+        # Apply screen shake
+        gl.glPushMatrix()  # Save the current state of transformations
+        if sim.screen_shake_timer > 0:
+            self.apply_screen_shake()
+
+        self.draw_scene(alpha)
+
+        # Restore the original state after shake
+        gl.glPopMatrix()
+
+        # Render the flash effect over the scene if needed
+        if sim.flash_timer > 0:
+            self.render_flash_effect()
+
+        # The reset fade goes over everything
+        sim.reset_flash.draw()
+
+    def draw_scene(self, alpha=1.0):
+        sim = self.sim
+        step = self.step_size
+        render_queue = self.render_queue
+
+        # Rendering (render() has cleared the screen)
+        gl.glPushMatrix()
+
+        # Rotate the entire scene
+        gl.glRotatef(lerp(sim.previous_angles[0], sim.angles[0], alpha), 1, 0, 0)
+        gl.glRotatef(lerp(sim.previous_angles[1], sim.angles[1], alpha), 0, 1, 0)
+        gl.glRotatef(lerp(sim.previous_angles[2], sim.angles[2], alpha), 0, 0, 1)
+
+        # Where the eye is in scene space, for sorting by depth, and what it can see
+        scene_mvp = fixed_function_mvp()
+        eye = eye_position(scene_mvp)
+        frustum = Frustum(scene_mvp)
+
+        # Draw the portal now
+        gl.glPushMatrix()
+        gl.glTranslatef(*self.portal_position)
+        self.draw_portal(eye, frustum)
+        gl.glPopMatrix()
+
+        # Draw wireframe horizon
+        self.draw_wireframe_horizon()
+
+        # Draw stars (white)
+        self.draw_stars()
+
+        # Intact cubes: apply the body transform once, then draw either the greedy
+        # mesh or the surface cubes at their lattice offsets (with the gradient
+        # applied) in a single call; hidden interior cubes are never submitted, and
+        # neither is the body when its bounding sphere is out of view
+        transform = sim.cubes.transform_matrix(alpha, step)
+        body_depth = float(np.linalg.norm(transform[3, :3] - eye))
+        body_visible = not self.frustum_culling or frustum.sphere_visible(transform[3, :3], self.body_radius * step)
+        if body_visible:
+            gl.glPushMatrix()
+            gl.glMultMatrixf(transform)
+            height_offset = sim.cubes.position[1]
+            if self.body_render_mode == "mesh":
+                # Merged quads in lattice units; the colour bands follow the body height
+                gl.glScalef(step, step, step)
+                body_mesh = self.body_mesh
+                render_queue.submit(OPAQUE, body_mesh.shader.program, body_mesh.vao, body_depth,
+                                    lambda mvp=fixed_function_mvp(): body_mesh.draw(height_offset, mvp, bound=True))
+            else:
+                offsets, layers, faces = sim.cubes.surface_draw_lists()
+                if self.frustum_culling:
+                    # Per voxel, in body space: the planes of the mvp with the body transform applied
+                    in_view = Frustum().spheres_visible(offsets * step, voxel_radius * step)
+                    offsets, layers, faces = offsets[in_view], layers[in_view], faces[in_view]
+                cube_renderer = self.cube_renderer
+                render_queue.submit(OPAQUE, cube_renderer.shader.program, cube_renderer.vao, body_depth,
+                                    lambda mvp=fixed_function_mvp(): cube_renderer.draw_intact(
+                                        offsets * step, layers, height_offset, faces=faces, mvp=mvp, bound=True))
+            gl.glPopMatrix()
+
+        # Broken-off cubes fly on their own, in world space: spinning,
+        # semi-transparent and fading out. They share one draw call, so the
+        # instances themselves are sorted back-to-front.
+        positions, rotations, spin_axes, fades = sim.debris.draw_lists(alpha)
+        positions = positions * step
+        if self.frustum_culling:
+            in_view = frustum.spheres_visible(positions, voxel_radius * step)
+            positions, rotations, spin_axes, fades = positions[in_view], rotations[in_view], spin_axes[in_view], fades[in_view]
+        if len(positions):
+            distances = np.linalg.norm(positions - eye, axis=1)
+            order = np.argsort(-distances)
+            positions, rotations, spin_axes, fades = positions[order], rotations[order], spin_axes[order], fades[order]
+            cube_renderer = self.cube_renderer
+            render_queue.submit(TRANSPARENT, cube_renderer.shader.program, cube_renderer.vao, float(distances.min()),
+                                lambda mvp=fixed_function_mvp(): cube_renderer.draw_destroyed(
+                                    positions, fades, spin_axes, rotations, mvp=mvp, bound=True))
+
+        # Opaque items front-to-back, then the transparent ones back-to-front
+        render_queue.flush()
+
+        gl.glPopMatrix()
+
+    # Stars are opaque points far behind everything else
+    def draw_stars(self):
+        star_field = self.star_field
+        if star_field is None:
+            return
+        self.render_queue.submit(OPAQUE, star_field.shader.program, star_field.vao, far_away,
+                                 lambda mvp=fixed_function_mvp(): star_field.draw(mvp, bound=True),
+                                 point_size=star_field.point_size)
+
+    # draw the portal (blended, so it sorts with the other transparent items by distance from the eye)
+    def draw_portal(self, eye, frustum):
+        if self.frustum_culling and not frustum.sphere_visible(self.portal_position, self.portal_radius):
+            return
+        portal_renderer = self.portal_renderer
+        depth = float(np.linalg.norm(np.subtract(self.portal_position, eye)))
+        self.render_queue.submit(TRANSPARENT, portal_renderer.shader.program, portal_renderer.vao, depth,
+                                 lambda mvp=fixed_function_mvp(): portal_renderer.draw(mvp, bound=True))
+
+    # draw the wireframe horizon
+    def draw_wireframe_horizon(self):
+        # One quad under the camera; lines every 2 units, anti-aliased and fading out with distance.
+        # It spans the whole view, so it goes first among the transparent items.
+        # (Items take their mvp as a default argument: it is captured now, drawn at flush time.)
+        ground_grid = self.ground_grid
+        horizon_y = self.sim.horizon_y
+        self.render_queue.submit(TRANSPARENT, ground_grid.shader.program, ground_grid.vao, far_away,
+                                 lambda mvp=fixed_function_mvp(): ground_grid.draw(horizon_y, mvp, bound=True))
+
+    def apply_screen_shake(self):
+        shake_intensity = settings.screen_shake_intensity
+        random_offset_x = random.uniform(-shake_intensity, shake_intensity)
+        random_offset_y = random.uniform(-shake_intensity, shake_intensity)
+        gl.glTranslatef(random_offset_x, random_offset_y, 0)
+
+    def render_flash_effect(self):
+        # A full-screen red quad with the alpha based on the flash timer
+        draw_screen_overlay((1.0, 0.0, 0.0), self.sim.flash_alpha)
@@ -0,0 +1,225 @@
+# "Cube Libre" - input recording and replay
+#
+# A recording is the seed and the gameplay settings a session started with, the
+# controls of every simulation tick and a hash of the simulation state after
+# each tick. Replaying runs the same ticks headless, as fast as they go, and
+# checks every hash, so a recorded session is a fixed workload for before /
+# after comparisons:
+#
+#   python -m cube_libre --record session.clr    # Play; --seed N to pick the seed
+#   python -m cube_libre.replay session.clr      # Ticks per second, hashes checked
+#   python -m cube_libre.bench --replay session.clr
+#
+# File: b"CLRP", a format version byte, then zlib of: the header length (4
+# bytes) and header JSON (seed, settings, tick count), the controls and the
+# state hashes (8 bytes per tick). Controls are packed into a byte per tick
+# and stored only when they change, as (ticks since the last change as a
+# varint, controls byte) pairs; a long hold costs two bytes.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import argparse
+import hashlib
+import json
+import random
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from cube_libre import settings, version_number
+from cube_libre.simulation import Controls, Simulation
+
+magic = b"CLRP"
+format_version = 1
+
+# The settings a Simulation's ticks depend on; recorded, and put back on replay
+simulation_settings = (
+    "cube_size", "cube_spacing", "cube_break_velocity_factor", "cube_break_spin_speed", "start_position",
+    "debris_capacity", "debris_gravity", "debris_lifetime", "debris_fade_time", "debris_bounds",
+    "default_move_speed", "z_default_move_speed", "shift_multiplier", "rotation_speed", "sim_tick_rate",
+    "horizon_y", "max_destruction_rate", "screen_shake_duration", "flash_duration",
+    "reset_fade_out", "reset_fade_hold", "reset_fade_in",
+)
+
+def snapshot_settings():
+    return {name: getattr(settings, name) for name in simulation_settings}
+
+def apply_settings(values):
+    for name, value in values.items():
+        setattr(settings, name, tuple(value) if isinstance(value, list) else value)
+
+# x and y are -1..1, z -2..2 (Q/E and Ctrl+A/D add up), fast a flag
+def pack_controls(controls):
+    return (controls.x + 1) | (controls.y + 1) << 2 | (controls.z + 2) << 4 | bool(controls.fast) << 7
+
+def unpack_controls(packed):
+    return Controls((packed & 3) - 1, (packed >> 2 & 3) - 1, (packed >> 4 & 7) - 2, bool(packed >> 7))
+
+# Hash of everything a tick changes: the body, the live debris, the sway, the
+# cooldown and effect timers and the reset fade
+def state_hash(sim):
+    digest = hashlib.blake2b(digest_size=8)
+    body = sim.cubes
+    for array in (body.position, body.orientation, body.destroyed, body.colors, body.positions):
+        digest.update(array.tobytes())
+    debris = sim.debris
+    alive = np.flatnonzero(debris.alive)
+    digest.update(alive.tobytes())
+    for array in (debris.positions, debris.velocities, debris.rotations, debris.ages):
+        digest.update(array[alive].tobytes())
+    digest.update(struct.pack("<7d2q", *sim.angles, sim.destruction_cooldown, sim.screen_shake_timer,
+                              sim.flash_timer, sim.reset_flash.elapsed, sim.reset_flash.index, sim.tick_count))
+    return digest.digest()
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class Recording:
+    def __init__(self, seed, settings_values=None, controls=None, hashes=None, version=version_number):
+        self.seed = seed
+        self.settings = dict(settings_values if settings_values is not None else snapshot_settings())
+        self.controls = controls if controls is not None else []  # Packed controls byte per tick
+        self.hashes = hashes if hashes is not None else []  # State hash after each tick
+        self.version = version
+
+    def __len__(self):
+        return len(self.controls)
+
+    def controls_at(self, tick):
+        return unpack_controls(self.controls[tick])
+
+    def to_bytes(self):
+        changes = bytearray()
+        previous, last_change = None, 0
+        for tick, packed in enumerate(self.controls):
+            if packed != previous:
+                _write_varint(changes, tick - last_change)
+                changes.append(packed)
+                previous, last_change = packed, tick
+        header = json.dumps({"seed": self.seed, "version": self.version, "settings": self.settings,
+                             "ticks": len(self.controls), "changes": len(changes),
+                             "hashed": bool(self.hashes)}).encode()
+        payload = struct.pack("<I", len(header)) + header + bytes(changes) + b"".join(self.hashes)
+        return magic + bytes((format_version,)) + zlib.compress(payload, 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != magic:
+            raise ValueError("Not a Cube Libre recording")
+        if data[4] != format_version:
+            raise ValueError(f"Recording format {data[4]} is not supported (this build reads {format_version})")
+        try:
+            payload = zlib.decompress(data[5:])
+        except zlib.error as e:
+            raise ValueError(f"Corrupt recording ({e})")
+        (header_length,) = struct.unpack_from("<I", payload)
+        header = json.loads(payload[4:4 + header_length])
+        offset = 4 + header_length
+        end = offset + header["changes"]
+        ticks = header["ticks"]
+        controls = bytearray()
+        while offset < end:
+            gap, offset = _read_varint(payload, offset)
+            if controls:
+                controls.extend(controls[-1:] * (gap - 1))
+            controls.append(payload[offset])
+            offset += 1
+        if controls:
+            controls.extend(controls[-1:] * (ticks - len(controls)))
+        hashes = [payload[start:start + 8] for start in range(end, end + ticks * 8, 8)] if header["hashed"] else []
+        return cls(header["seed"], header["settings"], list(controls), hashes, header["version"])
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+# Collects a session tick by tick; the Game calls record() after every tick
+class Recorder:
+    def __init__(self, seed):
+        self.recording = Recording(seed)
+
+    def record(self, controls, sim):
+        self.recording.controls.append(pack_controls(controls))
+        self.recording.hashes.append(state_hash(sim))
+
+    def save(self, path):
+        self.recording.save(path)
+
+# Run a recording's ticks on a fresh Simulation; returns the timing, and with
+# check the first tick whose state hash differs from the recorded one (None if
+# all match). Applies the recording's settings.
+def replay(recording, check=True):
+    apply_settings(recording.settings)
+    sim = Simulation(rng=random.Random(recording.seed))
+    delta_time = 1.0 / settings.sim_tick_rate
+    check = check and bool(recording.hashes)
+    # Unpack up front, so only the ticks (and hashes) are timed
+    controls = [unpack_controls(packed) for packed in range(256)]
+    ticks = [controls[packed] for packed in recording.controls]
+    mismatch = None
+    start = time.perf_counter()
+    for tick, tick_controls in enumerate(ticks):
+        sim.step(delta_time, tick_controls)
+        if check and mismatch is None and state_hash(sim) != recording.hashes[tick]:
+            mismatch = tick
+    seconds = time.perf_counter() - start
+    return {"ticks": len(ticks), "seconds": seconds,
+            "ticks_per_second": len(ticks) / seconds if seconds > 0 else None,
+            "checked": check, "first_mismatch": mismatch}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cube_libre.replay",
+                                     description="Replay a recorded Cube Libre session headless.")
+    parser.add_argument("recording", help="file written by python -m cube_libre --record")
+    parser.add_argument("--no-check", action="store_true", help="don't hash the state (time the ticks alone)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay this many times (best run is reported)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    from event_log import WARNING, events
+
+    events.level = WARNING  # Collisions are logged at INFO; keep them out of the timing
+    try:
+        recording = Recording.load(args.recording)
+    except (OSError, ValueError) as e:
+        print(f"Can't read the recording {args.recording}: {e}", file=sys.stderr)
+        return 2
+    results = [replay(recording, check=not args.no_check) for _ in range(max(args.repeat, 1))]
+    result = min(results, key=lambda result: result["seconds"])
+    result.update(recording=args.recording, seed=recording.seed, recorded_with=recording.version,
+                  version=version_number)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"[INFO] Replay: {result['ticks']} ticks in {result['seconds']:.3f} s "
+              f"({result['ticks_per_second'] or 0:.0f} ticks/s)")
+    if result["first_mismatch"] is not None:
+        print(f"[WARNING] Replay diverged from the recording at tick {result['first_mismatch']}", file=sys.stderr)
+        return 1
+    if result["checked"]:
+        print("[INFO] State hashes match the recording on every tick", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
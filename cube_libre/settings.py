@@ -0,0 +1,97 @@
+# "Cube Libre" - settings
+#
+# Every tunable of the game in one place. The other modules read these when a
+# Game (or Simulation / Renderer) is constructed, so tools can change them
+# first:
+#
+#   from cube_libre import settings
+#   settings.cube_size = 10
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+# Window
+display = (800, 600)
+
+# Define the dimensions of the main cube
+cube_size = 5  # Number of small cubes per side
+cube_spacing = 1.0  # Increased spacing to avoid overlap
+cube_break_velocity_factor = 0.3  # Adjust this to make cubes fly off faster or slower
+cube_break_spin_speed = 3.0  # Max degrees per second a broken-off cube spins at
+body_render_mode = "mesh"  # "mesh" = greedy-meshed quads (mesher.py), "instanced" = one cube per surface voxel
+frustum_culling = True  # Leave out voxels, debris, stars and the portal when they are out of view (camera.py)
+
+# start position variable
+start_position = (-18.0, 0.0, -18.0)  # For example, near the edge of the horizon grid
+
+# Debris (broken-off cubes) settings
+debris_capacity = 4096  # Max flying cubes at once; the oldest ones get recycled
+debris_gravity = -0.25  # Units per second squared along Y
+debris_lifetime = 8.0  # Seconds before a flying cube is removed
+debris_fade_time = 2.0  # Seconds of fade-out at the end of the lifetime
+debris_bounds = 60.0  # Flying cubes further out than this on any axis are removed
+debris_color = (1.0, 1.0, 1.0)  # Flying cubes are drawn white...
+debris_opacity = 0.5  # ...and semi-transparent
+
+# Movement speed (units per second of simulation time; 0.1 per tick at 60 Hz)
+default_move_speed = 6.0
+# Define Z-axis movement speed
+z_default_move_speed = 6.0
+shift_multiplier = 3.0  # Shift speeds movement up by this much
+rotation_speed = 60.0  # Degrees per second the whole scene sways
+
+# Fixed simulation rate; rendering interpolates between ticks
+sim_tick_rate = 60  # Ticks per second
+
+# Frame pacing (see frame_pacer.py): "vsync", "target" (precise target_fps),
+# "adaptive" (sleep only) or "uncapped" (benchmarks)
+frame_pacing = "vsync"
+target_fps = 60  # For "target" and "adaptive", and when vsync isn't available
+startup_report = True  # Print where the time to the first frame went (see startup.py)
+
+# Performance HUD (see hud.py): FPS, frame times, time per phase, counts; F3 toggles it
+show_hud = False  # Shown from the start
+hud_font_size = 16
+
+# Flight recorder (see flight_recorder.py): the phase timings of the last frames;
+# a frame over hitch_budget has them written out as a Chrome trace into trace_dir
+flight_recorder_frames = 4096
+hitch_budget = 0.1  # Seconds; None = never write traces on their own
+trace_dir = "traces"
+
+# Frame profiler (see frame_profiler.py): F9 profiles the next profile_frames
+# frames with cProfile and a stack sampler, written into profile_dir
+profile_frames = 300
+profile_dir = "profiles"
+profile_sample_interval = 0.001  # Seconds between stack samples
+
+# Assuming the horizon is at a fixed Y-coordinate
+# (the one place it is set: both the collision check and the drawn grid use it)
+horizon_y = -5
+
+# Destruction rate on horizon contact
+max_destruction_rate = 0.5  # 1.0 = One cube per second
+
+# portal_position = (0.0, 0.0, 20.0)  # Position of the portal (x, y, z)
+# portal_position = (18.0, 0.0, 18.0)
+portal_position = (18.0, 0.0, -18.0)
+portal_size = 5.0  # Width and height of the portal
+portal_color = (0.0, 1.0, 1.0)  # Cyan color for glowing effect
+portal_glow_reach = 3.0  # The glow reaches out to this many times the portal size
+portal_glow_alpha = 0.6  # Glow opacity right at the portal's edge
+portal_glow_falloff = 2.0  # Higher = the glow dies off faster
+
+# Define the number of stars
+num_stars = 1000
+star_extent = 50.0
+star_point_size = 2  # Adjust point size for visibility
+star_seed = None  # Seed for the star positions; None = different every run
+
+# Hit effects
+screen_shake_duration = 0.5  # Duration of the shake in seconds
+screen_shake_intensity = 0.5  # Max offset of the shake
+flash_duration = 0.3  # Duration of the flash in seconds
+
+# Reset fade once the whole body is gone (seconds)
+reset_fade_out = 0.5
+reset_fade_hold = 0.1
+reset_fade_in = 0.5
@@ -0,0 +1,124 @@
+# "Cube Libre" - simulation
+#
+# Everything that changes with game time: the voxel body and its debris, the
+# scene sway, the destruction cooldown, the hit effect timers and the reset
+# fade. No window and no GL calls here: tools can build a Simulation on its
+# own and step it as fast as they like.
+#
+#   sim = Simulation()
+#   for _ in range(600):
+#       sim.step(1 / 60, Controls(y=-1))
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+from collections import namedtuple
+from contextlib import nullcontext
+
+from debris import DebrisPool
+from transitions import FadeTransition
+from voxel_body import VoxelBody
+
+from cube_libre import settings
+
+# One tick's worth of input: movement along each axis (-1, 0, 1; keys that map
+# to the same axis add up) and whether the fast modifier is held
+Controls = namedtuple("Controls", ("x", "y", "z", "fast"), defaults=(0, 0, 0, False))
+no_input = Controls()
+
+class Simulation:
+    def __init__(self, rng=None):
+        self.step_size = settings.cube_spacing  # Calculate the step size for positioning small cubes
+        self.horizon_y = settings.horizon_y
+
+        # The player body: a structure-of-arrays voxel store (see voxel_body.py).
+        # cubes[x][y][z] still works through its Cube compatibility shim.
+        self.debris = DebrisPool(settings.debris_capacity, owners=settings.cube_size ** 3,
+                                 gravity=(0.0, settings.debris_gravity, 0.0),
+                                 lifetime=settings.debris_lifetime,
+                                 fade_time=settings.debris_fade_time,
+                                 bounds_min=(-settings.debris_bounds,) * 3,
+                                 bounds_max=(settings.debris_bounds,) * 3)
+        self.cubes = VoxelBody(settings.cube_size, origin=settings.start_position,
+                               break_velocity_factor=settings.cube_break_velocity_factor,
+                               spin_speed=settings.cube_break_spin_speed,
+                               debris=self.debris, rng=rng)
+
+        # Scene sway angles, and as of the previous tick for interpolation
+        self.angles = (0.0, 0.0, 0.0)
+        self.previous_angles = self.angles
+
+        self.destruction_cooldown = 0.0
+        self.screen_shake_timer = 0.0
+        self.flash_timer = 0.0
+
+        # Fade to white and back once the body is gone; the new body is put in
+        # place while the screen is fully white (see transitions.py)
+        self.reset_flash = FadeTransition(fade_out=settings.reset_fade_out, hold=settings.reset_fade_hold,
+                                          fade_in=settings.reset_fade_in, color=(1.0, 1.0, 1.0),
+                                          on_covered=self.cubes.reset)
+        self.tick_count = 0
+        self.collision_scope = nullcontext()  # Timer around the collision checks (the game's flight recorder)
+
+    # Advance the game by one fixed tick of delta_time seconds
+    def step(self, delta_time, controls=no_input):
+        # Keep the last tick's state around for render interpolation
+        self.cubes.save_previous()
+        self.debris.save_previous()
+        self.previous_angles = self.angles
+
+        self.move(controls, delta_time)
+        self.update_effects(delta_time)
+
+        # Check for collisions and destroy one cube per layer
+        self.destruction_cooldown -= delta_time
+        if self.destruction_cooldown <= 0:
+            with self.collision_scope:
+                self.destroy_one_cube_per_layer()
+            self.destruction_cooldown = 1.0 / settings.max_destruction_rate
+
+        # Broken-off cubes flash in place, then fly off, spin and fade out
+        self.debris.update(delta_time)
+
+        # Update sway angles
+        sway = settings.rotation_speed * delta_time
+        self.angles = tuple(angle + sway for angle in self.angles)
+
+        # Check if all cubes are destroyed: flash the screen, the cubes are reset
+        # to start over while it is white
+        if self.cubes.all_destroyed():
+            self.flash_screen()
+        self.tick_count += 1
+
+    # One body transform, whatever the body size
+    def move(self, controls, delta_time):
+        multiplier = settings.shift_multiplier if controls.fast else 1.0
+        move_speed = settings.default_move_speed * multiplier * delta_time
+        z_move_speed = settings.z_default_move_speed * multiplier * delta_time
+        if controls.x or controls.y or controls.z:
+            self.cubes.translate(controls.x * move_speed, controls.y * move_speed, controls.z * z_move_speed)
+
+    def destroy_one_cube_per_layer(self):
+        # Every layer touching the horizon loses one random cube
+        if self.cubes.destroy_one_per_layer(self.horizon_y):
+            self.trigger_hit_effects()  # Trigger effects when a cube is destroyed
+
+    # flash the screen
+    def flash_screen(self):
+        if not self.reset_flash.active:
+            self.reset_flash.start()
+
+    def trigger_hit_effects(self):
+        self.screen_shake_timer = settings.screen_shake_duration
+        self.flash_timer = settings.flash_duration
+
+    def update_effects(self, delta_time):
+        if self.screen_shake_timer > 0:
+            self.screen_shake_timer -= delta_time
+        if self.flash_timer > 0:
+            self.flash_timer -= delta_time
+        self.reset_flash.update(delta_time)
+
+    # Opacity (0..1) of the red hit flash
+    @property
+    def flash_alpha(self):
+        return min(max(self.flash_timer, 0.0) / settings.flash_duration, 1.0)
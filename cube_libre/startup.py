@@ -0,0 +1,90 @@
+# "Cube Libre" - startup profile
+#
+# Where the time from process start to the first presented frame goes. The
+# launcher (__main__.py) makes a StartupProfile before it imports anything
+# heavy and hands it to the Game, which times its startup phases with it:
+#
+#   interpreter - process start to the profile (Python itself; Linux only)
+#   imports     - pygame, PyOpenGL, numpy and the game modules
+#   context     - pygame.init() and the window / OpenGL context
+#   world       - building the simulation (the voxel body)
+#   buffers     - shaders and vertex buffers on the GPU
+#   first frame - the first render and present
+#
+# Content the first frame can do without (the star field) is built right
+# after the first present, timed as "deferred" and not counted in the time to
+# first frame.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import os
+import time
+from contextlib import contextmanager
+
+# Seconds since this process started, from /proc; None where that isn't available
+def process_age():
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (start time, in clock ticks after boot); the command name
+            # in field 2 can hold spaces, so count from the closing parenthesis
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class StartupProfile:
+    def __init__(self, time_source=time.perf_counter):
+        self.time_source = time_source
+        self.created = time_source()
+        age = process_age()
+        self.phases = []  # (name, seconds), in order
+        if age is not None:
+            self.phases.append(("interpreter", age))
+        self.start = self.created - (age or 0.0)
+        self.last_end = self.created  # End of the latest phase
+        self.first_present = None  # Seconds from start to the first presented frame
+        self.deferred = {}  # Name -> seconds, for what was built after the first frame
+
+    @contextmanager
+    def phase(self, name):
+        start = self.time_source()
+        try:
+            yield
+        finally:
+            self.last_end = self.time_source()
+            self.phases.append((name, self.last_end - start))
+
+    @contextmanager
+    def deferred_phase(self, name):
+        start = self.time_source()
+        try:
+            yield
+        finally:
+            self.deferred[name] = self.time_source() - start
+
+    # Call once the first frame is on screen; the time since the last phase
+    # ended goes down as "first frame"
+    def mark_first_present(self):
+        if self.first_present is None:
+            now = self.time_source()
+            self.phases.append(("first frame", now - self.last_end))
+            self.first_present = now - self.start
+
+    def summary(self):
+        stats = {"phases_ms": {name: seconds * 1e3 for name, seconds in self.phases}}
+        if self.first_present is not None:
+            stats["first_frame_ms"] = self.first_present * 1e3
+        if self.deferred:
+            stats["deferred_ms"] = {name: seconds * 1e3 for name, seconds in self.deferred.items()}
+        return stats
+
+    def report(self):
+        stats = self.summary()
+        phases = ", ".join(f"{name} {ms:.0f}" for name, ms in stats["phases_ms"].items())
+        line = (f"{stats['first_frame_ms']:.0f} ms to first frame ({phases})"
+                if "first_frame_ms" in stats else f"no frame yet ({phases})")
+        if "deferred_ms" in stats:
+            line += "; after it: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in stats["deferred_ms"].items())
+        return line
@@ -0,0 +1,160 @@
+# "Cube Libre" - debris particles
+#
+# Fixed-capacity, array-backed particle pool for cubes that broke off the body.
+# A detached cube becomes a debris particle: it flashes in place for a moment,
+# then flies off under gravity while spinning, fades out towards the end of its
+# lifetime and is culled once it dies or leaves the bounds box.
+#
+# Slots are recycled through a preallocated free-list stack, so spawning and
+# culling never allocate. When the pool is full the oldest particle is reused.
+# Particles can have an owner (the voxel they broke off from, 0..owners - 1);
+# owner_slots maps an owner back to its live slot, so slot_of() is a lookup,
+# not a scan.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import numpy as np
+
+from sim_clock import lerp
+
+class DebrisPool:
+    def __init__(self, capacity, owners=0, gravity=(0.0, -0.25, 0.0), lifetime=8.0, fade_time=2.0,
+                 hold_time=0.2, bounds_min=(-60.0, -60.0, -60.0), bounds_max=(60.0, 60.0, 60.0)):
+        self.capacity = capacity
+        self.gravity = np.array(gravity, dtype=np.float32)
+        self.lifetime = lifetime  # Seconds before a particle is culled
+        self.fade_time = fade_time  # Seconds of fade-out at the end of the lifetime
+        self.hold_time = hold_time  # Seconds a particle flashes in place before moving
+        self.bounds_min = np.array(bounds_min, dtype=np.float32)
+        self.bounds_max = np.array(bounds_max, dtype=np.float32)
+
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.previous_positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 3), dtype=np.float32)
+        self.spin_axes = np.zeros((capacity, 3), dtype=np.float32)
+        self.angular_velocities = np.zeros(capacity, dtype=np.float32)  # Degrees per second
+        self.rotations = np.zeros(capacity, dtype=np.float32)  # Degrees
+        self.previous_rotations = np.zeros(capacity, dtype=np.float32)
+        self.ages = np.zeros(capacity, dtype=np.float32)
+        self.owners = np.full(capacity, -1, dtype=np.int32)  # Source voxel index, -1 if none
+        self.owner_slots = np.full(owners, -1, dtype=np.int32)  # Owner -> its live slot, -1 if none
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        # Scratch buffers (and masks) so update() creates no temporary arrays
+        self._step = np.zeros(capacity, dtype=np.float32)
+        self._step3 = np.zeros((capacity, 3), dtype=np.float32)
+        self._outside = np.zeros((capacity, 3), dtype=bool)
+        self._outside_any = np.zeros(capacity, dtype=bool)
+        self._holding = np.zeros(capacity, dtype=bool)
+        self._expired = np.zeros(capacity, dtype=bool)
+
+        # Free slots as a stack: self._free[:self._free_top] are available
+        self._free = np.arange(capacity - 1, -1, -1, dtype=np.int32)
+        self._free_top = capacity
+        self.count = 0
+
+    # Drop every particle and hand all slots back to the free list
+    def clear(self):
+        self.alive.fill(False)
+        self.owners.fill(-1)
+        self.owner_slots.fill(-1)
+        self._free[:] = np.arange(self.capacity - 1, -1, -1, dtype=np.int32)
+        self._free_top = self.capacity
+        self.count = 0
+
+    # Take a free slot (or the oldest particle when full) and start a particle in it
+    def spawn(self, position, velocity, angular_velocity=0.0, spin_axis=(0.0, 1.0, 0.0), owner=-1):
+        if self._free_top:
+            self._free_top -= 1
+            slot = self._free[self._free_top]
+            self.count += 1
+        else:
+            slot = int(np.argmax(self.ages))
+            if self.owners[slot] >= 0:
+                self.owner_slots[self.owners[slot]] = -1
+        self.positions[slot] = position
+        self.previous_positions[slot] = position
+        self.velocities[slot] = velocity
+        self.spin_axes[slot] = spin_axis
+        self.angular_velocities[slot] = angular_velocity
+        self.rotations[slot] = 0.0
+        self.previous_rotations[slot] = 0.0
+        self.ages[slot] = 0.0
+        self.owners[slot] = owner
+        if owner >= 0:
+            self.owner_slots[owner] = slot
+        self.alive[slot] = True
+        return slot
+
+    # Remember the current state as "previous"; call at the start of every tick
+    def save_previous(self):
+        self.previous_positions[:] = self.positions
+        self.previous_rotations[:] = self.rotations
+
+    def update(self, delta_time):
+        if not self.count:
+            return
+        # Whole-array math: dead slots get a zero time step instead of being
+        # masked out, which keeps every pass contiguous; every result goes into a
+        # preallocated buffer (numpy's fixed-size casting buffers aside)
+        step, step3 = self._step, self._step3
+        np.multiply(self.alive, delta_time, out=step)
+        self.ages += step
+
+        # Flash in place first, then fly and spin
+        np.less_equal(self.ages, self.hold_time, out=self._holding)
+        np.copyto(step, 0.0, where=self._holding)
+        np.multiply(step[:, None], self.gravity, out=step3)
+        self.velocities += step3
+        np.multiply(self.velocities, step[:, None], out=step3)
+        self.positions += step3
+        step *= self.angular_velocities
+        self.rotations += step
+
+        # Cull what has expired or flown out of the bounds box
+        expired, outside, outside_any = self._expired, self._outside, self._outside_any
+        np.greater_equal(self.ages, self.lifetime, out=expired)
+        np.less(self.positions, self.bounds_min, out=outside)
+        expired |= outside.any(axis=1, out=outside_any)
+        np.greater(self.positions, self.bounds_max, out=outside)
+        expired |= outside.any(axis=1, out=outside_any)
+        expired &= self.alive
+        if expired.any():
+            self._release(np.flatnonzero(expired))
+
+    # Free one live slot (e.g. its voxel went back on the body)
+    def release(self, slot):
+        if not self.alive[slot]:
+            return
+        self.alive[slot] = False
+        if self.owners[slot] >= 0:
+            self.owner_slots[self.owners[slot]] = -1
+            self.owners[slot] = -1
+        self._free[self._free_top] = slot
+        self._free_top += 1
+        self.count -= 1
+
+    def _release(self, slots):
+        owners = self.owners[slots]
+        self.owner_slots[owners[owners >= 0]] = -1
+        self.alive[slots] = False
+        self.owners[slots] = -1
+        self._free[self._free_top:self._free_top + len(slots)] = slots
+        self._free_top += len(slots)
+        self.count -= len(slots)
+
+    # Opacity of every slot: 1.0, ramping down to 0.0 over the last fade_time seconds
+    def fades(self):
+        return np.clip((self.lifetime - self.ages) / self.fade_time, 0.0, 1.0)
+
+    # Live slot that holds the given voxel, or -1
+    def slot_of(self, owner):
+        return int(self.owner_slots[owner]) if 0 <= owner < len(self.owner_slots) else -1
+
+    # Draw lists for the live particles: positions, spin (angle + axis) and opacity,
+    # with alpha interpolating between the previous and the current tick
+    def draw_lists(self, alpha=1.0):
+        alive = self.alive
+        positions = lerp(self.previous_positions[alive], self.positions[alive], alpha)
+        rotations = lerp(self.previous_rotations[alive], self.rotations[alive], alpha)
+        return positions, rotations, self.spin_axes[alive], self.fades()[alive]
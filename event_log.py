@@ -0,0 +1,173 @@
+# "Cube Libre" - event log
+#
+# Structured, level-filtered logging for the game loop's hot paths, instead of
+# print() calls that format a string and write to the terminal on every call
+# (125 lines per frame when every cube reported its own move or collision).
+#
+#   events.info("horizon_collision", x=x, y=y, z=z)
+#
+# - An event is a type name plus raw field values. Below the log level the
+#   call returns after one comparison: nothing is formatted, nothing stored.
+# - Each event type is rate limited (token bucket: rate per second, burst) and
+#   counted; what goes over the limit is only counted, and the flusher reports
+#   how many were suppressed.
+# - Records go into an in-memory ring buffer (the last `capacity` of them stay
+#   around for inspection) and are written out by a background thread every
+#   flush_interval seconds, so the game loop never waits on the terminal.
+#
+# The level comes from the CUBE_LIBRE_LOG_LEVEL environment variable
+# (debug / info / warning / error), default info.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import atexit
+import numbers
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+level_names = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+levels_by_name = {name.lower(): level for level, name in level_names.items()}
+
+class EventLog:
+    def __init__(self, level=INFO, capacity=4096, rate=10.0, burst=20, flush_interval=0.25,
+                 stream=None, time_source=time.monotonic):
+        self.level = level
+        self.rate = rate  # Default per-event-type limit: events per second...
+        self.burst = burst  # ...with this many allowed in a row
+        self.flush_interval = flush_interval
+        self.stream = stream  # None = sys.stdout at write time
+        self.time_source = time_source
+        self.start_time = time_source()
+
+        self.records = deque(maxlen=capacity)  # Ring buffer: (time, level, event, fields)
+        self.pending = deque()  # Records the flusher hasn't written yet
+        self.counts = Counter()  # Every event logged at an enabled level, by type
+        self.suppressed = Counter()  # Dropped by the rate limit, by type
+        self._reported_suppressed = Counter()
+        self._limits = {}  # Event type -> (rate, burst)
+        self._buckets = {}  # Event type -> [tokens, last refill time]
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def enabled(self, level):
+        return level >= self.level
+
+    # Own limit for one event type (rate events per second, burst in a row)
+    def set_rate(self, event, rate, burst=None):
+        self._limits[event] = (rate, burst if burst is not None else max(int(rate), 1))
+        self._buckets.pop(event, None)
+
+    def log(self, level, event, **fields):
+        if level < self.level:
+            return
+        # Locked against the flusher (and the other threads that log), which
+        # goes through suppressed and pending
+        with self._lock:
+            self.counts[event] += 1
+            now = self.time_source()
+            if not self._take_token(event, now):
+                self.suppressed[event] += 1
+                return
+            record = (now, level, event, fields)
+            self.records.append(record)
+            self.pending.append(record)
+        if self._thread is None:
+            self._start()
+
+    def debug(self, event, **fields):
+        if DEBUG >= self.level:
+            self.log(DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        if INFO >= self.level:
+            self.log(INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.log(WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        self.log(ERROR, event, **fields)
+
+    def _take_token(self, event, now):
+        bucket = self._buckets.get(event)
+        rate, burst = self._limits.get(event, (self.rate, self.burst))
+        if bucket is None:
+            bucket = self._buckets[event] = [float(burst), now]
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] < 1.0:
+            return False
+        bucket[0] -= 1.0
+        return True
+
+    # Last n records, oldest first
+    def recent(self, n=None):
+        records = list(self.records)
+        return records if n is None else records[-n:]
+
+    def format_record(self, record):
+        timestamp, level, event, fields = record
+        line = f"{timestamp - self.start_time:9.3f} {level_names.get(level, level):<7} {event}"
+        if fields:
+            line += " " + " ".join(f"{key}={_format_value(value)}" for key, value in fields.items())
+        return line
+
+    # Write out everything pending (the flusher thread does this on its own)
+    def flush(self):
+        with self._lock:
+            lines = []
+            while self.pending:
+                lines.append(self.format_record(self.pending.popleft()))
+            for event, count in self.suppressed.items():
+                new = count - self._reported_suppressed[event]
+                if new:
+                    lines.append(f"{self.time_source() - self.start_time:9.3f} {'INFO':<7} event_log "
+                                 f"suppressed event={event} count={new}")
+                    self._reported_suppressed[event] = count
+            if lines:
+                stream = self.stream if self.stream is not None else sys.stdout
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    # Stop the flusher and write out what is left
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.flush()
+
+def _format_value(value):
+    if isinstance(value, numbers.Real) and not isinstance(value, numbers.Integral):
+        return f"{value:.2f}"
+    if isinstance(value, (tuple, list)):
+        return "(" + ", ".join(_format_value(item) for item in value) + ")"
+    return str(value)
+
+# The shared log the game modules write to
+events = EventLog(levels_by_name.get(os.environ.get("CUBE_LIBRE_LOG_LEVEL", "info").lower(), INFO))
+atexit.register(events.close)
@@ -0,0 +1,282 @@
+# "Cube Libre" - frame flight recorder
+#
+# Named scoped timers around the phases of the game loop, kept for the last
+# `capacity` frames in preallocated arrays (a ring buffer: recording a scope
+# is a few array stores, nothing is allocated per frame). When a frame takes
+# longer than the budget, the buffer is written out as Chrome Trace Event
+# JSON, which Perfetto (ui.perfetto.dev) and chrome://tracing open as a
+# timeline of the frames leading up to the hitch.
+#
+#   recorder = FlightRecorder(budget=0.1, trace_dir="traces")
+#   recorder.begin_frame()
+#   with recorder.scope("sim"):
+#       ...
+#   recorder.end_frame()
+#
+# - Scopes nest (a tick inside the sim phase); scope() hands out one reusable
+#   timer per name.
+# - Garbage collections are recorded as scopes of their own ("gc gen N"), so a
+#   collector pause shows up on the timeline where it happened. Only the ones
+#   on the thread that made the recorder (the game loop) count; the gc hook
+#   holds the recorder weakly and goes away with close(), the end of a with
+#   block or the recorder itself.
+# - Frames before `warmup` (startup, the first present) aren't held against
+#   the budget. Traces are written on a background thread, at most one per
+#   `cooldown` seconds and `max_dumps` in all; the copy of the buffer they
+#   are written from is taken at the hitch.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import gc
+import json
+import os
+import threading
+import time
+import weakref
+
+import numpy as np
+
+from event_log import events
+
+class _Scope:
+    __slots__ = ("recorder", "name_id")
+
+    def __init__(self, recorder, name_id):
+        self.recorder = recorder
+        self.name_id = name_id
+
+    def __enter__(self):
+        recorder = self.recorder
+        recorder._open.append(recorder._begin_scope(self.name_id))
+        return self
+
+    def __exit__(self, *exc_info):
+        recorder = self.recorder
+        recorder._end_scope(recorder._open.pop())
+        return False
+
+# gc callback for a recorder: holds it weakly, so a recorder nobody closed can
+# still go away, and ignores collections on other threads
+def _gc_hook(recorder_ref, thread_id):
+    def hook(phase, info):
+        if threading.get_ident() == thread_id:
+            recorder = recorder_ref()
+            if recorder is not None:
+                recorder._gc_event(phase, info)
+    return hook
+
+class FlightRecorder:
+    def __init__(self, capacity=4096, max_scopes=32, budget=None, trace_dir=None, warmup=120,
+                 cooldown=10.0, max_dumps=10, gc_events=True, time_source=time.perf_counter):
+        self.capacity = capacity
+        self.max_scopes = max_scopes
+        self.budget = budget  # Seconds; None = never dump on its own
+        self.trace_dir = trace_dir
+        self.warmup = warmup
+        self.cooldown = cooldown
+        self.max_dumps = max_dumps
+        self.time_source = time_source
+        self.origin = time_source()
+
+        self.names = []  # Scope names by id
+        self._name_ids = {}  # Scope name -> id
+        self._scopes = {}  # Name -> its reusable _Scope
+        self._open = []  # Slots of the scopes entered and not yet left, innermost last
+
+        self.frame_starts = np.zeros(capacity, dtype=np.float64)
+        self.frame_ends = np.zeros(capacity, dtype=np.float64)
+        self.scope_counts = np.zeros(capacity, dtype=np.int32)
+        self.scope_ids = np.zeros((capacity, max_scopes), dtype=np.int16)
+        self.scope_depths = np.zeros((capacity, max_scopes), dtype=np.int8)
+        self.scope_starts = np.zeros((capacity, max_scopes), dtype=np.float64)
+        self.scope_ends = np.zeros((capacity, max_scopes), dtype=np.float64)
+
+        self.frame_count = 0  # Frames begun
+        self.in_frame = False
+        self.dropped_scopes = 0  # Scopes past max_scopes in a frame
+        self.hitches = 0
+        self.dumps = []  # Paths of the traces written (or being written)
+        self._last_dump = None
+        self._writers = []
+
+        self.thread_id = threading.get_ident()  # The game loop's thread
+        self._gc_start = None
+        self._gc_hook = None
+        # "gc gen N" ids up front, so a collection doesn't format or look up its name
+        self._gc_name_ids = [self._name_id(f"gc gen {generation}") for generation in range(len(gc.get_count()))]
+        if gc_events:
+            self._gc_hook = _gc_hook(weakref.ref(self), self.thread_id)
+            gc.callbacks.append(self._gc_hook)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __del__(self):
+        self._remove_gc_hook()
+
+    # The reusable timer for a name: `with recorder.scope("sim"): ...`
+    def scope(self, name):
+        scope = self._scopes.get(name)
+        if scope is None:
+            scope = self._scopes[name] = _Scope(self, self._name_id(name))
+        return scope
+
+    def _name_id(self, name):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def begin_frame(self):
+        slot = self.frame_count % self.capacity
+        self.frame_starts[slot] = self.time_source()
+        self.frame_ends[slot] = 0.0
+        self.scope_counts[slot] = 0
+        self.frame_count += 1
+        self.in_frame = True
+
+    # Close the frame; returns how long it took. Over the budget (past the
+    # warm-up), the buffer is written out as a trace.
+    def end_frame(self):
+        slot = (self.frame_count - 1) % self.capacity
+        now = self.time_source()
+        self.frame_ends[slot] = now
+        self.in_frame = False
+        duration = now - self.frame_starts[slot]
+        if self.budget is not None and duration > self.budget and self.frame_count > self.warmup:
+            self.hitches += 1
+            events.warning("hitch", frame=self.frame_count - 1, ms=round(duration * 1e3, 2),
+                           budget_ms=round(self.budget * 1e3, 2))
+            if self.trace_dir is not None and len(self.dumps) < self.max_dumps \
+                    and (self._last_dump is None or now - self._last_dump >= self.cooldown):
+                self._last_dump = now
+                name = time.strftime("hitch-%Y%m%d-%H%M%S") + f"-frame{self.frame_count - 1}.json"
+                self.dump_async(os.path.join(self.trace_dir, name))
+        return duration
+
+    # Slot of a new scope in the current frame, -1 outside frames or when the frame is full
+    def _begin_scope(self, name_id):
+        if not self.in_frame:
+            return -1
+        slot = (self.frame_count - 1) % self.capacity
+        index = self.scope_counts[slot]
+        if index >= self.max_scopes:
+            self.dropped_scopes += 1
+            return -1
+        self.scope_counts[slot] = index + 1
+        self.scope_ids[slot, index] = name_id
+        self.scope_depths[slot, index] = len(self._open)
+        self.scope_starts[slot, index] = self.time_source()
+        return index
+
+    def _end_scope(self, index):
+        if index >= 0 and self.in_frame:
+            self.scope_ends[(self.frame_count - 1) % self.capacity, index] = self.time_source()
+
+    def _gc_event(self, phase, info):
+        if phase == "start":
+            self._gc_start = self.time_source()
+        elif self._gc_start is not None:
+            index = self._begin_scope(self._gc_name_ids[info["generation"]])
+            if index >= 0:
+                slot = (self.frame_count - 1) % self.capacity
+                self.scope_starts[slot, index] = self._gc_start
+                self.scope_ends[slot, index] = self.time_source()
+            self._gc_start = None
+
+    # Seconds spent in each named scope during the last finished frame (or the
+    # frame `back` frames before it)
+    def frame_phases(self, back=0):
+        frame = self.frame_count - 1 - back - self.in_frame
+        if frame < 0 or back >= self.capacity:
+            return {}
+        slot = frame % self.capacity
+        count = self.scope_counts[slot]
+        phases = {}
+        names = self.names
+        for name_id, start, end in zip(self.scope_ids[slot, :count].tolist(), self.scope_starts[slot, :count].tolist(),
+                                       self.scope_ends[slot, :count].tolist()):
+            name = names[name_id]
+            phases[name] = phases.get(name, 0.0) + max(end - start, 0.0)
+        return phases
+
+    # Copy of the buffer, oldest frame first (only finished frames)
+    def snapshot(self):
+        finished = self.frame_count - self.in_frame
+        frames = min(finished, self.capacity)
+        order = (np.arange(finished - frames, finished) % self.capacity)
+        return {"first_frame": finished - frames, "names": list(self.names), "origin": self.origin,
+                "budget": self.budget,
+                "frame_starts": self.frame_starts[order], "frame_ends": self.frame_ends[order],
+                "scope_counts": self.scope_counts[order], "scope_ids": self.scope_ids[order],
+                "scope_depths": self.scope_depths[order], "scope_starts": self.scope_starts[order],
+                "scope_ends": self.scope_ends[order]}
+
+    # Chrome Trace Event JSON (as a dict) of a snapshot, or of the buffer now
+    def chrome_trace(self, snapshot=None, metadata=None):
+        snapshot = snapshot if snapshot is not None else self.snapshot()
+        names, origin, budget = snapshot["names"], snapshot["origin"], snapshot["budget"]
+        events = [{"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "Cube Libre"}},
+                  {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "game loop"}}]
+
+        def micros(seconds):
+            return round((seconds - origin) * 1e6, 1)
+
+        for row, (start, end) in enumerate(zip(snapshot["frame_starts"].tolist(), snapshot["frame_ends"].tolist())):
+            frame = snapshot["first_frame"] + row
+            event = {"name": "frame", "cat": "frame", "ph": "X", "pid": 1, "tid": 1, "ts": micros(start),
+                     "dur": round((end - start) * 1e6, 1), "args": {"frame": frame}}
+            if budget is not None and end - start > budget:
+                event["cname"] = "terrible"
+                event["args"]["over_budget_ms"] = round((end - start - budget) * 1e3, 3)
+            events.append(event)
+            count = snapshot["scope_counts"][row]
+            for name_id, depth, scope_start, scope_end in zip(
+                    snapshot["scope_ids"][row, :count].tolist(), snapshot["scope_depths"][row, :count].tolist(),
+                    snapshot["scope_starts"][row, :count].tolist(), snapshot["scope_ends"][row, :count].tolist()):
+                events.append({"name": names[name_id], "cat": "phase", "ph": "X", "pid": 1, "tid": 1,
+                               "ts": micros(scope_start), "dur": round(max(scope_end - scope_start, 0.0) * 1e6, 1),
+                               "args": {"frame": frame, "depth": depth}})
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": dict(metadata or {}, budget_ms=None if budget is None else budget * 1e3)}
+
+    def dump(self, path, snapshot=None, metadata=None):
+        trace = self.chrome_trace(snapshot, metadata)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(trace, f)
+        return path
+
+    # Take the snapshot now, write it on a background thread
+    def dump_async(self, path, metadata=None):
+        snapshot = self.snapshot()
+        self.dumps.append(path)
+        writer = threading.Thread(target=self._write, args=(path, snapshot, metadata),
+                                  name="flight-recorder", daemon=True)
+        self._writers.append(writer)
+        writer.start()
+
+    def _write(self, path, snapshot, metadata):
+        try:
+            self.dump(path, snapshot, metadata)
+        except OSError as e:
+            events.error("trace_write_failed", path=path, error=str(e))
+            return
+        events.warning("trace_written", path=path, frames=len(snapshot["frame_starts"]))
+
+    # Wait for traces still being written and stop recording collections
+    def close(self):
+        for writer in self._writers:
+            writer.join()
+        self._writers.clear()
+        self._remove_gc_hook()
+
+    def _remove_gc_hook(self):
+        hook, self._gc_hook = getattr(self, "_gc_hook", None), None
+        if hook is not None and hook in gc.callbacks:
+            gc.callbacks.remove(hook)
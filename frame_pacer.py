@@ -0,0 +1,133 @@
+# "Cube Libre" - frame pacing
+#
+# Decides when a frame is presented. Replaces the fixed pygame.time.wait(10)
+# after every flip(), which capped the frame rate at an arbitrary ~100 fps
+# minus the render time and made frame times jitter by the OS sleep granularity.
+#
+# Modes:
+#   "vsync"    - the swap interval does the pacing: flip() waits for the
+#                display (falls back to "target" if the driver refuses vsync)
+#   "target"   - a precise target_fps: sleep until just before the frame's
+#                deadline, then spin-wait the last bit of it
+#   "adaptive" - sleep only (no spinning, easy on the CPU), shortened by how
+#                much the OS has been oversleeping lately
+#   "uncapped" - present as fast as possible, for benchmarks
+#
+# The pacing wait runs right after the flip, so the next frame samples its
+# input as late as possible. The pacer keeps the last few seconds of achieved
+# frame times and input-to-present intervals (from input_sampled() to the end
+# of the flip) and summarizes them in report().
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+pacing_modes = ("vsync", "target", "adaptive", "uncapped")
+
+class FramePacer:
+    def __init__(self, mode="vsync", target_fps=60, spin_time=0.002, history=300,
+                 time_source=time.perf_counter, sleep=time.sleep):
+        if mode not in pacing_modes:
+            raise ValueError(f"Unknown frame pacing mode {mode!r}, expected one of {pacing_modes}")
+        self.mode = mode
+        self.target_fps = target_fps
+        self.period = 1.0 / target_fps
+        self.spin_time = spin_time  # Seconds before the deadline where "target" stops sleeping and spins
+        self.time_source = time_source
+        self.sleep = sleep
+
+        self.frame_times = deque(maxlen=history)  # Present to present, seconds
+        self.input_latencies = deque(maxlen=history)  # Input sampled to present, seconds
+        self.oversleep = 0.0  # "adaptive": running estimate of how late sleep() wakes up
+        self.deadline = None  # "target"/"adaptive": when the next frame is due
+        self.last_present = None
+        self.input_time = None
+
+    # Open the window, asking for vsync when that is the mode. Drivers that
+    # can't do it make set_mode raise; pace with "target" then.
+    def open_display(self, size, flags):
+        if self.mode == "vsync":
+            try:
+                return pygame.display.set_mode(size, flags, vsync=1)
+            except pygame.error as e:
+                print(f"[INFO] Vsync is not available ({e}); pacing to {self.target_fps} fps instead.")
+                self.mode = "target"
+        return pygame.display.set_mode(size, flags)
+
+    # Call right after reading the input the frame is going to show
+    def input_sampled(self):
+        self.input_time = self.time_source()
+
+    # Flip the frame to the screen, then wait until the next one is due.
+    # Returns the achieved frame time (present to present) in seconds.
+    def present(self):
+        pygame.display.flip()
+        now = self.time_source()
+        if self.input_time is not None:
+            self.input_latencies.append(now - self.input_time)
+            self.input_time = None
+        frame_time = 0.0 if self.last_present is None else now - self.last_present
+        if self.last_present is not None:
+            self.frame_times.append(frame_time)
+        self.last_present = now
+
+        if self.mode == "target":
+            self._wait_precise(now)
+        elif self.mode == "adaptive":
+            self._wait_adaptive(now)
+        return frame_time
+
+    def _next_deadline(self, now):
+        deadline = (now if self.deadline is None else self.deadline) + self.period
+        if deadline < now:
+            deadline = now  # Fell behind by more than a frame: don't try to catch up
+        self.deadline = deadline
+        return deadline
+
+    def _wait_precise(self, now):
+        deadline = self._next_deadline(now)
+        remaining = deadline - now - self.spin_time
+        if remaining > 0:
+            self.sleep(remaining)
+        while self.time_source() < deadline:
+            pass
+
+    def _wait_adaptive(self, now):
+        deadline = self._next_deadline(now)
+        remaining = deadline - now - self.oversleep
+        if remaining > 0:
+            start = self.time_source()
+            self.sleep(remaining)
+            late = (self.time_source() - start) - remaining
+            self.oversleep += (max(late, 0.0) - self.oversleep) * 0.1
+
+    # Achieved frame time and input-to-present stats over the recent history
+    def summary(self):
+        stats = {"mode": self.mode, "frames": len(self.frame_times)}
+        if self.frame_times:
+            frame_times = np.array(self.frame_times)
+            stats["fps"] = len(frame_times) / frame_times.sum() if frame_times.sum() > 0 else float("inf")
+            stats["frame_ms"] = {name: float(value) * 1e3 for name, value in (
+                ("mean", frame_times.mean()), ("p50", np.percentile(frame_times, 50)),
+                ("p95", np.percentile(frame_times, 95)), ("max", frame_times.max()))}
+        if self.input_latencies:
+            latencies = np.array(self.input_latencies)
+            stats["input_to_present_ms"] = {"mean": float(latencies.mean()) * 1e3,
+                                            "max": float(latencies.max()) * 1e3}
+        return stats
+
+    def report(self):
+        stats = self.summary()
+        if "fps" not in stats:
+            return f"[{stats['mode']}] no frames yet"
+        frame_ms = stats["frame_ms"]
+        line = (f"[{stats['mode']}] {stats['fps']:.1f} fps, frame {frame_ms['mean']:.2f} ms"
+                f" (p50 {frame_ms['p50']:.2f}, p95 {frame_ms['p95']:.2f}, max {frame_ms['max']:.2f})")
+        if "input_to_present_ms" in stats:
+            latency = stats["input_to_present_ms"]
+            line += f", input to present {latency['mean']:.2f} ms (max {latency['max']:.2f})"
+        return line
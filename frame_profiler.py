@@ -0,0 +1,176 @@
+# "Cube Libre" - frame profiler
+#
+# Profiles exactly the next N frames of the game loop, instead of the whole
+# process (startup included) under `python -m cProfile`. A capture runs two
+# profilers over the same frames:
+#
+# - cProfile, written as a pstats file (python -m pstats, snakeviz, ...)
+# - a sampler thread that takes the game thread's Python stack every
+#   `interval` seconds, written as collapsed stacks ("a;b;c count" per line),
+#   which flamegraph.pl, speedscope and inferno turn into a flame graph
+#
+# plus a JSON file with what the capture was of: the frame times (mean,
+# percentiles, max) and whatever the game annotates it with (annotate()).
+#
+#   profiler = FrameProfiler(out_dir="profiles", annotate=lambda: {...})
+#   profiler.start(300)        # The next 300 frames
+#   while running:
+#       profiler.begin_frame()
+#       ...
+#       profiler.end_frame(duration)
+#   profiler.close()           # Writes a capture cut short, waits for the writer
+#
+# The frames run slower while cProfile is on (every Python call is counted),
+# so take the frame times in the JSON as relative. The files are written on a
+# background thread once the last frame is in.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from event_log import events
+
+class StackSampler:
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()  # Collapsed stack (root first) -> samples
+        self._stop = threading.Event()
+        self._thread = None
+        self._switch_interval = None
+
+    def start(self):
+        # The sampler needs the GIL to look; a switch interval as short as the
+        # sampling interval lets it in while the game thread runs pure Python
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="frame-profiler-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        names = {}  # Code object -> frame name, so each function is formatted once
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                name = names.get(code)
+                if name is None:
+                    name = names[code] = (f"{getattr(code, 'co_qualname', code.co_name)} "
+                                          f"({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                stack.append(name)
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class FrameProfiler:
+    def __init__(self, out_dir="profiles", interval=0.001, annotate=None):
+        self.out_dir = out_dir
+        self.interval = interval  # Seconds between stack samples
+        self.annotate = annotate  # Returns a dict of extra fields for the capture's JSON
+        self.frames = 0  # Frames still to capture (counting the one in progress)
+        self.captures = []  # Path stems of the captures written (or being written)
+        self._profile = None
+        self._sampler = None
+        self._frame_times = []
+        self._started = None
+        self._requested = 0
+        self._writers = []
+
+    @property
+    def capturing(self):
+        return self._profile is not None
+
+    # Profile the next `frames` frames; ignored while a capture is running
+    def start(self, frames):
+        if self.frames or self.capturing:
+            events.warning("profile_busy", frames_left=self.frames)
+            return False
+        self.frames = self._requested = max(int(frames), 1)
+        events.info("profile_armed", frames=self.frames)
+        return True
+
+    def begin_frame(self):
+        if not self.frames or self.capturing:
+            return
+        self._frame_times = []
+        self._started = time.time()
+        self._sampler = StackSampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def end_frame(self, duration):
+        if not self.capturing:
+            return
+        self._frame_times.append(duration)
+        self.frames -= 1
+        if not self.frames:
+            self._finish()
+
+    def _finish(self):
+        self._profile.disable()
+        self._sampler.stop()
+        profile, sampler, frame_times = self._profile, self._sampler, self._frame_times
+        self._profile = self._sampler = None
+        self.frames = 0
+
+        times = np.array(frame_times, dtype=np.float64) * 1e3
+        info = {"frames": len(times), "requested_frames": self._requested,
+                "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self._started)),
+                "frame_ms": {"mean": round(float(times.mean()), 3),
+                             "p50": round(float(np.percentile(times, 50)), 3),
+                             "p95": round(float(np.percentile(times, 95)), 3),
+                             "p99": round(float(np.percentile(times, 99)), 3),
+                             "max": round(float(times.max()), 3)} if len(times) else None,
+                "sample_interval_ms": self.interval * 1e3, "samples": sum(sampler.stacks.values())}
+        if self.annotate is not None:
+            info.update(self.annotate())
+
+        stem = os.path.join(self.out_dir, time.strftime("profile-%Y%m%d-%H%M%S", time.localtime(self._started)))
+        if stem in self.captures:  # Two short captures in the same second
+            stem += f"-{len(self.captures)}"
+        self.captures.append(stem)
+        writer = threading.Thread(target=self._write, args=(stem, profile, sampler, info),
+                                  name="frame-profiler", daemon=True)
+        self._writers.append(writer)
+        writer.start()
+
+    def _write(self, stem, profile, sampler, info):
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            profile.dump_stats(stem + ".pstats")
+            with open(stem + ".collapsed", "w") as f:
+                f.write(sampler.collapsed())
+            with open(stem + ".json", "w") as f:
+                json.dump(info, f, indent=2)
+        except OSError as e:
+            events.error("profile_write_failed", path=stem, error=str(e))
+            return
+        events.info("profile_written", path=stem, frames=info["frames"], samples=info["samples"])
+
+    # Write a capture that was still running (the game quit during it) and wait for the writers
+    def close(self):
+        if self.capturing:
+            self._finish()
+        self.frames = 0
+        for writer in self._writers:
+            writer.join()
+        self._writers.clear()
@@ -0,0 +1,346 @@
+# "Cube Libre" - GL backends
+#
+# The render path calls OpenGL through `gl`, a facade over a swappable backend:
+#
+#   from gl_backend import gl
+#   gl.glDrawArrays(GL_TRIANGLES, 0, count)
+#
+# (the GL_* constants still come from OpenGL.GL; they are plain numbers).
+# Backends:
+#   PyOpenGLBackend - the real thing, PyOpenGL's functions as they are
+#   NullBackend     - no context needed, every call is a no-op; hands out
+#                     object names, reports shaders as compiled and keeps the
+#                     fixed-function matrix stacks in software, so the game's
+#                     culling and sorting work the same as on a real context
+#   RecordingBackend - records every call into a compact per-frame command
+#                     stream (call id + args) and counts calls, state changes
+#                     (and redundant ones) and bytes uploaded; passes the calls
+#                     on to another backend (null by default)
+#   DrawCounter     - counts draw calls on the way to another backend
+#
+#   previous = use_backend(RecordingBackend())
+#   ... render a frame ...
+#   gl.backend.end_frame()
+#
+# The facade keeps each function it has looked up as a plain attribute, so on
+# the real backend a call costs one extra attribute lookup.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import ctypes
+from collections import Counter, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# The few enum values the null backend answers to (same numbers as OpenGL.GL's)
+GL_VENDOR = 0x1F00
+GL_RENDERER = 0x1F01
+GL_VERSION = 0x1F02
+GL_MODELVIEW = 0x1700
+GL_PROJECTION = 0x1701
+GL_MODELVIEW_MATRIX = 0x0BA6
+GL_PROJECTION_MATRIX = 0x0BA7
+
+class PyOpenGLBackend:
+    name = "pyopengl"
+
+    def function(self, name):
+        from OpenGL import GL
+        return getattr(GL, name)
+
+def _no_op(*args, **kwargs):
+    return None
+
+class NullBackend:
+    name = "null"
+
+    def __init__(self):
+        self._next_object = 1
+        self._uniform_locations = {}
+        self._stacks = {GL_MODELVIEW: [np.identity(4)], GL_PROJECTION: [np.identity(4)]}
+        self._matrix_mode = GL_MODELVIEW
+
+    # The emulated functions, or a no-op for anything else named gl*
+    def function(self, name):
+        function = getattr(self, name, None) if name.startswith("gl") else None
+        return function if function is not None else _no_op
+
+    def _new_names(self, count):
+        first = self._next_object
+        self._next_object += count
+        return first if count == 1 else list(range(first, first + count))
+
+    def glGenBuffers(self, count):
+        return self._new_names(count)
+
+    def glGenVertexArrays(self, count):
+        return self._new_names(count)
+
+    def glGenTextures(self, count):
+        return self._new_names(count)
+
+    def glCreateShader(self, shader_type):
+        return self._new_names(1)
+
+    def glCreateProgram(self):
+        return self._new_names(1)
+
+    def glGetShaderiv(self, shader, pname):
+        return 1  # Compiled
+
+    def glGetProgramiv(self, program, pname):
+        return 1  # Linked
+
+    def glGetShaderInfoLog(self, shader):
+        return b""
+
+    def glGetProgramInfoLog(self, program):
+        return b""
+
+    def glGetUniformLocation(self, program, name):
+        return self._uniform_locations.setdefault((program, name), len(self._uniform_locations))
+
+    def glGetString(self, name):
+        return {GL_VENDOR: b"Cube Libre", GL_RENDERER: b"Null backend",
+                GL_VERSION: b"3.3 (Null backend)"}.get(name, b"")
+
+    def glGetError(self):
+        return 0
+
+    # Fixed-function matrix stacks, in GL memory order (the transpose of the
+    # maths): multiplying M onto the current matrix C is M_mem @ C_mem
+    def glGetFloatv(self, pname):
+        if pname == GL_MODELVIEW_MATRIX:
+            return self._stacks[GL_MODELVIEW][-1].astype(np.float32)
+        if pname == GL_PROJECTION_MATRIX:
+            return self._stacks[GL_PROJECTION][-1].astype(np.float32)
+        return np.zeros(16, dtype=np.float32)
+
+    def glMatrixMode(self, mode):
+        self._matrix_mode = mode
+
+    def glLoadIdentity(self):
+        self._stacks[self._matrix_mode][-1] = np.identity(4)
+
+    def glPushMatrix(self):
+        stack = self._stacks[self._matrix_mode]
+        stack.append(stack[-1].copy())
+
+    def glPopMatrix(self):
+        stack = self._stacks[self._matrix_mode]
+        if len(stack) > 1:
+            stack.pop()
+
+    def glMultMatrixf(self, matrix):
+        stack = self._stacks[self._matrix_mode]
+        stack[-1] = np.asarray(matrix, dtype=np.float64).reshape(4, 4) @ stack[-1]
+
+    glMultMatrixd = glMultMatrixf
+
+    def glTranslatef(self, x, y, z):
+        matrix = np.identity(4)
+        matrix[3, :3] = (x, y, z)
+        self.glMultMatrixf(matrix)
+
+    def glScalef(self, x, y, z):
+        self.glMultMatrixf(np.diag((x, y, z, 1.0)))
+
+    def glRotatef(self, angle, x, y, z):
+        axis = np.array((x, y, z), dtype=np.float64)
+        axis /= np.linalg.norm(axis)
+        x, y, z = axis
+        c, s = np.cos(np.radians(angle)), np.sin(np.radians(angle))
+        t = 1.0 - c
+        rotation = np.identity(4)
+        rotation[:3, :3] = ((t * x * x + c, t * x * y - s * z, t * x * z + s * y),
+                            (t * x * y + s * z, t * y * y + c, t * y * z - s * x),
+                            (t * x * z - s * y, t * y * z + s * x, t * z * z + c))
+        self.glMultMatrixf(rotation.T)
+
+    def glFrustum(self, left, right, bottom, top, near, far):
+        matrix = np.zeros((4, 4))
+        matrix[0, 0] = 2 * near / (right - left)
+        matrix[1, 1] = 2 * near / (top - bottom)
+        matrix[0, 2] = (right + left) / (right - left)
+        matrix[1, 2] = (top + bottom) / (top - bottom)
+        matrix[2, 2] = -(far + near) / (far - near)
+        matrix[2, 3] = -2 * far * near / (far - near)
+        matrix[3, 2] = -1.0
+        self.glMultMatrixf(matrix.T)
+
+    def glOrtho(self, left, right, bottom, top, near, far):
+        matrix = np.identity(4)
+        matrix[0, 0] = 2 / (right - left)
+        matrix[1, 1] = 2 / (top - bottom)
+        matrix[2, 2] = -2 / (far - near)
+        matrix[:3, 3] = (-(right + left) / (right - left), -(top + bottom) / (top - bottom),
+                         -(far + near) / (far - near))
+        self.glMultMatrixf(matrix.T)
+
+# Calls that change GL state, and what identifies the piece of state they set
+# (the first few arguments); a call that sets it to what it already was is redundant
+state_functions = {
+    "glEnable": 1, "glDisable": 1, "glBlendFunc": 0, "glDepthMask": 0, "glDepthFunc": 0,
+    "glUseProgram": 0, "glBindVertexArray": 0, "glBindBuffer": 1, "glBindTexture": 1,
+    "glActiveTexture": 0, "glPointSize": 0, "glLineWidth": 0, "glCullFace": 0,
+    "glPolygonMode": 1, "glViewport": 0, "glColorMask": 0,
+}
+
+# Argument index of the byte count of buffer uploads; texture uploads are sized by their data
+upload_size_arguments = {"glBufferData": 1, "glBufferSubData": 2}
+texture_uploads = ("glTexImage2D", "glTexSubImage2D")
+
+def _nbytes(data):
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    if isinstance(data, ctypes.Array):
+        return ctypes.sizeof(data)
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    return 0
+
+# What goes into the command stream for an argument: buffers and long strings
+# (shader sources) are summarized, numbers and short values kept as they are
+def _compact(value):
+    if isinstance(value, (np.ndarray, ctypes.Array, bytes, bytearray)):
+        return ("data", _nbytes(value))
+    if isinstance(value, str) and len(value) > 32:
+        return ("text", len(value))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+class RecordingBackend:
+    def __init__(self, target=None, history=8):
+        self.target = target if target is not None else NullBackend()
+        self.name = f"recording:{self.target.name}"
+        self.call_ids = {}  # Function name -> the small number it is recorded as
+        self.frames = deque(maxlen=history)  # Finished frames, oldest first
+        self._start_frame()
+
+    def _start_frame(self):
+        self.commands = []  # This frame's (call id, args)
+        self.calls = Counter()
+        self.state_changes = 0
+        self.redundant_state_changes = 0
+        self.bytes_uploaded = 0
+        self._state = {}
+
+    # Function names by call id, to read a command stream back
+    @property
+    def call_names(self):
+        return {call_id: name for name, call_id in self.call_ids.items()}
+
+    def function(self, name):
+        target = self.target.function(name)
+        call_id = self.call_ids.setdefault(name, len(self.call_ids))
+        state_key_length = state_functions.get(name)
+        if name in ("glEnable", "glDisable"):
+            name_key, enabled = "capability", name == "glEnable"
+        else:
+            name_key, enabled = name, None
+        upload_size = upload_size_arguments.get(name)
+        texture_upload = name in texture_uploads
+
+        def record(*args):
+            self.commands.append((call_id, tuple(_compact(value) for value in args)))
+            self.calls[name] += 1
+            if state_key_length is not None:
+                key = (name_key,) + args[:state_key_length]
+                value = enabled if enabled is not None else args[state_key_length:]
+                value = tuple(_compact(item) for item in value) if isinstance(value, tuple) else value
+                if key in self._state and self._state[key] == value:
+                    self.redundant_state_changes += 1
+                self._state[key] = value
+                self.state_changes += 1
+            if upload_size is not None and len(args) > upload_size:
+                self.bytes_uploaded += int(args[upload_size])
+            elif texture_upload and args:
+                self.bytes_uploaded += _nbytes(args[-1])
+            return target(*args)
+        return record
+
+    # Close this frame's command stream and start the next; returns its stats
+    def end_frame(self):
+        frame = {"calls": sum(self.calls.values()), "by_function": dict(self.calls),
+                 "state_changes": self.state_changes, "redundant_state_changes": self.redundant_state_changes,
+                 "bytes_uploaded": self.bytes_uploaded, "commands": self.commands}
+        self.frames.append(frame)
+        self._start_frame()
+        return frame
+
+    # Per-frame averages over the recorded frames
+    def summary(self):
+        frames = list(self.frames)
+        if not frames:
+            return {"frames": 0}
+        by_function = Counter()
+        for frame in frames:
+            by_function.update(frame["by_function"])
+        count = len(frames)
+        return {"frames": count,
+                "calls": sum(frame["calls"] for frame in frames) / count,
+                "state_changes": sum(frame["state_changes"] for frame in frames) / count,
+                "redundant_state_changes": sum(frame["redundant_state_changes"] for frame in frames) / count,
+                "bytes_uploaded": sum(frame["bytes_uploaded"] for frame in frames) / count,
+                "by_function": {name: calls / count for name, calls in by_function.most_common()}}
+
+# Draw calls (submissions, however many primitives each draws)
+draw_functions = ("glDrawArrays", "glDrawElements", "glDrawArraysInstanced", "glDrawElementsInstanced",
+                  "glMultiDrawArrays", "glMultiDrawElements", "glBegin")
+
+# Counts draw calls and passes every call on to another backend; only the draw
+# functions are wrapped, so it costs next to nothing (the performance HUD)
+class DrawCounter:
+    def __init__(self, target):
+        self.target = target
+        self.name = f"counting:{target.name}"
+        self.draws = 0
+
+    def function(self, name):
+        function = self.target.function(name)
+        if name not in draw_functions:
+            return function
+
+        def counted(*args):
+            self.draws += 1
+            return function(*args)
+        return counted
+
+    # Draw calls since the last take()
+    def take(self):
+        draws, self.draws = self.draws, 0
+        return draws
+
+class GLFacade:
+    def __init__(self, backend):
+        self.use(backend)
+
+    # Switch every caller over to another backend; returns the previous one
+    def use(self, backend):
+        previous = self.__dict__.get("backend")
+        self.__dict__.clear()  # Drop the functions looked up from the previous backend
+        self.backend = backend
+        return previous
+
+    def __getattr__(self, name):
+        if not name.startswith("gl"):
+            raise AttributeError(name)
+        function = self.backend.function(name)
+        setattr(self, name, function)
+        return function
+
+gl = GLFacade(PyOpenGLBackend())
+
+def use_backend(backend):
+    return gl.use(backend)
+
+# Render with another backend for the duration of a with block
+@contextmanager
+def using_backend(backend):
+    previous = use_backend(backend)
+    try:
+        yield backend
+    finally:
+        use_backend(previous)
@@ -0,0 +1,118 @@
+# "Cube Libre" - procedural ground grid
+#
+# The horizon grid as a single large quad whose grid lines are computed in the
+# fragment shader: lines every `spacing` units along x and z, anti-aliased with
+# screen-space derivatives and faded out with distance from the eye. The quad
+# is re-centred under the eye every frame, so the grid never ends no matter how
+# far the player moves, and the cost is one draw call whatever its size.
+#
+# The plane height is passed in on every draw (the game hands it horizon_y),
+# so the collision plane and the drawn grid can't drift apart.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import numpy as np
+from OpenGL.GL import *
+
+from gl_backend import gl
+from shaders import ShaderProgram, eye_position, fixed_function_mvp
+
+vertex_shader_source = """
+#version 330 core
+in vec2 corner;  // -1..1 on both axes
+
+uniform mat4 mvp;
+uniform vec3 eye;
+uniform float height;
+uniform float extent;
+
+out vec3 world;
+
+void main()
+{
+    world = vec3(eye.x + corner.x * extent, height, eye.z + corner.y * extent);
+    gl_Position = mvp * vec4(world, 1.0);
+}
+"""
+
+fragment_shader_source = """
+#version 330 core
+in vec3 world;
+
+uniform vec3 eye;
+uniform vec3 color;
+uniform float spacing;
+uniform float line_width;  // In pixels
+uniform float fade_start;
+uniform float fade_end;
+
+out vec4 frag_color;
+
+void main()
+{
+    vec2 coord = world.xz / spacing;
+    vec2 derivative = fwidth(coord);
+    // Distance to the nearest line in pixels, per axis
+    vec2 grid = abs(fract(coord + 0.5) - 0.5) / max(derivative, vec2(1e-6));
+    float line = 1.0 - clamp(min(grid.x, grid.y) - line_width * 0.5 + 0.5, 0.0, 1.0);
+    float fade = 1.0 - smoothstep(fade_start, fade_end, distance(world, eye));
+    if (line * fade <= 0.0)
+        discard;
+    frag_color = vec4(color, line * fade);
+}
+"""
+
+class GroundGrid:
+    def __init__(self, spacing=2.0, extent=60.0, line_width=1.0, color=(1.0, 1.0, 1.0),
+                 fade_start=20.0, fade_end=45.0):
+        self.spacing = spacing  # Units between grid lines
+        self.extent = extent  # Half size of the quad around the eye
+        self.line_width = line_width
+        self.color = color
+        self.fade_start = fade_start  # Distance from the eye where lines start fading...
+        self.fade_end = fade_end  # ...and where they are gone
+
+        self.shader = ShaderProgram(vertex_shader_source, fragment_shader_source, {"corner": 0})
+        corners = np.array([-1.0, -1.0, 1.0, -1.0, 1.0, 1.0, -1.0, 1.0], dtype=np.float32)
+        self.vbo = gl.glGenBuffers(1)
+        self.vao = gl.glGenVertexArrays(1)
+        gl.glBindVertexArray(self.vao)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        gl.glBufferData(GL_ARRAY_BUFFER, corners.nbytes, corners, GL_STATIC_DRAW)
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 0, None)
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    # Draw the grid plane at y = height. mvp defaults to the fixed-function
+    # matrices (compatibility contexts); the eye position is worked out from it.
+    # With bound=True the caller (the render queue) has bound the program and
+    # VAO and set up blending.
+    def draw(self, height, mvp=None, bound=False):
+        if mvp is None:
+            mvp = fixed_function_mvp()
+        if not bound:
+            self.shader.use()
+        self.shader.set_matrix("mvp", mvp)
+        self.shader.set_vec3("eye", eye_position(mvp))
+        self.shader.set_float("height", height)
+        self.shader.set_float("extent", self.extent)
+        self.shader.set_vec3("color", self.color)
+        self.shader.set_float("spacing", self.spacing)
+        self.shader.set_float("line_width", self.line_width)
+        self.shader.set_float("fade_start", self.fade_start)
+        self.shader.set_float("fade_end", self.fade_end)
+
+        if bound:
+            gl.glDrawArrays(GL_TRIANGLE_FAN, 0, 4)
+            return
+        # Blended and not writing depth, like the old GL_LINES grid: it never hides anything
+        gl.glEnable(GL_BLEND)
+        gl.glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        gl.glDepthMask(GL_FALSE)
+        gl.glBindVertexArray(self.vao)
+        gl.glDrawArrays(GL_TRIANGLE_FAN, 0, 4)
+        gl.glBindVertexArray(0)
+        gl.glDepthMask(GL_TRUE)
+        gl.glDisable(GL_BLEND)
+        self.shader.release()
@@ -0,0 +1,188 @@
+# "Cube Libre" - instanced cube renderer
+#
+# Draws any number of cubes with a single glDrawElementsInstanced call.
+# The unit-cube VBO built at startup stays the per-vertex data (attribute 0);
+# a second, per-instance buffer carries each cube's offset, spin (axis + angle),
+# layer, face mask and destroyed state. Draw calls per frame no longer grow
+# with cube_size.
+#
+# Colours are worked out on the GPU by the voxel shader: intact cubes get the
+# per-layer gradient, destroyed ones the debris tint at their fade-out opacity.
+# The face mask (bit order: voxel_body.face_directions) drops the faces that are
+# covered by a neighbouring cube.
+#
+# The shader is GLSL 3.30 core (see shaders.py) and the cube is drawn as
+# triangles, so this runs on compatibility and core profiles alike, and on Mesa
+# llvmpipe (no GPU needed).
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+from gl_backend import gl
+from shaders import ShaderProgram, fixed_function_mvp, gradient_function, quad_indices
+from voxel_body import gradient_start, gradient_end
+
+vertex_shader_source = """
+#version 330 core
+in vec3 position;
+in vec3 instance_offset;
+in vec4 instance_spin;  // Axis (xyz) and angle in degrees (w)
+in float instance_layer;  // Lattice y, picks the gradient colour
+in float instance_faces;  // Bit mask of the faces to draw
+in vec2 instance_state;  // Destroyed (x) and fade-out opacity (y)
+
+uniform mat4 mvp;
+uniform int vertices_per_face;
+uniform vec3 destroyed_tint;
+uniform float destroyed_alpha;
+""" + gradient_function + """
+out vec4 color;
+
+vec3 spin(vec3 v, vec4 axis_angle)
+{
+    float axis_length = length(axis_angle.xyz);
+    if (axis_angle.w == 0.0 || axis_length == 0.0)
+        return v;
+    vec3 k = axis_angle.xyz / axis_length;
+    float a = radians(axis_angle.w);
+    return v * cos(a) + cross(k, v) * sin(a) + k * dot(k, v) * (1.0 - cos(a));
+}
+
+void main()
+{
+    int face = gl_VertexID / vertices_per_face;
+    if (((int(instance_faces) >> face) & 1) == 0) {
+        gl_Position = vec4(2.0, 2.0, 2.0, 1.0);  // Outside the clip volume: the face is dropped
+        color = vec4(0.0);
+        return;
+    }
+    vec3 world = spin(position, instance_spin) + instance_offset;
+    gl_Position = mvp * vec4(world, 1.0);
+    if (instance_state.x > 0.5)
+        color = vec4(destroyed_tint, destroyed_alpha * instance_state.y);
+    else
+        color = vec4(gradient_color(instance_layer), 1.0);
+}
+"""
+
+fragment_shader_source = """
+#version 330 core
+in vec4 color;
+out vec4 frag_color;
+
+void main()
+{
+    frag_color = color;
+}
+"""
+
+# Per-instance layout: offset (3), spin axis + angle (4), layer (1), face mask (1),
+# destroyed + fade (2)
+instance_floats = 11
+instance_attributes = (
+    ("instance_offset", 1, 3, 0),  # (name, location, components, float offset)
+    ("instance_spin", 2, 4, 3),
+    ("instance_layer", 3, 1, 7),
+    ("instance_faces", 4, 1, 8),
+    ("instance_state", 5, 2, 9),
+)
+all_faces = 0b111111
+
+class InstancedCubeRenderer:
+    # vbo holds the cube as GL_QUADS (4 vertices per face, faces in
+    # voxel_body.face_directions order); it is drawn as triangles through an index buffer
+    def __init__(self, vbo, vertex_count=24, body_size=1, destroyed_tint=(1.0, 1.0, 1.0),
+                 destroyed_alpha=0.5, capacity=1024):
+        attributes = {"position": 0}
+        attributes.update((name, location) for name, location, _, _ in instance_attributes)
+        self.shader = ShaderProgram(vertex_shader_source, fragment_shader_source, attributes)
+        self.shader.use()
+        self.shader.set_int("vertices_per_face", vertex_count // 6)
+        self.shader.set_vec3("gradient_start", gradient_start)
+        self.shader.set_vec3("gradient_end", gradient_end)
+        self.shader.set_float("body_size", body_size)
+        self.shader.set_vec3("destroyed_tint", destroyed_tint)
+        self.shader.set_float("destroyed_alpha", destroyed_alpha)
+        self.shader.release()
+
+        # Our own VAO: the shared unit-cube VBO per vertex, the instance buffer per instance
+        self.vao = gl.glGenVertexArrays(1)
+        gl.glBindVertexArray(self.vao)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
+
+        indices = quad_indices(vertex_count // 4)
+        self.index_count = len(indices)
+        self.ibo = gl.glGenBuffers(1)
+        gl.glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        gl.glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+
+        self.instance_vbo = gl.glGenBuffers(1)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        stride = instance_floats * 4
+        for _, location, components, offset in instance_attributes:
+            gl.glEnableVertexAttribArray(location)
+            gl.glVertexAttribPointer(location, components, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset * 4))
+            gl.glVertexAttribDivisor(location, 1)
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+        gl.glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+        # CPU-side staging for the instance data, grown on demand
+        self.instances = np.zeros((capacity, instance_floats), dtype=np.float32)
+
+    # Intact cubes: one per row of offsets, coloured by layer (lattice y) with the
+    # body at height_offset. faces is a scalar or per-instance face mask.
+    # With bound=True the caller (the render queue) has bound the program and VAO.
+    def draw_intact(self, offsets, layers, height_offset, faces=all_faces, mvp=None, bound=False):
+        data = self._stage(len(offsets))
+        if data is None:
+            return
+        data[:, 0:3] = offsets
+        data[:, 3:7] = 0.0
+        data[:, 7] = layers
+        data[:, 8] = faces
+        data[:, 9:11] = 0.0
+        self._draw(data, height_offset, mvp, bound)
+
+    # Destroyed cubes: spinning, in the destroyed tint at the given opacities (0..1)
+    def draw_destroyed(self, offsets, fades, spin_axes, spin_angles, mvp=None, bound=False):
+        data = self._stage(len(offsets))
+        if data is None:
+            return
+        data[:, 0:3] = offsets
+        data[:, 3:6] = spin_axes
+        data[:, 6] = spin_angles
+        data[:, 7] = 0.0
+        data[:, 8] = all_faces
+        data[:, 9] = 1.0
+        data[:, 10] = fades
+        self._draw(data, 0.0, mvp, bound)
+
+    def _stage(self, count):
+        if count == 0:
+            return None
+        if count > len(self.instances):
+            self.instances = np.zeros((max(count, 2 * len(self.instances)), instance_floats), dtype=np.float32)
+        return self.instances[:count]
+
+    # mvp defaults to the fixed-function matrices (compatibility contexts)
+    def _draw(self, data, height_offset, mvp, bound):
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        gl.glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        if not bound:
+            self.shader.use()
+            gl.glBindVertexArray(self.vao)
+        self.shader.set_matrix("mvp", fixed_function_mvp() if mvp is None else mvp)
+        self.shader.set_float("height_offset", height_offset)
+        gl.glDrawElementsInstanced(GL_TRIANGLES, self.index_count, GL_UNSIGNED_INT, None, len(data))
+        if not bound:
+            gl.glBindVertexArray(0)
+            self.shader.release()
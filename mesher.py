@@ -0,0 +1,266 @@
+# "Cube Libre" - greedy mesher for the voxel body
+#
+# Turns the intact voxel body into a merged quad mesh: exposed faces that lie in
+# the same plane and share a colour band (the gradient is per layer) become one
+# quad, so a solid 64^3 body is a few hundred quads instead of 1.5M.
+#
+# The mesh is kept per slice: one slice per face direction and grid coordinate
+# along its normal (6 * size slices). When voxels break off or come back, only
+# the slices touching them are remeshed and written into the VBO in place with
+# glBufferSubData. Every slice owns a region of the VBO with some slack; a slice
+# that outgrows its region moves to the free space at the end, and the whole
+# buffer is only rebuilt when that runs out too (or when the body is reset).
+#
+# Vertices are body-space lattice coordinates plus the layer (lattice y) they
+# belong to; the colour band is picked in the shader from the body's height
+# with the same gradient as the instanced path. Quads are stored as two
+# triangles, so the mesh draws on core profiles too.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+from gl_backend import gl
+from shaders import ShaderProgram, fixed_function_mvp, gradient_function
+from voxel_body import face_directions, gradient_start, gradient_end
+
+vertex_shader_source = """
+#version 330 core
+in vec3 position;
+in float layer;  // Lattice y of the voxel layer the face belongs to
+
+uniform mat4 mvp;
+""" + gradient_function + """
+out vec4 color;
+
+void main()
+{
+    gl_Position = mvp * vec4(position, 1.0);
+    color = vec4(gradient_color(layer), 1.0);
+}
+"""
+
+fragment_shader_source = """
+#version 330 core
+in vec4 color;
+out vec4 frag_color;
+
+void main()
+{
+    frag_color = color;
+}
+"""
+
+vertex_floats = 4  # Position (3) and layer (1)
+quad_corners = (0, 1, 2, 0, 2, 3)  # Two triangles per merged quad
+vertices_per_quad = len(quad_corners)
+
+# Normal axis and sign of every face direction
+face_axes = [int(np.flatnonzero(direction)[0]) for direction in face_directions]
+face_signs = [int(sum(direction)) for direction in face_directions]
+
+# Merge same-key runs of a 2D key grid (-1 = no face) into rectangles.
+# Runs along the second axis are found with NumPy, then every run is extended
+# into the next row while that row has the exact same run.
+# Returns a list of [u0, u1, v0, v1, key] with exclusive ends.
+def greedy_rectangles(keys):
+    rows, columns = keys.shape
+    padded = np.full((rows, columns + 2), -1, dtype=keys.dtype)
+    padded[:, 1:-1] = keys
+    edge_rows, edge_columns = np.nonzero(padded[:, 1:] != padded[:, :-1])
+    same_row = edge_rows[:-1] == edge_rows[1:]
+    run_rows = edge_rows[:-1][same_row]
+    run_starts = edge_columns[:-1][same_row]
+    run_ends = edge_columns[1:][same_row]
+    run_keys = keys[run_rows, run_starts]
+    solid = run_keys >= 0
+
+    rectangles = []
+    previous, current = {}, {}
+    row = None
+    for u, v0, v1, key in zip(run_rows[solid].tolist(), run_starts[solid].tolist(),
+                              run_ends[solid].tolist(), run_keys[solid].tolist()):
+        if u != row:
+            previous = current if row is not None and u == row + 1 else {}
+            current = {}
+            row = u
+        run = (v0, v1, key)
+        rectangle = previous.get(run)
+        if rectangle is None:
+            rectangle = [u, u + 1, v0, v1, key]
+            rectangles.append(rectangle)
+        else:
+            rectangle[1] = u + 1
+        current[run] = rectangle
+    return rectangles
+
+# Triangle vertices (counter-clockwise seen from outside, two triangles per
+# quad) for the exposed faces of one slice: face direction `face`, grid
+# coordinate `c` along its normal
+def slice_vertices(body, face, c):
+    size = body.size
+    axis, sign = face_axes[face], face_signs[face]
+    # In-plane axes with u x v pointing along the face normal
+    u_axis, v_axis = (axis + 1) % 3, (axis + 2) % 3
+    if sign < 0:
+        u_axis, v_axis = v_axis, u_axis
+
+    grid = body.face_masks.reshape(size, size, size)
+    exposed = (np.take(grid, c, axis=axis) >> face) & 1
+    layers = np.take(body.layer_grid, c, axis=axis)
+    if u_axis > v_axis:
+        exposed, layers = exposed.T, layers.T
+    keys = np.where(exposed != 0, layers, -1)
+
+    rectangles = greedy_rectangles(keys)
+    vertices = np.empty((len(rectangles), 4, vertex_floats), dtype=np.float32)
+    if not rectangles:
+        return vertices.reshape(0, vertex_floats)
+    low = -size // 2
+    u0, u1, v0, v1, key = np.array(rectangles, dtype=np.float32).T
+    u0, u1, v0, v1 = (edge + low - 0.5 for edge in (u0, u1, v0, v1))
+    vertices[:, :, axis] = c + low + 0.5 * sign
+    vertices[:, :, u_axis] = np.stack([u0, u1, u1, u0], axis=1)
+    vertices[:, :, v_axis] = np.stack([v0, v0, v1, v1], axis=1)
+    vertices[:, :, 3] = (key + low)[:, None]
+    return vertices[:, quad_corners].reshape(-1, vertex_floats)
+
+class BodyMesh:
+    def __init__(self, body):
+        self.body = body
+        self.slice_count = len(face_directions) * body.size
+        self.firsts = np.zeros(self.slice_count, dtype=np.int32)  # In vertices
+        self.counts = np.zeros(self.slice_count, dtype=np.int32)
+        self.capacities = np.zeros(self.slice_count, dtype=np.int32)
+        self.draw_firsts = self.firsts[:0]  # The non-empty slices, what draw() hands to GL
+        self.draw_counts = self.counts[:0]
+        self.used = 0  # Vertices of the VBO handed out to slices
+        self.buffer_size = 0  # Vertices the VBO can hold
+        self.generation = None  # Body generation the mesh was built for
+        self.rebuilds = 0
+        self.slice_updates = 0
+
+        self.shader = ShaderProgram(vertex_shader_source, fragment_shader_source,
+                                    {"position": 0, "layer": 1})
+        self.shader.use()
+        self.shader.set_vec3("gradient_start", gradient_start)
+        self.shader.set_vec3("gradient_end", gradient_end)
+        self.shader.set_float("body_size", body.size)
+        self.shader.release()
+
+        self.vbo = gl.glGenBuffers(1)
+        self.vao = gl.glGenVertexArrays(1)
+        gl.glBindVertexArray(self.vao)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        stride = vertex_floats * 4
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, None)
+        gl.glEnableVertexAttribArray(1)
+        gl.glVertexAttribPointer(1, 1, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(3 * 4))
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def build_slice(self, s):
+        size = self.body.size
+        return slice_vertices(self.body, s // size, s % size)
+
+    @property
+    def quad_count(self):
+        return int(self.counts.sum()) // vertices_per_quad
+
+    # Slices that voxel i has (or had) a face in, including the faces of its
+    # neighbours it covers: its own six, plus the facing slice next door
+    def slices_of(self, i):
+        size = self.body.size
+        coords = (i // (size * size), (i // size) % size, i % size)
+        slices = set()
+        for face in range(len(face_directions)):
+            c = coords[face_axes[face]]
+            slices.add(face * size + c)
+            neighbor = c - face_signs[face]
+            if 0 <= neighbor < size:
+                slices.add(face * size + neighbor)
+        return slices
+
+    # Remesh and upload everything, with slack in every slice region
+    def rebuild(self):
+        slices = [self.build_slice(s) for s in range(self.slice_count)]
+        counts = np.array([len(vertices) for vertices in slices], dtype=np.int32)
+        capacities = counts + counts // 2 + 16
+        self.firsts[:] = np.concatenate(([0], np.cumsum(capacities)[:-1]))
+        self.counts[:] = counts
+        self.capacities[:] = capacities
+        self.used = int(capacities.sum())
+        self.buffer_size = self.used + self.used // 2  # Room at the end for slices that outgrow their region
+
+        data = np.zeros((self.buffer_size, vertex_floats), dtype=np.float32)
+        for first, vertices in zip(self.firsts.tolist(), slices):
+            data[first:first + len(vertices)] = vertices
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        gl.glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_DYNAMIC_DRAW)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.generation = self.body.generation
+        self.rebuilds += 1
+        self._compact()
+
+    # Mesa (22.x) draws nothing at all from a glMultiDrawArrays whose first count
+    # is 0, so empty slices are left out of the draw lists
+    def _compact(self):
+        nonempty = self.counts > 0
+        self.draw_firsts = self.firsts[nonempty]
+        self.draw_counts = self.counts[nonempty]
+
+    # Bring the mesh up to date with the body: a full rebuild after a reset,
+    # otherwise only the slices around the voxels that changed
+    def update(self):
+        body = self.body
+        if self.generation != body.generation:
+            body.changed.clear()
+            self.rebuild()
+            return
+        if not body.changed:
+            return
+        dirty = set()
+        for i in body.changed:
+            dirty |= self.slices_of(i)
+        body.changed.clear()
+
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        for s in sorted(dirty):
+            vertices = self.build_slice(s)
+            count = len(vertices)
+            if count > self.capacities[s]:
+                capacity = count + count // 2 + 16
+                if self.used + capacity > self.buffer_size:
+                    gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+                    self.rebuild()
+                    return
+                self.firsts[s] = self.used
+                self.capacities[s] = capacity
+                self.used += capacity
+            if count:
+                gl.glBufferSubData(GL_ARRAY_BUFFER, int(self.firsts[s]) * vertex_floats * 4, vertices.nbytes, vertices)
+            self.counts[s] = count
+            self.slice_updates += 1
+        gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._compact()
+
+    # Draw the whole body in one call; height_offset is the body's y position
+    # the colour bands follow, mvp defaults to the fixed-function matrices.
+    # With bound=True the caller (the render queue) has bound the program and VAO.
+    def draw(self, height_offset, mvp=None, bound=False):
+        self.update()
+        if not len(self.draw_counts):
+            return
+        if not bound:
+            self.shader.use()
+            gl.glBindVertexArray(self.vao)
+        self.shader.set_matrix("mvp", fixed_function_mvp() if mvp is None else mvp)
+        self.shader.set_float("height_offset", height_offset)
+        gl.glMultiDrawArrays(GL_TRIANGLES, self.draw_firsts, self.draw_counts, len(self.draw_counts))
+        if not bound:
+            gl.glBindVertexArray(0)
+            self.shader.release()
@@ -0,0 +1,203 @@
+# "Cube Libre" - overlay text and quads
+#
+# Screen-space text and flat rectangles, all in one draw call. The glyphs are
+# rendered with pygame.font once, into a texture atlas (GlyphAtlas); after
+# that, text is only quads with the atlas's texture coordinates, so nothing is
+# rendered with pygame.font per frame. An OverlayBatch collects the text and
+# rectangles of a frame and draws them with a single glDrawArrays; a solid
+# cell in the atlas lets the rectangles share the draw with the glyphs.
+#
+#   atlas = GlyphAtlas(size=16)
+#   batch = OverlayBatch(atlas)
+#   batch.text(8, 8, "FPS 60.0")
+#   batch.rect(8, 30, 100, 2, (1.0, 0.0, 0.0, 1.0))
+#   with screen_overlay(0, width, height, 0):  # Pixels, y down (transitions.py)
+#       batch.draw()
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import ctypes
+
+import numpy as np
+import pygame
+from OpenGL.GL import *
+
+from gl_backend import gl
+from shaders import ShaderProgram, fixed_function_mvp
+
+vertex_shader_source = """
+#version 330 core
+in vec2 position;
+in vec2 uv;
+in vec4 color;
+
+uniform mat4 mvp;
+
+out vec2 frag_uv;
+out vec4 frag_color;
+
+void main()
+{
+    frag_uv = uv;
+    frag_color = color;
+    gl_Position = mvp * vec4(position, 0.0, 1.0);
+}
+"""
+
+fragment_shader_source = """
+#version 330 core
+in vec2 frag_uv;
+in vec4 frag_color;
+
+uniform sampler2D atlas;
+
+out vec4 out_color;
+
+void main()
+{
+    out_color = vec4(frag_color.rgb, frag_color.a * texture(atlas, frag_uv).a);
+}
+"""
+
+first_char, last_char = 32, 126  # Printable ASCII; anything else is drawn as "?"
+solid_cell = 0  # Atlas cell 0 is solid white (rectangles); character c is in cell c - first_char + 1
+
+# Two triangles over the unit square
+unit_quad = np.array([(0, 0), (1, 0), (1, 1), (0, 0), (1, 1), (0, 1)], dtype=np.float32)
+
+class GlyphAtlas:
+    def __init__(self, size=16, columns=16):
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.Font(None, size)
+        self.line_height = font.get_linesize()
+        glyphs = [font.render(chr(code), True, (255, 255, 255)) for code in range(first_char, last_char + 1)]
+
+        # One cell per glyph plus the solid one, a pixel of padding between them
+        cell_width = max(glyph.get_width() for glyph in glyphs) + 1
+        cell_height = max(glyph.get_height() for glyph in glyphs) + 1
+        cells = len(glyphs) + 1
+        width, height = columns * cell_width, -(-cells // columns) * cell_height
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        surface.fill((255, 255, 255, 255), (0, 0, cell_width - 1, cell_height - 1))
+        sizes = [(cell_width - 1, cell_height - 1)]
+        for cell, glyph in enumerate(glyphs, 1):
+            surface.blit(glyph, ((cell % columns) * cell_width, (cell // columns) * cell_height))
+            sizes.append(glyph.get_size())
+
+        # Pixel size and texture rectangle of every cell; the texture keeps the
+        # surface's rows top first, so v grows downwards like screen y
+        self.sizes = np.array(sizes, dtype=np.float32)
+        corners = np.array([((cell % columns) * cell_width, (cell // columns) * cell_height)
+                            for cell in range(cells)], dtype=np.float32)
+        self.uv_min = corners / (width, height)
+        self.uv_size = self.sizes / (width, height)
+        # Rectangles sample the middle of the solid cell only
+        self.uv_min[solid_cell] += self.uv_size[solid_cell] / 2
+        self.uv_size[solid_cell] = 0.0
+
+        self.texture = gl.glGenTextures(1)
+        gl.glBindTexture(GL_TEXTURE_2D, self.texture)
+        gl.glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        gl.glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        gl.glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE,
+                        pygame.image.tobytes(surface, "RGBA"))
+        gl.glBindTexture(GL_TEXTURE_2D, 0)
+
+    # Atlas cell of every character of text
+    def cells(self, text):
+        codes = np.frombuffer(text.encode("ascii", "replace"), dtype=np.uint8).astype(np.int32)
+        codes[(codes < first_char) | (codes > last_char)] = ord("?")
+        return codes - (first_char - 1)
+
+    def text_width(self, text):
+        return float(self.sizes[self.cells(text), 0].sum())
+
+class OverlayBatch:
+    # Per vertex: x, y, u, v, r, g, b, a
+    stride = 8 * 4
+
+    def __init__(self, atlas):
+        self.atlas = atlas
+        self.shader = ShaderProgram(vertex_shader_source, fragment_shader_source,
+                                    {"position": 0, "uv": 1, "color": 2})
+        self.shader.use()
+        self.shader.set_int("atlas", 0)
+        self.shader.release()
+
+        self.vbo = gl.glGenBuffers(1)
+        self.vao = gl.glGenVertexArrays(1)
+        gl.glBindVertexArray(self.vao)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        for location, (size, offset) in enumerate(((2, 0), (2, 8), (4, 16))):
+            gl.glEnableVertexAttribArray(location)
+            gl.glVertexAttribPointer(location, size, GL_FLOAT, GL_FALSE, self.stride, ctypes.c_void_p(offset))
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.clear()
+
+    def clear(self):
+        self._quads = []  # (cells, positions, sizes, colors) arrays, one entry per text() / rects() call
+        self.quad_count = 0
+
+    def _add(self, cells, positions, sizes, colors):
+        self._quads.append((cells, positions, sizes, colors))
+        self.quad_count += len(cells)
+
+    # Everything collected so far, cleared from the batch; add() puts it back,
+    # so text that changes now and then needn't be laid out every frame
+    def take(self):
+        quads = self._quads
+        self.clear()
+        return quads
+
+    def add(self, quads):
+        for quad in quads:
+            self._add(*quad)
+
+    # Text with its top left corner at x, y; returns where the next character would go
+    def text(self, x, y, text, color=(1.0, 1.0, 1.0, 1.0)):
+        cells = self.atlas.cells(text)
+        sizes = self.atlas.sizes[cells]
+        advance = np.cumsum(sizes[:, 0])
+        positions = np.empty((len(cells), 2), dtype=np.float32)
+        positions[:, 0] = x + advance - sizes[:, 0]
+        positions[:, 1] = y
+        self._add(cells, positions, sizes, np.broadcast_to(np.asarray(color, dtype=np.float32), (len(cells), 4)))
+        return x + (advance[-1] if len(cells) else 0.0)
+
+    def rect(self, x, y, width, height, color):
+        self.rects(np.array([[x, y]]), np.array([[width, height]]), np.array([color]))
+
+    # Many rectangles at once: (n, 2) positions and sizes, (n, 4) or one colour
+    def rects(self, positions, sizes, colors):
+        count = len(positions)
+        self._add(np.full(count, solid_cell), np.asarray(positions, dtype=np.float32),
+                  np.asarray(sizes, dtype=np.float32),
+                  np.broadcast_to(np.asarray(colors, dtype=np.float32), (count, 4)))
+
+    # Upload and draw everything collected since the last clear() in one call,
+    # then clear; expects blending set up and a pixel projection (screen_overlay)
+    def draw(self):
+        if not self.quad_count:
+            return
+        cells, positions, sizes, colors = (np.concatenate(parts) for parts in zip(*self._quads))
+        atlas = self.atlas
+        vertices = np.empty((len(cells), 6, 8), dtype=np.float32)
+        vertices[:, :, 0:2] = positions[:, None, :] + unit_quad * sizes[:, None, :]
+        vertices[:, :, 2:4] = atlas.uv_min[cells][:, None, :] + unit_quad * atlas.uv_size[cells][:, None, :]
+        vertices[:, :, 4:8] = colors[:, None, :]
+        self.clear()
+
+        self.shader.use()
+        self.shader.set_matrix("mvp", fixed_function_mvp())
+        gl.glBindTexture(GL_TEXTURE_2D, atlas.texture)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        gl.glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STREAM_DRAW)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+        gl.glBindVertexArray(self.vao)
+        gl.glDrawArrays(GL_TRIANGLES, 0, len(cells) * 6)
+        gl.glBindVertexArray(0)
+        gl.glBindTexture(GL_TEXTURE_2D, 0)
+        self.shader.release()
@@ -0,0 +1,105 @@
+# "Cube Libre" - portal renderer
+#
+# The portal and its glow in one quad: the fragment shader works out, per
+# pixel, how far out from the portal's edge it is (rectangular or oval) and
+# fades the glow with an analytic falloff. Replaces the main quad plus the
+# stack of scaled, alpha-blended glow quads, which overdrew the same pixels
+# up to 11 times. The quad is built once; drawing it is a single call.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import numpy as np
+from OpenGL.GL import *
+
+from gl_backend import gl
+from shaders import ShaderProgram, fixed_function_mvp
+
+vertex_shader_source = """
+#version 330 core
+in vec2 corner;  // -reach..reach, in units of the portal half size
+
+uniform mat4 mvp;
+uniform vec2 half_size;
+uniform int plane;  // 0 = upright in the xy plane, 1 = lying flat in the xz plane
+
+out vec2 local;
+
+void main()
+{
+    local = corner;
+    vec2 p = corner * half_size;
+    vec3 position = plane == 0 ? vec3(p.x, p.y, 0.0) : vec3(p.x, 0.0, p.y);
+    gl_Position = mvp * vec4(position, 1.0);
+}
+"""
+
+fragment_shader_source = """
+#version 330 core
+in vec2 local;
+
+uniform vec3 color;
+uniform int oval;
+uniform float reach;  // Glow reaches out to this many portal half sizes
+uniform float glow_alpha;  // Glow opacity right at the portal's edge
+uniform float falloff;  // Higher = glow dies off faster
+
+out vec4 frag_color;
+
+void main()
+{
+    // 1.0 on the portal's edge, growing outwards
+    float d = oval == 1 ? length(local) : max(abs(local.x), abs(local.y));
+    float edge = fwidth(d);
+    float glow = glow_alpha * pow(1.0 - clamp((d - 1.0) / max(reach - 1.0, 1e-6), 0.0, 1.0), falloff);
+    float alpha = mix(1.0, glow, smoothstep(1.0 - edge, 1.0 + edge, d));  // Anti-aliased portal edge
+    if (alpha <= 0.0)
+        discard;
+    frag_color = vec4(color, alpha);
+}
+"""
+
+planes = {"xy": 0, "xz": 1}
+
+class PortalRenderer:
+    # size is the full (width, height) of the portal itself, without the glow
+    def __init__(self, size, color=(0.0, 1.0, 1.0), oval=False, plane="xy",
+                 reach=3.0, glow_alpha=0.6, falloff=2.0):
+        self.shader = ShaderProgram(vertex_shader_source, fragment_shader_source, {"corner": 0})
+        self.shader.use()
+        self.shader.set_vec3("color", color)
+        self.shader.set_int("oval", int(oval))
+        self.shader.set_int("plane", planes[plane])
+        self.shader.set_float("reach", reach)
+        self.shader.set_float("glow_alpha", glow_alpha)
+        self.shader.set_float("falloff", falloff)
+        self.shader.set_vec2("half_size", (size[0] / 2, size[1] / 2))
+        self.shader.release()
+
+        corners = np.array([-1.0, -1.0, 1.0, -1.0, 1.0, 1.0, -1.0, 1.0], dtype=np.float32) * max(reach, 1.0)
+        self.vbo = gl.glGenBuffers(1)
+        self.vao = gl.glGenVertexArrays(1)
+        gl.glBindVertexArray(self.vao)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        gl.glBufferData(GL_ARRAY_BUFFER, corners.nbytes, corners, GL_STATIC_DRAW)
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 0, None)
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    # Draw the portal centred on the current origin; mvp defaults to the
+    # fixed-function matrices (compatibility contexts). With bound=True the
+    # caller (the render queue) has bound the program and VAO and set up blending.
+    def draw(self, mvp=None, bound=False):
+        if bound:
+            self.shader.set_matrix("mvp", fixed_function_mvp() if mvp is None else mvp)
+            gl.glDrawArrays(GL_TRIANGLE_FAN, 0, 4)
+            return
+        self.shader.use()
+        self.shader.set_matrix("mvp", fixed_function_mvp() if mvp is None else mvp)
+        gl.glEnable(GL_BLEND)
+        gl.glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        gl.glBindVertexArray(self.vao)
+        gl.glDrawArrays(GL_TRIANGLE_FAN, 0, 4)
+        gl.glBindVertexArray(0)
+        gl.glDisable(GL_BLEND)
+        self.shader.release()
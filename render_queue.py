@@ -0,0 +1,113 @@
+# "Cube Libre" - render queue
+#
+# Every frame the scene submits its draw items instead of drawing right away.
+# Each item carries a sort key of (pass, program, VAO, depth):
+#   - the opaque pass goes first, grouped by program and VAO and then
+#     front-to-back, so nearer geometry fills the depth buffer early and
+#     hidden fragments get rejected;
+#   - the transparent pass goes last, back-to-front, with blending on and
+#     depth writes off.
+# All the GL state the items need goes through a shadow state cache that
+# drops calls which would set what is already set.
+#
+# Items capture their own mvp when they are submitted and draw with their
+# program and VAO already bound (the renderers' bound=True mode).
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import itertools
+
+from OpenGL.GL import *
+
+from gl_backend import gl
+
+OPAQUE = 0
+TRANSPARENT = 1
+
+# Depth for items that should sort behind everything else in their pass
+far_away = float("inf")
+
+_unknown = object()
+
+class GLStateCache:
+    def __init__(self):
+        self.calls = 0  # State changes that reached GL
+        self.skipped = 0  # Redundant ones that were dropped
+        self.invalidate()
+
+    # Forget what we think is set, e.g. after code outside the cache touched GL state
+    def invalidate(self):
+        self._state = {}
+
+    def _changed(self, key, value):
+        if self._state.get(key, _unknown) == value:
+            self.skipped += 1
+            return False
+        self._state[key] = value
+        self.calls += 1
+        return True
+
+    def use_program(self, program):
+        if self._changed("program", program):
+            gl.glUseProgram(program)
+
+    def bind_vertex_array(self, vao):
+        if self._changed("vao", vao):
+            gl.glBindVertexArray(vao)
+
+    def blend(self, enabled):
+        if self._changed("blend", enabled):
+            (gl.glEnable if enabled else gl.glDisable)(GL_BLEND)
+
+    def blend_func(self, source, destination):
+        if self._changed("blend_func", (source, destination)):
+            gl.glBlendFunc(source, destination)
+
+    def depth_mask(self, enabled):
+        if self._changed("depth_mask", enabled):
+            gl.glDepthMask(GL_TRUE if enabled else GL_FALSE)
+
+    def point_size(self, size):
+        if self._changed("point_size", size):
+            gl.glPointSize(size)
+
+class RenderQueue:
+    def __init__(self, state=None):
+        self.state = state if state is not None else GLStateCache()
+        self.items = []
+        self._order = itertools.count()  # Keeps equal keys in submission order
+        self.last_frame_items = 0
+
+    # draw is called with the item's program and VAO bound; depth is the item's
+    # distance from the eye
+    def submit(self, pass_index, program, vao, depth, draw, point_size=None):
+        if pass_index == OPAQUE:
+            key = (pass_index, program, vao, depth)  # Front-to-back
+        else:
+            key = (pass_index, -depth, program, vao)  # Back-to-front
+        self.items.append((key, next(self._order), program, vao, draw, point_size))
+
+    # Draw everything submitted this frame in sort order, then leave GL in its
+    # default state (no program, no VAO, no blending, depth writes on) for the
+    # fixed-function code that runs afterwards
+    def flush(self):
+        state = self.state
+        state.invalidate()
+        self.items.sort(key=lambda item: (item[0], item[1]))
+        for key, _, program, vao, draw, point_size in self.items:
+            transparent = key[0] == TRANSPARENT
+            state.blend(transparent)
+            if transparent:
+                state.blend_func(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+            state.depth_mask(not transparent)
+            state.use_program(program)
+            state.bind_vertex_array(vao)
+            if point_size is not None:
+                state.point_size(point_size)
+            draw()
+        state.use_program(0)
+        state.bind_vertex_array(0)
+        state.blend(False)
+        state.depth_mask(True)
+        self.last_frame_items = len(self.items)
+        self.items.clear()
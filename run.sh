@@ -36,7 +36,7 @@ PIP_EXEC="$PYTHON_EXEC -m pip"
 # Define other variables
 VENV_DIR="venv"
 REQUIREMENTS_FILE="requirements.txt"
-MAIN_SCRIPT="cube_libre.py"
+MAIN_MODULE="cube_libre"  # Run as `python -m cube_libre`
 
 # ================
 # Helper Functions
@@ -208,10 +208,10 @@ else
 fi
 
 # ===================
-# Run the Main Script
+# Run the Main Module
 # ===================
 
-if [ -f "$MAIN_SCRIPT" ]; then
+if [ -f "$MAIN_MODULE/__main__.py" ]; then
 
     # Detect if running under Wayland (Linux-specific)
     if [ -n "$WAYLAND_DISPLAY" ]; then
@@ -221,16 +221,16 @@ if [ -f "$MAIN_SCRIPT" ]; then
         echo_info "Wayland not detected. Proceeding with default settings."
     fi
 
-    echo_info "Running $MAIN_SCRIPT..."
-    $PYTHON_EXEC "$MAIN_SCRIPT"
+    echo_info "Running $MAIN_MODULE..."
+    $PYTHON_EXEC -m "$MAIN_MODULE"
     EXIT_CODE=$?
     if [ $EXIT_CODE -ne 0 ]; then
-        echo_error "$MAIN_SCRIPT exited with code $EXIT_CODE."
+        echo_error "$MAIN_MODULE exited with code $EXIT_CODE."
     else
-        echo_info "$MAIN_SCRIPT executed successfully."
+        echo_info "$MAIN_MODULE executed successfully."
     fi
 else
-    echo_error "$MAIN_SCRIPT not found."
+    echo_error "$MAIN_MODULE not found."
     deactivate
     exit 1
 fi
@@ -0,0 +1,119 @@
+# "Cube Libre" - shader programs
+#
+# A small layer over GLSL programs: compile + link with fixed attribute
+# locations, a uniform location cache and typed uniform setters. The shaders
+# are "#version 330 core", so the same sources run on a 3.3 compatibility
+# context (what the game asks for) and on a core profile context.
+#
+# Shaders take their transform as an "mvp" uniform. On a compatibility
+# context fixed_function_mvp() reads it off the glRotatef/glTranslatef/...
+# matrix stacks, so the rest of the game can keep using them; on a core
+# profile the caller builds the matrix itself.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import numpy as np
+from OpenGL.GL import *
+
+from gl_backend import gl
+
+# Per-layer colour ramp shared by the voxel shaders (see gradient_colors() in
+# voxel_body.py): layer is the lattice y, height_offset the body position along y
+gradient_function = """
+uniform vec3 gradient_start;
+uniform vec3 gradient_end;
+uniform float body_size;
+uniform float height_offset;
+
+vec3 gradient_color(float layer)
+{
+    float factor = (height_offset + layer + body_size / 2.0) / body_size;  // Normalize y to range [0, 1]
+    return mix(gradient_start, gradient_end, factor);
+}
+"""
+
+class ShaderError(RuntimeError):
+    pass
+
+class ShaderProgram:
+    # attributes maps attribute names to the locations they get bound to before linking
+    def __init__(self, vertex_source, fragment_source, attributes=None):
+        shaders = [self._compile(vertex_source, GL_VERTEX_SHADER),
+                   self._compile(fragment_source, GL_FRAGMENT_SHADER)]
+        self.program = gl.glCreateProgram()
+        for shader in shaders:
+            gl.glAttachShader(self.program, shader)
+        for name, location in (attributes or {}).items():
+            gl.glBindAttribLocation(self.program, location, name)
+        gl.glLinkProgram(self.program)
+        for shader in shaders:
+            gl.glDetachShader(self.program, shader)
+            gl.glDeleteShader(shader)
+        if not gl.glGetProgramiv(self.program, GL_LINK_STATUS):
+            log = gl.glGetProgramInfoLog(self.program).decode(errors="replace")
+            gl.glDeleteProgram(self.program)
+            raise ShaderError(f"Shader link failed: {log}")
+        self.attributes = dict(attributes or {})
+        self._locations = {}
+
+    @staticmethod
+    def _compile(source, shader_type):
+        shader = gl.glCreateShader(shader_type)
+        gl.glShaderSource(shader, source)
+        gl.glCompileShader(shader)
+        if not gl.glGetShaderiv(shader, GL_COMPILE_STATUS):
+            log = gl.glGetShaderInfoLog(shader).decode(errors="replace")
+            gl.glDeleteShader(shader)
+            raise ShaderError(f"Shader compile failed: {log}")
+        return shader
+
+    def use(self):
+        gl.glUseProgram(self.program)
+
+    def release(self):
+        gl.glUseProgram(0)
+
+    # Cached uniform location; -1 (silently ignored by GL) for unknown or unused names
+    def location(self, name):
+        location = self._locations.get(name)
+        if location is None:
+            location = self._locations[name] = gl.glGetUniformLocation(self.program, name)
+        return location
+
+    # The setters expect the program to be in use
+    def set_int(self, name, value):
+        gl.glUniform1i(self.location(name), value)
+
+    def set_float(self, name, value):
+        gl.glUniform1f(self.location(name), value)
+
+    def set_vec2(self, name, value):
+        gl.glUniform2f(self.location(name), *value)
+
+    def set_vec3(self, name, value):
+        gl.glUniform3f(self.location(name), *value)
+
+    def set_vec4(self, name, value):
+        gl.glUniform4f(self.location(name), *value)
+
+    # matrix is a 4x4 in OpenGL (column-major) memory order, like glGetFloatv returns
+    def set_matrix(self, name, matrix):
+        gl.glUniformMatrix4fv(self.location(name), 1, GL_FALSE, np.asarray(matrix, dtype=np.float32))
+
+# Projection * modelview of the fixed-function matrix stacks (compatibility contexts only)
+def fixed_function_mvp():
+    projection = np.asarray(gl.glGetFloatv(GL_PROJECTION_MATRIX), dtype=np.float32).reshape(4, 4)
+    modelview = np.asarray(gl.glGetFloatv(GL_MODELVIEW_MATRIX), dtype=np.float32).reshape(4, 4)
+    return modelview @ projection  # Column-major arrays, so this is P * MV
+
+# World-space camera position of a perspective mvp (GL memory order). The eye is
+# the one point that projects to clip w = 0 at x = y = 0, whichever way the
+# matrices were split between GL_PROJECTION and GL_MODELVIEW.
+def eye_position(mvp):
+    eye = np.array([0.0, 0.0, 1.0, 0.0]) @ np.linalg.inv(np.asarray(mvp, dtype=np.float64))
+    return eye[:3] / eye[3]
+
+# Two triangles per quad for vertex lists laid out as GL_QUADS (core profiles have no quads)
+def quad_indices(quad_count):
+    quads = np.arange(quad_count, dtype=np.uint32)[:, None] * 4
+    return (quads + np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)).ravel()
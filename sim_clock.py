@@ -0,0 +1,65 @@
+# "Cube Libre" - simulation clock
+#
+# Fixed-timestep clock: the simulation always advances in ticks of exactly
+# 1 / tick_rate seconds, no matter how fast or slow frames are rendered.
+# Real frame time goes into an accumulator; every whole tick in there gets
+# simulated, and the leftover fraction (alpha) is used to interpolate the
+# render state between the last two ticks.
+#
+# Long frames (window drags, blocking effects, breakpoints) are clamped to
+# max_frame_time so the simulation never tries to catch up on seconds of
+# backlog at once (the "spiral of death").
+#
+# Headless runs can feed frame times by hand (ticks(frame_time)) or just call
+# the simulation with clock.dt in a loop to run faster than real time.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import time
+
+class SimClock:
+    def __init__(self, tick_rate=60, max_frame_time=0.25, time_source=time.perf_counter):
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate  # Seconds of simulation per tick
+        self.max_frame_time = max_frame_time
+        self.time_source = time_source
+
+        self.accumulator = 0.0
+        self.sim_time = 0.0  # Total simulated seconds
+        self.tick_count = 0
+        self.dropped_time = 0.0  # Real time thrown away by the frame time clamp
+        self.last_time = None
+
+    # Feed one frame's worth of real time into the accumulator and return how
+    # many fixed ticks are due. Without frame_time the time source is sampled.
+    def advance(self, frame_time=None):
+        if frame_time is None:
+            now = self.time_source()
+            frame_time = 0.0 if self.last_time is None else now - self.last_time
+            self.last_time = now
+        if frame_time > self.max_frame_time:
+            self.dropped_time += frame_time - self.max_frame_time
+            frame_time = self.max_frame_time
+        self.accumulator += frame_time
+        due = int(self.accumulator // self.dt)
+        self.accumulator -= due * self.dt
+        return due
+
+    # Yield the fixed delta time once for every tick due this frame
+    def ticks(self, frame_time=None):
+        for _ in range(self.advance(frame_time)):
+            self.tick_count += 1
+            self.sim_time += self.dt
+            yield self.dt
+
+    # How far (0..1) the render frame is past the last completed tick
+    @property
+    def alpha(self):
+        return self.accumulator / self.dt
+
+    # Forget the time spent since the last frame, e.g. after a blocking effect
+    def resync(self):
+        self.last_time = self.time_source()
+
+def lerp(previous, current, alpha):
+    return previous + (current - previous) * alpha
@@ -0,0 +1,115 @@
+# "Cube Libre" - star field
+#
+# The stars are generated once into a static float32 VBO and drawn with a
+# single glDrawArrays(GL_POINTS) per frame, so the CPU cost of a frame does not
+# depend on how many stars there are. Moving the star field (parallax, drift)
+# only changes an offset uniform; the buffer itself is never rewritten.
+#
+# The stars are sorted into a grid of chunks, each a contiguous range of the
+# VBO with its own bounding box. Chunks outside the view frustum (behind the
+# camera, or past the far plane, which the +-50 star cube reaches beyond) are
+# left out of the glMultiDrawArrays call (see camera.py).
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import numpy as np
+from OpenGL.GL import *
+
+from camera import Frustum
+from gl_backend import gl
+from shaders import ShaderProgram, fixed_function_mvp
+
+vertex_shader_source = """
+#version 330 core
+in vec3 position;
+
+uniform mat4 mvp;
+uniform vec3 offset;
+
+void main()
+{
+    gl_Position = mvp * vec4(position + offset, 1.0);
+}
+"""
+
+fragment_shader_source = """
+#version 330 core
+uniform vec3 color;
+out vec4 frag_color;
+
+void main()
+{
+    frag_color = vec4(color, 1.0);
+}
+"""
+
+class StarField:
+    def __init__(self, count, extent=50.0, point_size=2.0, color=(1.0, 1.0, 1.0), rng=None,
+                 chunks_per_axis=4, cull=True):
+        self.count = count
+        self.extent = extent  # Stars are spread over [-extent, extent] on every axis
+        self.point_size = point_size
+        self.color = color
+        self.offset = np.zeros(3, dtype=np.float32)  # Added to every star in the vertex shader
+
+        rng = rng if rng is not None else np.random.default_rng()
+        positions = rng.uniform(-extent, extent, size=(count, 3)).astype(np.float32)
+
+        # Sort the stars by chunk so every chunk is one range of the VBO
+        cells = np.clip(((positions + extent) / (2 * extent) * chunks_per_axis).astype(np.int64),
+                        0, chunks_per_axis - 1)
+        chunk_ids = (cells[:, 0] * chunks_per_axis + cells[:, 1]) * chunks_per_axis + cells[:, 2]
+        order = np.argsort(chunk_ids, kind="stable")
+        self.positions = positions[order]
+        chunk_ids, self.chunk_firsts, counts = np.unique(chunk_ids[order], return_index=True, return_counts=True)
+        self.chunk_firsts = self.chunk_firsts.astype(np.int32)
+        self.chunk_counts = counts.astype(np.int32)  # Empty chunks are never listed
+        self.chunk_mins = np.minimum.reduceat(self.positions, self.chunk_firsts, axis=0)
+        self.chunk_maxs = np.maximum.reduceat(self.positions, self.chunk_firsts, axis=0)
+        self.cull = cull  # Leave chunks outside the view frustum out of the draw
+        self.drawn = 0  # Stars submitted by the last draw
+
+        self.shader = ShaderProgram(vertex_shader_source, fragment_shader_source, {"position": 0})
+        self.vbo = gl.glGenBuffers(1)
+        self.vao = gl.glGenVertexArrays(1)
+        gl.glBindVertexArray(self.vao)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        gl.glBufferData(GL_ARRAY_BUFFER, self.positions.nbytes, self.positions, GL_STATIC_DRAW)
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    # Shift every star at once (what update_star_positions used to do by rebuilding the list)
+    def move(self, dx=0.0, dy=0.0, dz=0.0):
+        self.offset += (dx, dy, dz)
+
+    # Mask of the chunks that can be in view of mvp
+    def visible_chunks(self, mvp):
+        if not self.cull:
+            return np.ones(len(self.chunk_counts), dtype=bool)
+        return Frustum(mvp).boxes_visible(self.chunk_mins + self.offset, self.chunk_maxs + self.offset)
+
+    # mvp defaults to the fixed-function matrices (compatibility contexts).
+    # With bound=True the caller (the render queue) has bound the program and
+    # VAO and set the point size.
+    def draw(self, mvp=None, bound=False):
+        if mvp is None:
+            mvp = fixed_function_mvp()
+        visible = self.visible_chunks(mvp)
+        firsts = self.chunk_firsts[visible]
+        counts = self.chunk_counts[visible]
+        self.drawn = int(counts.sum())
+        if not len(counts):
+            return
+        if not bound:
+            gl.glPointSize(self.point_size)
+            self.shader.use()
+            gl.glBindVertexArray(self.vao)
+        self.shader.set_matrix("mvp", mvp)
+        self.shader.set_vec3("offset", self.offset)
+        self.shader.set_vec3("color", self.color)
+        gl.glMultiDrawArrays(GL_POINTS, firsts, counts, len(counts))
+        if not bound:
+            gl.glBindVertexArray(0)
+            self.shader.release()
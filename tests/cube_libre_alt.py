@@ -14,6 +14,14 @@ from OpenGL.GL import *
 from OpenGL.GLU import *
 
 import random
+import sys
+
+# Shared helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from event_log import events
+from frame_pacer import FramePacer
+from sim_clock import SimClock
+from transitions import FadeTransition, ZoomTransition, draw_screen_overlay
 
 # Detect if running under Wayland
 is_wayland = 'WAYLAND_DISPLAY' in os.environ
@@ -47,15 +55,14 @@ portal_glow_alpha = 0.3  # Initial alpha for the glow
 # *** End Portal Properties ***
 
 # *** Begin Animation States ***
-is_animating = False
 animation_duration = 2.0  # Duration of the zoom animation in seconds
-animation_timer = 0.0
-animation_scale = 1.0  # Current scale factor for animation
+animation_peak_scale = 2.0  # The scene zooms in to this scale and back out
 # *** End Animation States ***
 
 # Initialize Pygame and create a window
 pygame.init()
 display = (800, 600)
+frame_pacer = FramePacer("vsync", target_fps=60)  # Falls back to a precise 60 fps without vsync
 
 # Using numerical value for compatibility profile
 pygame.display.gl_set_attribute(pygame.GL_CONTEXT_PROFILE_MASK, 0x00002)
@@ -66,7 +73,7 @@ pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MINOR_VERSION, 3)
 pygame.display.gl_set_attribute(pygame.GL_CONTEXT_PROFILE_MASK, pygame.GL_CONTEXT_PROFILE_COMPATIBILITY)
 
 try:
-    pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
+    frame_pacer.open_display(display, DOUBLEBUF | OPENGL)
 except pygame.error as e:
     print(f"Pygame failed to set display mode with OpenGL: {e}")
     pygame.quit()
@@ -183,9 +190,6 @@ except OpenGL.error.GLError as e:
 angle_x, angle_y, angle_z = 0.0, 0.0, 0.0
 rotation_speed = 20.0  # Degrees per second for smoother rotation
 
-# Initialize the clock for managing delta_time
-clock = pygame.time.Clock()
-
 # Define a function to generate random RGB colors
 def random_color():
     return [random.uniform(0, 1), random.uniform(0, 1), random.uniform(0, 1)]
@@ -196,6 +200,7 @@ class Cube:
         self.x = x
         self.y = y
         self.z = z
+        self.initial_x, self.initial_y, self.initial_z = x, y, z  # Where reset_animation_state() puts it back
         self.color = self.random_color()
         self.is_destroyed = False
         self.flash_duration = 0.2  # Duration of flash effect in seconds
@@ -209,7 +214,7 @@ class Cube:
         return [random.uniform(0, 1) for _ in range(3)]
 
     def destroy(self):
-        print("Destroying cube")  # Debugging statement        
+        events.debug("cube_destroyed", position=(self.x, self.y, self.z))
         self.color = [0.8, 0.8, 0.8]  # Flash effect on destruction
         # Set original fly-off velocities
         self.velocity = [random.uniform(-1, 1), random.uniform(1, 2), random.uniform(-1, 1)]
@@ -261,7 +266,7 @@ def draw_stars():
 # Horizon collision detection (based on Y-axis)
 def check_collision_with_horizon(cube):
     if cube.y <= horizon_y:
-        print(f"Collision detected with horizon for cube at ({cube.x:.2f}, {cube.y:.2f}, {cube.z:.2f})")
+        events.info("horizon_collision", position=(cube.x, cube.y, cube.z))
         return True
     return False
 
@@ -278,7 +283,7 @@ def check_collision_with_portal(cube):
     reached_z = portal_bounds['z_min'] <= cube_pos[2] <= portal_bounds['z_max']
     
     if within_x and within_y and reached_z:
-        print(f"Collision detected with portal for cube at position ({cube.x:.2f}, {cube.y:.2f}, {cube.z:.2f})")
+        events.info("portal_collision", position=(cube.x, cube.y, cube.z))
         return True
     return False
 
@@ -425,41 +430,29 @@ def all_cubes_destroyed(cubes):
 
 def reset_cubes(cubes):
     # Logic to reset the cubes to their initial state
-    print("Resetting all cubes to initial state.")
+    events.info("cubes_reset")
     for x in range(-cube_size // 2, cube_size // 2):
         for y in range(-cube_size // 2, cube_size // 2):
             for z in range(-cube_size // 2, cube_size // 2):
                 cubes[x][y][z].reset_animation_state()
-                print(f"Cube at ({cubes[x][y][z].x:.2f}, {cubes[x][y][z].y:.2f}, {cubes[x][y][z].z:.2f}) has been reset.")
+
+# Fade to white and back once all cubes are gone; the cubes are reset while
+# the screen is fully white. Both this and the zoom animation after a hit run
+# on simulation time inside the game loop (see transitions.py).
+reset_flash = FadeTransition(fade_out=0.5, hold=0.1, fade_in=0.5, color=(1.0, 1.0, 1.0),
+                             on_covered=lambda: reset_cubes(cubes))
+
+def end_zoom_animation():
+    events.info("zoom_animation_done")
+    reset_cubes(cubes)
+
+zoom_animation = ZoomTransition(animation_duration, peak_scale=animation_peak_scale,
+                                on_done=end_zoom_animation)
 
 # Flash the screen
-def flash_screen(duration=1000, steps=255):
-    # Duration of the flash in milliseconds
-    # Steps are how many levels of fading we have
-
-    # Fade to white
-    for i in range(steps):
-        alpha = i / steps
-        glClearColor(alpha, alpha, alpha, 1)
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        draw_scene()
-        pygame.display.flip()
-        pygame.time.wait(duration // (steps * 2))  # Wait proportionally to fade duration
-
-    # Hold the white screen
-    pygame.time.wait(duration // steps)  # Hold the white screen for a moment
-
-    # Fade back into the game
-    for i in range(steps, -1, -1):
-        alpha = i / steps
-        glClearColor(alpha, alpha, alpha, 1)
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        draw_scene()  # Draw the game scene with the faded alpha overlay
-        pygame.display.flip()
-        pygame.time.wait(duration // (steps * 2))  # Wait proportionally to fade duration
-
-    # Reset clear color to game's background color
-    glClearColor(0, 0, 0, 1)  # Assuming black is the game's background color
+def flash_screen():
+    if not reset_flash.active:
+        reset_flash.start()
 
 # Additional global variables for effects
 screen_shake_duration = 0.5  # Duration of the shake in seconds
@@ -478,6 +471,8 @@ def update_effects(delta_time):
         screen_shake_timer -= delta_time
     if flash_timer > 0:
         flash_timer -= delta_time
+    reset_flash.update(delta_time)
+    zoom_animation.update(delta_time)
 
 def apply_screen_shake():
     if screen_shake_timer > 0:
@@ -488,43 +483,12 @@ def apply_screen_shake():
 
 def render_flash_effect():
     if flash_timer > 0:
-        # Enable blending for transparency
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-
-        # Set orthographic projection to cover the whole screen
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        gluOrtho2D(-1, 1, -1, 1)
-
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
-
-        # Set the color to red with the alpha based on flash_timer
-        glColor4f(1.0, 0.0, 0.0, min(flash_timer / flash_duration, 1.0))
-
-        # Draw a full-screen quad for the red flash effect
-        glBegin(GL_QUADS)
-        glVertex2f(-1, -1)
-        glVertex2f(1, -1)
-        glVertex2f(1, 1)
-        glVertex2f(-1, 1)
-        glEnd()
-
-        # Restore matrices and disable blending
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
-        glDisable(GL_BLEND)
+        # A full-screen red quad with the alpha based on flash_timer
+        draw_screen_overlay((1.0, 0.0, 0.0), min(flash_timer / flash_duration, 1.0))
 
 # Main game loop
+sim_clock = SimClock(60)  # Fixed 60 Hz simulation, independent of the frame rate
 while True:
-    # Get delta_time at the start of the loop
-    delta_time = clock.tick(60) / 1000.0  # Limits to 60 FPS and gets time since last tick
-
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             pygame.quit()
@@ -532,154 +496,130 @@ while True:
 
     # Get the state of all keyboard keys
     keys = pygame.key.get_pressed()
-
-    # Handle keyboard events for movement without Shift
-    if not (keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]):
-        # X-Axis Movement
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            for row in cubes:
-                for layer in row:
-                    for cube in layer:
-                        cube.x -= move_speed * delta_time
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            for row in cubes:
-                for layer in row:
-                    for cube in layer:
-                        cube.x += move_speed * delta_time
-
-        # Y-Axis Movement
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
-            for row in cubes:
-                for layer in row:
-                    for cube in layer:
-                        cube.y += move_speed * delta_time
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+    frame_pacer.input_sampled()
+
+    for delta_time in sim_clock.ticks():
+        # Handle keyboard events for movement without Shift
+        if not (keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]):
+            # X-Axis Movement
+            if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+                for row in cubes:
+                    for layer in row:
+                        for cube in layer:
+                            cube.x -= move_speed * delta_time
+            if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+                for row in cubes:
+                    for layer in row:
+                        for cube in layer:
+                            cube.x += move_speed * delta_time
+
+            # Y-Axis Movement
+            if keys[pygame.K_UP] or keys[pygame.K_w]:
+                for row in cubes:
+                    for layer in row:
+                        for cube in layer:
+                            cube.y += move_speed * delta_time
+            if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+                for row in cubes:
+                    for layer in row:
+                        for cube in layer:
+                            cube.y -= move_speed * delta_time
+
+        # *** Begin Z-Axis Movement ***
+        # Handle Z-axis movement only when Shift is pressed
+        if keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]:
+            # Z-Axis Movement with W/S (Forward/Backward)
+            if keys[pygame.K_w]:
+                for row in cubes:
+                    for layer in row:
+                        for cube in layer:
+                            cube.z += z_move_speed * delta_time  # Move forward along Z-axis
+                events.debug("body_moved", key="Shift+W", dz=z_move_speed * delta_time)
+            if keys[pygame.K_s]:
+                for row in cubes:
+                    for layer in row:
+                        for cube in layer:
+                            cube.z -= z_move_speed * delta_time  # Move backward along Z-axis
+                events.debug("body_moved", key="Shift+S", dz=-z_move_speed * delta_time)
+
+            # Z-Axis Movement with A/D (Left/Right)
+            if keys[pygame.K_a]:
+                for row in cubes:
+                    for layer in row:
+                        for cube in layer:
+                            cube.z -= z_move_speed * delta_time  # Move left along Z-axis
+                events.debug("body_moved", key="Shift+A", dz=-z_move_speed * delta_time)
+            if keys[pygame.K_d]:
+                for row in cubes:
+                    for layer in row:
+                        for cube in layer:
+                            cube.z += z_move_speed * delta_time  # Move right along Z-axis
+                events.debug("body_moved", key="Shift+D", dz=z_move_speed * delta_time)
+
+            # Z-Axis Movement with Left/Right Arrow Keys
+            if keys[pygame.K_LEFT]:
+                for row in cubes:
+                    for layer in row:
+                        for cube in layer:
+                            cube.z += z_move_speed * delta_time  # Move forward along Z-axis
+                events.debug("body_moved", key="Shift+Left", dz=z_move_speed * delta_time)
+            if keys[pygame.K_RIGHT]:
+                for row in cubes:
+                    for layer in row:
+                        for cube in layer:
+                            cube.z -= z_move_speed * delta_time  # Move backward along Z-axis
+                events.debug("body_moved", key="Shift+Right", dz=-z_move_speed * delta_time)
+        # *** End Z-Axis Movement ***
+
+        # *** Begin Portal and Grid Collision Detection ***
+        if not zoom_animation.active:
+            collision_detected = False
             for row in cubes:
                 for layer in row:
                     for cube in layer:
-                        cube.y -= move_speed * delta_time
-
-    # *** Begin Z-Axis Movement ***
-    # Handle Z-axis movement only when Shift is pressed
-    if keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]:
-        # Z-Axis Movement with W/S (Forward/Backward)
-        if keys[pygame.K_w]:
-            for row in cubes:
-                for layer in row:
-                    for cube in layer:
-                        cube.z += z_move_speed * delta_time  # Move forward along Z-axis
-                        print(f"Shift + W: Moving cube to z={cube.z:.2f}")  # Debug statement
-        if keys[pygame.K_s]:
-            for row in cubes:
-                for layer in row:
-                    for cube in layer:
-                        cube.z -= z_move_speed * delta_time  # Move backward along Z-axis
-                        print(f"Shift + S: Moving cube to z={cube.z:.2f}")  # Debug statement
-
-        # Z-Axis Movement with A/D (Left/Right)
-        if keys[pygame.K_a]:
-            for row in cubes:
-                for layer in row:
-                    for cube in layer:
-                        cube.z -= z_move_speed * delta_time  # Move left along Z-axis
-                        print(f"Shift + A: Moving cube to z={cube.z:.2f}")  # Debug statement
-        if keys[pygame.K_d]:
-            for row in cubes:
-                for layer in row:
-                    for cube in layer:
-                        cube.z += z_move_speed * delta_time  # Move right along Z-axis
-                        print(f"Shift + D: Moving cube to z={cube.z:.2f}")  # Debug statement
-
-        # Z-Axis Movement with Left/Right Arrow Keys
-        if keys[pygame.K_LEFT]:
-            for row in cubes:
-                for layer in row:
-                    for cube in layer:
-                        cube.z += z_move_speed * delta_time  # Move forward along Z-axis
-                        print(f"Shift + Left Arrow: Moving cube to z={cube.z:.2f}")  # Debug statement
-        if keys[pygame.K_RIGHT]:
-            for row in cubes:
-                for layer in row:
-                    for cube in layer:
-                        cube.z -= z_move_speed * delta_time  # Move backward along Z-axis
-                        print(f"Shift + Right Arrow: Moving cube to z={cube.z:.2f}")  # Debug statement
-    # *** End Z-Axis Movement ***
-
-    # *** Begin Portal and Grid Collision Detection ***
-    if not is_animating:
-        collision_detected = False
-        for row in cubes:
-            for layer in row:
-                for cube in layer:
-                    if not cube.is_destroyed:
-                        if check_collision_with_horizon(cube) or check_collision_with_portal(cube):
-                            collision_detected = True
-                            break
+                        if not cube.is_destroyed:
+                            if check_collision_with_horizon(cube) or check_collision_with_portal(cube):
+                                collision_detected = True
+                                break
+                    if collision_detected:
+                        break
                 if collision_detected:
                     break
+
             if collision_detected:
-                break
+                # Trigger collision response
+                zoom_animation.start()
+                events.info("collision_response")
 
-        if collision_detected:
-            # Trigger collision response
-            is_animating = True
-            animation_timer = animation_duration
-            print("Collision detected! Triggering cube destruction and animation.")
+                # Set velocities for all small cubes to fly away
+                for row in cubes:
+                    for layer in row:
+                        for cube in layer:
+                            if not cube.is_destroyed:
+                                cube.destroy()
 
-            # Set velocities for all small cubes to fly away
-            for row in cubes:
-                for layer in row:
-                    for cube in layer:
-                        if not cube.is_destroyed:
-                            cube.destroy()
-
-            # Trigger screen shake and flash effects
-            trigger_hit_effects()
-    # *** End Portal and Grid Collision Detection ***
-
-    # *** Begin Animation Handling ***
-    if is_animating:
-        # Decrease the animation timer
-        animation_timer -= delta_time
-
-        # Calculate scaling factor (zoom effect)
-        # Zoom in for the first half, then zoom out
-        if animation_timer > animation_duration / 2:
-            # Zoom in
-            progress = (animation_duration - animation_timer) / (animation_duration / 2)
-            animation_scale = 1.0 + progress  # Scale from 1.0 to 2.0
-        else:
-            # Zoom out
-            progress = animation_timer / (animation_duration / 2)
-            animation_scale = 1.0 + progress  # Scale from 2.0 back to 1.0
-
-        # Draw the scene with the current scale
-        draw_scene(animation_scale)
-        pygame.display.flip()
-
-        if animation_timer <= 0:
-            is_animating = False
-            animation_scale = 1.0
-            print("Animation completed. Returning to the field.")
-            # Optionally, reset cubes or perform other actions here
-            reset_cubes(cubes)
-        
-        continue  # Skip the rest of the loop during animation
-    # *** End Animation Handling ***
+                # Trigger screen shake and flash effects
+                trigger_hit_effects()
+        # *** End Portal and Grid Collision Detection ***
 
-    # *** Begin Normal Rendering ***
-    # Update effects
-    update_effects(delta_time)
 
-    # Update cube positions and flash status
-    update_cubes(delta_time)
+        # Update effects
+        update_effects(delta_time)
 
-    # Check if all cubes are destroyed
-    if all_cubes_destroyed(cubes):
-        flash_screen()  # Flash the screen
-        reset_cubes(cubes)  # Reset the cubes to start over
-        continue  # Skip the rest of the loop to start with a fresh screen
+        # Update cube positions and flash status
+        update_cubes(delta_time)
 
+        # Update sway angles
+        angle_x += rotation_speed * delta_time
+        angle_y += rotation_speed * delta_time
+        angle_z += rotation_speed * delta_time
+
+        # Check if all cubes are destroyed (the zoom animation resets them itself):
+        # flash the screen, the cubes are reset to start over while it is white
+        if all_cubes_destroyed(cubes) and not zoom_animation.active:
+            flash_screen()
+
+    # *** Begin Normal Rendering ***
     # Clear the screen
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
@@ -688,7 +628,8 @@ while True:
     if screen_shake_timer > 0:
         apply_screen_shake()
 
-    draw_scene(animation_scale=1.0)
+    # Draw the scene with the current zoom scale (1.0 when not animating)
+    draw_scene(animation_scale=zoom_animation.scale)
 
     # Restore the original state after shake
     glPopMatrix()
@@ -697,10 +638,8 @@ while True:
     if flash_timer > 0:
         render_flash_effect()
 
-    # Update sway angles
-    angle_x += rotation_speed * delta_time
-    angle_y += rotation_speed * delta_time
-    angle_z += rotation_speed * delta_time
+    # The reset fade goes over everything
+    reset_flash.draw()
 
-    pygame.display.flip()
+    frame_pacer.present()  # Flip, then wait until the next frame is due
     # *** End Normal Rendering ***
@@ -6,6 +6,8 @@
 # changelog:
 # v0.13 - Added portal functionality
 
+import os
+import sys
 import pygame
 from pygame.locals import DOUBLEBUF, OPENGL
 from OpenGL.GL import *
@@ -13,6 +15,14 @@ from OpenGL.GLU import *
 import random
 import math
 
+# Shared helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from event_log import events
+from frame_pacer import FramePacer
+from sim_clock import SimClock
+from portal_renderer import PortalRenderer
+from transitions import FadeTransition, draw_screen_overlay
+
 # Define the dimensions of the main cube
 cube_size = 5  # Number of small cubes per side (adjusted for performance)
 cube_spacing = 1.0  # Increased spacing to avoid overlap
@@ -23,8 +33,14 @@ step = cube_spacing
 # Initialize Pygame and create a window
 pygame.init()
 display = (800, 600)
-pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
-clock = pygame.time.Clock()
+frame_pacer = FramePacer("vsync", target_fps=60)  # Falls back to a precise 60 fps without vsync
+
+# Request OpenGL 3.3 compatibility profile (the portal shader is GLSL 3.30)
+pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MAJOR_VERSION, 3)
+pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MINOR_VERSION, 3)
+pygame.display.gl_set_attribute(pygame.GL_CONTEXT_PROFILE_MASK, pygame.GL_CONTEXT_PROFILE_COMPATIBILITY)
+
+frame_pacer.open_display(display, DOUBLEBUF | OPENGL)
 
 # Enable depth testing
 glEnable(GL_DEPTH_TEST)
@@ -115,7 +131,7 @@ class Cube:
 
     # Upon destruction
     def destroy(self):
-        print(f"Destroying cube at ({self.x}, {self.y}, {self.z})")  # Debugging statement        
+        events.debug("cube_destroyed", position=(self.x, self.y, self.z))
         # Change color to white/grey for the flash effect
         self.color = [0.8, 0.8, 0.8]
         # Set velocity for flying off
@@ -175,7 +191,7 @@ def move_cubes(delta_x, delta_y):
 # Horizon collision detection
 def check_collision_with_horizon(cube):
     if cube.y <= horizon_y:
-        print(f"Collision detected for cube at ({cube.x}, {cube.y}, {cube.z})")
+        events.info("horizon_collision", position=(cube.x, cube.y, cube.z))
         return True
     return False
 
@@ -307,34 +323,15 @@ def reset_cubes(cubes):
                 cubes[ix][iy][iz] = Cube(x, y, z)  # Recreate the cube
                 cubes[ix][iy][iz].reset_animation_state()  # Reset animation state
 
+# Fade to white and back; reset is called once the screen is fully white.
+# The fade runs on simulation time inside the game loop (see transitions.py).
+reset_flash = FadeTransition(fade_out=0.5, hold=0.1, fade_in=0.5, color=(1.0, 1.0, 1.0))
+
 # Flash the screen
-def flash_screen(duration=1000, steps=255):
-    # Duration of the flash in milliseconds
-    # Steps are how many levels of fading we have
-
-    # Fade to white
-    for i in range(steps):
-        alpha = i / steps
-        glClearColor(alpha, alpha, alpha, 1)
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        draw_scene()
-        pygame.display.flip()
-        pygame.time.wait(duration // (steps * 2))  # Wait proportionally to fade duration
-
-    # Hold the white screen
-    pygame.time.wait(duration // steps)  # Hold the white screen for a moment
-
-    # Fade back into the game
-    for i in range(steps, -1, -1):
-        alpha = i / steps
-        glClearColor(alpha, alpha, alpha, 1)
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        draw_scene()  # Draw the game scene with the faded alpha overlay
-        pygame.display.flip()
-        pygame.time.wait(duration // (steps * 2))  # Wait proportionally to fade duration
-
-    # Reset clear color to game's background color
-    glClearColor(0, 0, 0, 1)  # Assuming black is the game's background color
+def flash_screen(reset):
+    if not reset_flash.active:
+        reset_flash.callbacks["fade_out"] = reset
+        reset_flash.start()
 
 # Additional global variables for effects
 screen_shake_duration = 0.5  # Duration of the shake in seconds
@@ -353,6 +350,7 @@ def update_effects(delta_time):
         screen_shake_timer -= delta_time
     if flash_timer > 0:
         flash_timer -= delta_time
+    reset_flash.update(delta_time)
 
 def apply_screen_shake():
     if screen_shake_timer > 0:
@@ -363,37 +361,8 @@ def apply_screen_shake():
 
 def render_flash_effect():
     if flash_timer > 0:
-        # Enable blending for transparency
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-
-        # Set orthographic projection to cover the whole screen
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        gluOrtho2D(-1, 1, -1, 1)
-
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
-
-        # Set the color to red with the alpha based on flash_timer
-        glColor4f(1.0, 0.0, 0.0, min(flash_timer / flash_duration, 1.0))
-
-        # Draw a full-screen quad for the red flash effect
-        glBegin(GL_QUADS)
-        glVertex2f(-1, -1)
-        glVertex2f(1, -1)
-        glVertex2f(1, 1)
-        glVertex2f(-1, 1)
-        glEnd()
-
-        # Restore matrices and disable blending
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
-        glDisable(GL_BLEND)
+        # A full-screen red quad with the alpha based on flash_timer
+        draw_screen_overlay((1.0, 0.0, 0.0), min(flash_timer / flash_duration, 1.0))
 
 class Portal:
     def __init__(self, x, y, z, width=3.0, height=2.0, segments=32):
@@ -404,19 +373,15 @@ class Portal:
         self.height = height
         self.segments = segments
         self.color = [0.0, 1.0, 1.0]  # Cyan color for visibility
+        # The oval (width/height are its radii along x/z) is one cached quad shaded
+        # in a shader, so segments no longer matters; reach=1.0 / glow_alpha=0.0 = no glow
+        self.renderer = PortalRenderer((2 * width, 2 * height), color=self.color, oval=True, plane="xz",
+                                       reach=1.0, glow_alpha=0.0)
 
     def render(self):
         glPushMatrix()
         glTranslatef(self.x, self.y, self.z)
-        glColor3fv(self.color)
-        glBegin(GL_TRIANGLE_FAN)
-        glVertex3f(0.0, 0.0, 0.0)  # Center of the oval
-        for i in range(self.segments + 1):
-            theta = 2.0 * math.pi * i / self.segments
-            x = self.width * math.cos(theta)
-            z = self.height * math.sin(theta)
-            glVertex3f(x, 0.0, z)
-        glEnd()
+        self.renderer.draw()
         glPopMatrix()
 
 # Initialize a portal at a fixed position on the horizon
@@ -433,7 +398,7 @@ def check_collision_with_portal():
                 if not cube.is_destroyed:
                     distance = math.sqrt((cube.x - portal.x) ** 2 + (cube.z - portal.z) ** 2)
                     if distance <= collision_threshold and cube.y <= horizon_y:
-                        print("Portal reached! Ending game.")
+                        events.info("portal_reached")
                         return True
     return False
 
@@ -447,12 +412,11 @@ def reset_scene(cubes):
     # Reset portal to a new random position on the horizon
     portal.x = random.uniform(-10.0, 10.0)
     portal.z = random.uniform(-10.0, 10.0)
-    print("Scene has been reset!")
+    events.info("scene_reset")
 
 # Main game loop
+sim_clock = SimClock(60)  # Fixed 60 Hz simulation, independent of the frame rate
 while True:
-    delta_time = clock.tick(60) / 1000.0  # Delta time in seconds (60 FPS)
-
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             pygame.quit()
@@ -460,8 +424,9 @@ while True:
 
     # Get the state of all keyboard keys
     keys = pygame.key.get_pressed()
+    frame_pacer.input_sampled()
 
-    # Initialize movement deltas
+    # Initialize movement deltas (per simulation tick)
     delta_x, delta_y = 0.0, 0.0
 
     # Handle keyboard events for movement
@@ -474,32 +439,35 @@ while True:
     if keys[pygame.K_DOWN] or keys[pygame.K_s]:
         delta_y -= move_speed
 
-    # Update cube positions based on input
-    move_cubes(delta_x, delta_y)
+    for delta_time in sim_clock.ticks():
+        # Update cube positions based on input
+        move_cubes(delta_x, delta_y)
+
+        # Update effects
+        update_effects(delta_time)
 
-    # Update effects
-    update_effects(delta_time)
+        # Check for collisions and destroy one cube per layer
+        destruction_cooldown -= delta_time
+        if destruction_cooldown <= 0:
+            destroy_one_cube_per_layer()
+            destruction_cooldown = 1.0 / max_destruction_rate
 
-    # Check for collisions and destroy one cube per layer
-    destruction_cooldown -= delta_time
-    if destruction_cooldown <= 0:
-        destroy_one_cube_per_layer()
-        destruction_cooldown = 1.0 / max_destruction_rate
+        # Update cube positions and flash status
+        update_cubes(delta_time)
 
-    # Update cube positions and flash status
-    update_cubes(delta_time)
+        # Update rotation angles based on rotation speed and delta_time
+        angle_x += rotation_speed * delta_time
+        angle_y += rotation_speed * delta_time
+        angle_z += rotation_speed * delta_time
 
-    # Check if all cubes are destroyed
-    if all_cubes_destroyed(cubes):
-        flash_screen()  # Flash the screen
-        reset_cubes(cubes)  # Reset the cubes to start over
-        continue  # Skip the rest of the loop to start with a fresh screen
+        # Check if all cubes are destroyed: flash the screen and reset the
+        # cubes to start over while it is white
+        if all_cubes_destroyed(cubes):
+            flash_screen(lambda: reset_cubes(cubes))
 
-    # Check collision with the portal
-    if check_collision_with_portal():
-        flash_screen()  # Flash the screen
-        reset_scene(cubes)  # Reset the scene
-        continue  # Skip the rest of the loop to start with a fresh screen
+        # Check collision with the portal: same, but the whole scene is reset
+        if not reset_flash.active and check_collision_with_portal():
+            flash_screen(lambda: reset_scene(cubes))
 
     # Clear the screen
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
@@ -518,9 +486,7 @@ while True:
     if flash_timer > 0:
         render_flash_effect()
 
-    # Update rotation angles based on rotation speed and delta_time
-    angle_x += rotation_speed * delta_time
-    angle_y += rotation_speed * delta_time
-    angle_z += rotation_speed * delta_time
+    # The reset fade goes over everything
+    reset_flash.draw()
 
-    pygame.display.flip()
+    frame_pacer.present()  # Flip, then wait until the next frame is due
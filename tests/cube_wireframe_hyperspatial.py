@@ -95,5 +95,4 @@ while True:
             glVertex3fv(vertex)
     glEnd()
 
-    pygame.display.flip()
-    pygame.time.wait(10)
\ No newline at end of file
+    pygame.display.flip()  # clock.tick(60) at the top of the loop does the pacing
\ No newline at end of file
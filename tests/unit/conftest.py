@@ -0,0 +1,41 @@
+# Shared fixtures: GL calls go to a recording backend over the null backend,
+# so the render path runs (and is counted) without any context
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import random
+
+import pytest
+
+from event_log import WARNING, events
+from gl_backend import NullBackend, RecordingBackend, using_backend
+
+from cube_libre import settings
+
+@pytest.fixture
+def recording_gl():
+    backend = RecordingBackend(NullBackend())
+    with using_backend(backend):
+        yield backend
+
+# Keep the collision events out of the test output
+@pytest.fixture(autouse=True)
+def quiet_events(monkeypatch):
+    monkeypatch.setattr(events, "level", WARNING)
+
+# A Simulation and its Renderer for a body of cube_size; any other settings
+# can be passed as keywords (frustum culling is off unless asked for)
+@pytest.fixture
+def make_renderer(monkeypatch, recording_gl):
+    def make(cube_size=5, seed=1, **overrides):
+        from cube_libre.renderer import Renderer
+        from cube_libre.simulation import Simulation
+
+        overrides.setdefault("frustum_culling", False)
+        monkeypatch.setattr(settings, "cube_size", cube_size)
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+        renderer = Renderer(Simulation(rng=random.Random(seed)))
+        recording_gl.end_frame()  # Setup isn't part of any frame
+        return renderer
+    return make
@@ -0,0 +1,26 @@
+# The game without a window: frames run on set controls, with no events
+# pumped and nothing presented
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import random
+
+from cube_libre.app import Game
+from cube_libre.simulation import Controls
+
+def test_headless_frames(recording_gl):
+    game = Game(window=False, rng=random.Random(1))
+    try:
+        game.create_renderer()
+        game.controls = Controls(y=-1)
+        start = game.sim.cubes.position.copy()
+        for _ in range(10):
+            game.frame(game.sim_clock.dt)
+            frame = recording_gl.end_frame()
+            assert frame["by_function"].get("glClear") == 1
+        assert game.frame_count == 10
+        assert game.sim.tick_count == 10
+        assert game.sim.cubes.position[1] < start[1]
+    finally:
+        game.flight_recorder.close()
+        game.profiler.close()
@@ -0,0 +1,63 @@
+# The view frustum's planes, pulled out of the fixed-function matrices (kept by
+# the null backend), and the sphere / box visibility tests against them
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import numpy as np
+import pytest
+
+from camera import Frustum, plane_names
+from gl_backend import GL_MODELVIEW, GL_PROJECTION, gl
+from shaders import fixed_function_mvp
+
+from cube_libre.renderer import set_perspective
+
+# 90 degree square view from (0, 0, 10) down -z, near 1 and far 100: the view
+# is as wide as it is deep and the far plane is at z = -90
+@pytest.fixture
+def frustum(recording_gl):
+    gl.glMatrixMode(GL_PROJECTION)
+    gl.glLoadIdentity()
+    set_perspective(90, 1.0, 1.0, 100.0)
+    gl.glMatrixMode(GL_MODELVIEW)
+    gl.glLoadIdentity()
+    gl.glTranslatef(0.0, 0.0, -10.0)
+    return Frustum()
+
+def test_planes(frustum):
+    assert np.allclose(np.linalg.norm(frustum.normals, axis=1), 1.0)
+    s = np.sqrt(0.5)
+    expected = {"left": (s, 0, -s), "right": (-s, 0, -s), "bottom": (0, s, -s), "top": (0, -s, -s),
+                "near": (0, 0, -1), "far": (0, 0, 1)}
+    for name, normal in zip(plane_names, frustum.normals):
+        assert np.allclose(normal, expected[name], atol=1e-6), name
+    # The near and far planes go through z = 9 and z = -90
+    near, far = plane_names.index("near"), plane_names.index("far")
+    distances = frustum.signed_distances([(0, 0, 9), (0, 0, -90)])
+    assert distances[0, near] == pytest.approx(0, abs=1e-5)
+    assert distances[1, far] == pytest.approx(0, abs=1e-3)  # float32 matrices
+
+def test_same_planes_from_an_explicit_mvp(frustum):
+    assert np.allclose(Frustum(fixed_function_mvp()).planes, frustum.planes)
+
+def test_sphere_visible(frustum):
+    assert frustum.sphere_visible((0, 0, 0), 0.5)
+    assert not frustum.sphere_visible((0, 0, 20), 1.0)  # Behind the camera
+    assert not frustum.sphere_visible((0, 0, -95), 1.0)  # Past the far plane
+    assert frustum.sphere_visible((0, 0, -95), 10.0)  # ... but reaching into the view
+    # 10 units out to the side at 10 units deep is on the edge of the view,
+    # so (20, 0, 0) is 10 / sqrt(2) from the right plane
+    assert not frustum.sphere_visible((20, 0, 0), 7.0)
+    assert frustum.sphere_visible((20, 0, 0), 7.2)
+    assert not frustum.sphere_visible((0, -20, 0), 7.0)
+
+def test_spheres_visible(frustum):
+    centers = np.array([(0, 0, 0), (0, 0, 20), (20, 0, 0), (20, 0, 0)])
+    assert frustum.spheres_visible(centers, 1.0).tolist() == [True, False, False, False]
+    assert frustum.spheres_visible(centers, [1.0, 1.0, 7.0, 7.2]).tolist() == [True, False, False, True]
+    assert frustum.spheres_visible(np.zeros((0, 3)), 1.0).tolist() == []
+
+def test_boxes_visible(frustum):
+    mins = np.array([(-1, -1, -1), (-100, -1, -1), (30, -1, -1), (-1, -1, 15)])
+    maxs = np.array([(1, 1, 1), (100, 1, 1), (40, 1, 1), (1, 1, 20)])
+    assert frustum.boxes_visible(mins, maxs).tolist() == [True, True, False, False]
@@ -0,0 +1,55 @@
+# The debris pool's slot recycling: a full pool reuses its oldest particle
+# (and forgets that particle's owner), and released slots go back on the
+# free list
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import numpy as np
+
+from debris import DebrisPool
+
+def free_slots(pool):
+    return set(pool._free[:pool._free_top].tolist())
+
+def test_full_pool_recycles_the_oldest():
+    pool = DebrisPool(4, owners=10, lifetime=1e9)
+    slots = []
+    for owner in range(4):
+        slots.append(pool.spawn((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), owner=owner))
+        pool.update(0.1)  # Each particle is 0.1 s younger than the one before it
+    assert pool.count == 4 and not free_slots(pool)
+    oldest = int(np.argmax(pool.ages))
+    assert oldest == slots[0]
+
+    # Past capacity: owner 0's particle is the one that gets reused
+    slot = pool.spawn((1.0, 2.0, 3.0), (0.0, 0.0, 0.0), owner=7)
+    assert slot == oldest
+    assert pool.count == 4
+    assert pool.slot_of(0) == -1
+    assert pool.slot_of(7) == slot
+    assert pool.ages[slot] == 0.0
+    assert pool.positions[slot].tolist() == [1.0, 2.0, 3.0]
+    assert [pool.slot_of(owner) for owner in (1, 2, 3)] == slots[1:]
+
+    # The next one past capacity takes the next oldest
+    assert pool.spawn((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), owner=8) == slots[1]
+    assert pool.slot_of(1) == -1
+
+def test_release_frees_the_slot():
+    pool = DebrisPool(4, owners=10)
+    slot = pool.spawn((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), owner=5)
+    assert slot not in free_slots(pool)
+    pool.release(slot)
+    assert slot in free_slots(pool)
+    assert pool.count == 0 and not pool.alive[slot]
+    assert pool.slot_of(5) == -1 and pool.owners[slot] == -1
+    pool.release(slot)  # Releasing a dead slot does nothing
+    assert pool.count == 0 and len(free_slots(pool)) == pool._free_top == 4
+
+def test_expired_particles_are_culled():
+    pool = DebrisPool(4, owners=10, lifetime=1.0)
+    pool.spawn((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), owner=2)
+    pool.update(1.5)
+    assert pool.count == 0
+    assert pool.slot_of(2) == -1
+    assert free_slots(pool) == {0, 1, 2, 3}
@@ -0,0 +1,69 @@
+# The event log: level filter, rate limit, and flushing while other threads
+# are logging (new suppressed event types used to change the dict the flusher
+# was going through)
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import io
+import re
+import sys
+import threading
+
+import pytest
+
+from event_log import DEBUG, INFO, WARNING, EventLog
+
+def make_log(**kwargs):
+    # flush_interval long enough that only the test's own flush() calls write
+    return EventLog(stream=io.StringIO(), flush_interval=60.0, **kwargs)
+
+def suppressed_counts(text):
+    return {event: int(count) for event, count in re.findall(r"suppressed event=(\S+) count=(\d+)", text)}
+
+def test_level_and_rate_limit():
+    now = [0.0]
+    log = make_log(level=INFO, rate=1.0, burst=2, time_source=lambda: now[0])
+    log.debug("hidden")
+    for _ in range(5):
+        log.info("spam")
+    now[0] += 1.0
+    log.info("spam")
+    log.close()
+    text = log.stream.getvalue()
+    assert "hidden" not in text
+    assert text.count(" spam") == 3  # The burst, then one more a second later
+    assert suppressed_counts(text) == {"spam": 3}
+    assert log.counts == {"spam": 6}
+
+@pytest.fixture
+def fast_thread_switching():
+    # Switch threads as often as possible, so flush() gets interrupted mid-loop
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(switch_interval)
+
+def test_flush_while_logging_from_threads(fast_thread_switching):
+    log = make_log(level=DEBUG, rate=0.0, burst=1)
+    threads, per_thread = 4, 3000
+
+    def hammer(t):
+        for n in range(per_thread):
+            # Every type is new: the first one gets through, the second is suppressed
+            log.log(WARNING, f"event_{t}_{n}")
+            log.log(WARNING, f"event_{t}_{n}")
+
+    workers = [threading.Thread(target=hammer, args=(t,)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    while any(worker.is_alive() for worker in workers):
+        log.flush()  # Raised "dictionary changed size during iteration"
+    for worker in workers:
+        worker.join()
+    log.close()
+
+    text = log.stream.getvalue()
+    expected = {f"event_{t}_{n}" for t in range(threads) for n in range(per_thread)}
+    assert set(suppressed_counts(text)) == expected
+    assert set(suppressed_counts(text).values()) == {1}
+    assert len(re.findall(r" WARNING +event_", text)) == threads * per_thread
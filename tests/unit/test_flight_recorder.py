@@ -0,0 +1,49 @@
+# The flight recorder's garbage collection scopes: only collections on the
+# recorder's own thread are recorded, and the gc hook doesn't outlive the
+# recorder
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import gc
+import threading
+
+from flight_recorder import FlightRecorder
+
+def gc_scopes(recorder):
+    return {name: time for name, time in recorder.frame_phases().items() if name.startswith("gc gen")}
+
+def test_collections_on_the_recorder_thread_are_scopes():
+    with FlightRecorder(capacity=8) as recorder:
+        recorder.begin_frame()
+        gc.collect()
+        recorder.end_frame()
+        assert "gc gen 2" in gc_scopes(recorder)
+
+def test_collections_on_other_threads_are_not():
+    with FlightRecorder(capacity=8) as recorder:
+        recorder.begin_frame()
+        collector = threading.Thread(target=gc.collect)
+        collector.start()
+        collector.join()
+        recorder.end_frame()
+        assert gc_scopes(recorder) == {}
+
+def test_gc_hook_goes_away():
+    callbacks = len(gc.callbacks)
+    with FlightRecorder(capacity=8):
+        assert len(gc.callbacks) == callbacks + 1
+    assert len(gc.callbacks) == callbacks  # The end of the with block
+
+    recorder = FlightRecorder(capacity=8)
+    recorder.close()
+    recorder.close()
+    assert len(gc.callbacks) == callbacks
+
+    # Never closed: the hook only holds the recorder weakly, so it is collected
+    # (its scopes refer back to it) and takes the hook with it
+    for _ in range(3):
+        recorder = FlightRecorder(capacity=8)
+        recorder.scope("sim")
+    del recorder
+    gc.collect()
+    assert len(gc.callbacks) == callbacks
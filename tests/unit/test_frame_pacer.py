@@ -0,0 +1,71 @@
+# Frame pacing without a display: "vsync" falls back to "target" when the
+# driver refuses it, and "target" paces frames to its deadlines on a fake clock
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import pygame
+import pytest
+
+from frame_pacer import FramePacer
+
+class FakeClock:
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step  # Every look at the clock takes this long (the spin wait moves on)
+        self.sleeps = []
+
+    def time(self):
+        self.now += self.step
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def set_mode_calls(monkeypatch):
+    calls = []
+    def set_mode(size, flags=0, **kwargs):
+        calls.append(kwargs)
+        if kwargs.get("vsync"):
+            raise pygame.error("Cannot set swap interval")
+        return "surface"
+    monkeypatch.setattr(pygame.display, "set_mode", set_mode)
+    monkeypatch.setattr(pygame.display, "flip", lambda: None)
+    return calls
+
+def test_vsync_falls_back_to_target(set_mode_calls):
+    pacer = FramePacer(mode="vsync", target_fps=64)
+    assert pacer.open_display((640, 480), 0) == "surface"
+    assert pacer.mode == "target"
+    assert set_mode_calls == [{"vsync": 1}, {}]
+
+def test_other_modes_dont_ask_for_vsync(set_mode_calls):
+    pacer = FramePacer(mode="adaptive")
+    pacer.open_display((640, 480), 0)
+    assert pacer.mode == "adaptive"
+    assert set_mode_calls == [{}]
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        FramePacer(mode="sometimes")
+
+def test_fallback_paces_to_the_target(set_mode_calls):
+    clock = FakeClock(step=1 / 4096)
+    pacer = FramePacer(mode="vsync", target_fps=64, spin_time=1 / 512, time_source=clock.time, sleep=clock.sleep)
+    pacer.open_display((640, 480), 0)
+    for _ in range(10):
+        pacer.present()
+    # Slept up to spin_time before each deadline, then spun the rest of the way
+    assert len(clock.sleeps) == 10
+    assert all(seconds <= pacer.period - pacer.spin_time for seconds in clock.sleeps)
+    assert len(pacer.frame_times) == 9
+    assert all(frame_time == pytest.approx(pacer.period, abs=2 / 4096) for frame_time in pacer.frame_times)
+    assert pacer.summary()["fps"] == pytest.approx(64, rel=0.05)
+
+def test_uncapped_never_waits(set_mode_calls):
+    clock = FakeClock(step=1 / 4096)
+    pacer = FramePacer(mode="uncapped", time_source=clock.time, sleep=clock.sleep)
+    for _ in range(5):
+        pacer.present()
+    assert clock.sleeps == []
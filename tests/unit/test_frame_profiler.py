@@ -0,0 +1,71 @@
+# The frame profiler: a capture covers exactly the requested frames and writes
+# its .pstats, .collapsed and .json files; close() writes one cut short
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import json
+import pstats
+import time
+
+from frame_profiler import FrameProfiler
+
+def busy_frame(seconds=0.01):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+def run_frames(profiler, frames):
+    for _ in range(frames):
+        profiler.begin_frame()
+        start = time.perf_counter()
+        busy_frame()
+        profiler.end_frame(time.perf_counter() - start)
+
+def read_json(stem):
+    with open(stem + ".json") as f:
+        return json.load(f)
+
+def test_capture_writes_its_files(tmp_path):
+    profiler = FrameProfiler(out_dir=str(tmp_path), annotate=lambda: {"cube_size": 5})
+    run_frames(profiler, 2)  # Not armed: nothing captured
+    assert not profiler.captures
+    assert profiler.start(3)
+    assert not profiler.start(5)  # Busy
+    run_frames(profiler, 1)
+    assert profiler.capturing and profiler.frames == 2
+    run_frames(profiler, 4)  # The capture stops after its third frame
+    assert not profiler.capturing and profiler.frames == 0
+    profiler.close()
+
+    [stem] = profiler.captures
+    info = read_json(stem)
+    assert info["frames"] == info["requested_frames"] == 3
+    assert info["cube_size"] == 5
+    assert 10 <= info["frame_ms"]["mean"] <= info["frame_ms"]["max"]
+    assert set(info["frame_ms"]) == {"mean", "p50", "p95", "p99", "max"}
+
+    stats = pstats.Stats(stem + ".pstats")
+    assert any(function == "busy_frame" for _, _, function in stats.stats)
+    with open(stem + ".collapsed") as f:
+        lines = f.read().splitlines()
+    assert info["samples"] == sum(int(line.rsplit(" ", 1)[1]) for line in lines) > 0
+    assert any("busy_frame" in line for line in lines)
+
+def test_close_writes_a_capture_cut_short(tmp_path):
+    profiler = FrameProfiler(out_dir=str(tmp_path / "profiles"))
+    profiler.start(10)
+    run_frames(profiler, 2)
+    profiler.close()
+    [stem] = profiler.captures
+    info = read_json(stem)
+    assert info["frames"] == 2 and info["requested_frames"] == 10
+    assert not profiler.capturing and profiler.frames == 0
+
+    # Two captures in the same second get their own files
+    profiler.start(1)
+    run_frames(profiler, 1)
+    profiler.close()
+    assert len(set(profiler.captures)) == 2
+    assert read_json(profiler.captures[1])["frames"] == 1
@@ -0,0 +1,54 @@
+# The performance HUD's numbers: frame times, phase times and draw calls
+# averaged over each refresh period, and its draw counter only in place while
+# it is shown
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+from types import SimpleNamespace
+
+import numpy as np
+from OpenGL.GL import GL_TRIANGLES
+
+from gl_backend import DrawCounter, gl
+
+from cube_libre.hud import PerformanceHud
+
+sim = SimpleNamespace(cubes=SimpleNamespace(live_count=100, count=125), debris=SimpleNamespace(count=7))
+
+def test_averages_over_the_refresh_period(recording_gl):
+    hud = PerformanceHud(refresh=0.25)
+    hud.show()
+    try:
+        assert isinstance(gl.backend, DrawCounter)
+        # 0.25 s over four frames, with 1..4 draw calls each
+        frame_times = [0.03125, 0.0625, 0.0625, 0.09375]
+        for frame, frame_time in enumerate(frame_times):
+            assert hud.lines == []  # Nothing until the period is over
+            for _ in range(frame + 1):
+                gl.glDrawArrays(GL_TRIANGLES, 0, 3)
+            hud.update(frame_time, {"sim": 0.002 * (frame + 1), "render": 0.004}, sim)
+        text = [line for line, _ in hud.lines]
+        assert text[0] == "FPS   16.0   62.50 ms  (max 93.75)"
+        assert text[1] == "input 0.00  sim 5.00  collision 0.00 ms"
+        assert text[2] == "render 4.00  hud 0.00  flip 0.00 ms"
+        assert text[3] == "voxels 100/125   debris 7"
+        assert text[4] == "draw calls 2.5"
+
+        # The sums start over for the next period
+        assert hud._frames == 0 and hud._frame_sum == 0.0 and hud._draw_sum == 0
+        gl.glDrawArrays(GL_TRIANGLES, 0, 3)
+        hud.update(0.25, {}, sim)
+        assert hud.lines[0][0] == "FPS    4.0   250.00 ms  (max 250.00)"
+        assert hud.lines[4][0] == "draw calls 1.0"
+    finally:
+        hud.show(False)
+    assert gl.backend is recording_gl
+
+def test_hidden_hud_only_keeps_the_sparkline(recording_gl):
+    hud = PerformanceHud(history=4, refresh=0.25)
+    for frame_time in (0.1, 0.2, 0.3, 0.4, 0.5):
+        hud.update(frame_time, {"sim": 0.001}, sim)
+    assert hud.lines == [] and hud._frames == 0
+    assert hud.cursor == 1
+    assert np.allclose(hud.frame_times, [0.5, 0.2, 0.3, 0.4])  # A ring buffer of the last 4
+    assert gl.backend is recording_gl
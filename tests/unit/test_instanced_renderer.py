@@ -0,0 +1,93 @@
+# The instanced body path: the whole body is one glDrawElementsInstanced call,
+# however big it is. Counted on the null backend, and drawn for real on Mesa's
+# llvmpipe over EGL when that is available.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import ctypes.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sizes = (1, 2, 5, 16)
+
+def instanced_draws(recording_gl, frame):
+    call_id = recording_gl.call_ids["glDrawElementsInstanced"]
+    return [args for command_id, args in frame["commands"] if command_id == call_id]
+
+@pytest.mark.parametrize("cube_size", sizes)
+def test_body_is_one_instanced_draw(make_renderer, recording_gl, cube_size):
+    renderer = make_renderer(cube_size, body_render_mode="instanced")
+    renderer.render()
+    frame = recording_gl.end_frame()
+    draws = instanced_draws(recording_gl, frame)
+    assert len(draws) == 1
+    assert draws[0][-1] == int(renderer.sim.cubes.visible.sum())  # Instances: the surface voxels
+
+def test_body_stays_one_draw_as_cubes_break_off(make_renderer, recording_gl):
+    renderer = make_renderer(8, body_render_mode="instanced")
+    body = renderer.sim.cubes
+    for i in range(0, body.count, 7):
+        body.destroy(i)
+    body.debris.clear()  # Only the body left to draw
+    renderer.render()
+    draws = instanced_draws(recording_gl, recording_gl.end_frame())
+    assert len(draws) == 1
+    assert draws[0][-1] == int(body.visible.sum())
+
+    # Debris in the air is the second (and last) instanced draw
+    body.destroy(1)
+    renderer.render()
+    assert len(instanced_draws(recording_gl, recording_gl.end_frame())) == 2
+
+# Run in a child process: PyOpenGL picks its platform (EGL) when it is first imported
+egl_script = """
+import json, random, sys
+
+from cube_libre import settings
+from cube_libre.bench import EGLContext
+
+try:
+    context = EGLContext((160, 120))
+except Exception as e:
+    print(json.dumps({"unavailable": str(e)}))
+    sys.exit(0)
+
+from OpenGL.GL import GL_RENDERER
+
+from gl_backend import RecordingBackend, gl, use_backend
+
+from cube_libre.renderer import Renderer
+from cube_libre.simulation import Simulation
+
+settings.body_render_mode = "instanced"
+settings.display = (160, 120)
+results = {"renderer": gl.glGetString(GL_RENDERER).decode(), "draws": {}}
+for size in json.loads(sys.argv[1]):
+    settings.cube_size = size
+    renderer = Renderer(Simulation(rng=random.Random(1)))
+    recorder = RecordingBackend(gl.backend)
+    previous = use_backend(recorder)
+    renderer.render()
+    gl.glFinish()
+    use_backend(previous)
+    results["draws"][size] = recorder.end_frame()["by_function"].get("glDrawElementsInstanced", 0)
+print(json.dumps(results))
+"""
+
+@pytest.mark.skipif(ctypes.util.find_library("EGL") is None, reason="no libEGL")
+def test_body_is_one_instanced_draw_on_llvmpipe():
+    env = dict(os.environ, PYOPENGL_PLATFORM="egl", EGL_PLATFORM="surfaceless", LIBGL_ALWAYS_SOFTWARE="1",
+               GALLIUM_DRIVER="llvmpipe", CUBE_LIBRE_LOG_LEVEL="warning")
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    child = subprocess.run([sys.executable, "-c", egl_script, json.dumps(sizes)], cwd=root, env=env,
+                           capture_output=True, text=True, timeout=120)
+    assert child.returncode == 0, child.stderr
+    results = json.loads(child.stdout.strip().splitlines()[-1])
+    if "unavailable" in results:
+        pytest.skip(f"no EGL context: {results['unavailable']}")
+    assert "llvmpipe" in results["renderer"]
+    assert results["draws"] == {str(size): 1 for size in sizes}
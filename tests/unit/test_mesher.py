@@ -0,0 +1,125 @@
+# Incremental remeshing: after any run of destroys and restores, every slice's
+# region of the VBO must hold what a full remesh of the same body gives. The
+# VBO contents are kept by a null backend that also remembers buffer uploads.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import random
+
+import numpy as np
+import pytest
+
+from gl_backend import NullBackend, using_backend
+from mesher import BodyMesh, slice_vertices, vertex_floats
+from voxel_body import VoxelBody
+
+# The null backend plus buffer memory: glBufferData / glBufferSubData land in
+# a bytearray per buffer object
+class BufferMemory(NullBackend):
+    def __init__(self):
+        super().__init__()
+        self.bound = {}
+        self.buffers = {}
+
+    def glBindBuffer(self, target, buffer):
+        self.bound[target] = buffer
+
+    def glBufferData(self, target, size, data, usage):
+        memory = bytearray(size)
+        if data is not None:
+            memory[:] = np.asarray(data).tobytes()[:size]
+        self.buffers[self.bound[target]] = memory
+
+    def glBufferSubData(self, target, offset, size, data):
+        memory = self.buffers[self.bound[target]]
+        assert offset + size <= len(memory), "upload past the end of the buffer"
+        memory[offset:offset + size] = np.asarray(data).tobytes()[:size]
+
+    def vertices(self, buffer):
+        return np.frombuffer(bytes(self.buffers[buffer]), dtype=np.float32).reshape(-1, vertex_floats)
+
+# The same voxels destroyed on a body that never had any restored, built from scratch
+def fresh_body(body):
+    fresh = VoxelBody(body.size, rng=random.Random(0))
+    for i in np.flatnonzero(body.destroyed).tolist():
+        fresh.destroy(i)
+    return fresh
+
+def check_mesh(mesh, memory):
+    body = mesh.body
+    fresh = fresh_body(body)
+    assert np.array_equal(body.face_masks, fresh.face_masks)
+    vbo = memory.vertices(mesh.vbo)
+    assert len(vbo) == mesh.buffer_size
+    size = body.size
+    for s in range(mesh.slice_count):
+        first, count = int(mesh.firsts[s]), int(mesh.counts[s])
+        assert count <= mesh.capacities[s]
+        expected = slice_vertices(fresh, s // size, s % size)
+        assert np.array_equal(vbo[first:first + count], expected), f"slice {s}"
+
+    # Slice regions don't overlap and stay inside the handed-out part of the buffer
+    order = np.argsort(mesh.firsts)
+    starts, ends = mesh.firsts[order], (mesh.firsts + mesh.capacities)[order]
+    assert np.all(ends[:-1] <= starts[1:])
+    assert ends[-1] <= mesh.used <= mesh.buffer_size
+
+    # What gets drawn: every non-empty slice, nothing else
+    nonempty = mesh.counts > 0
+    assert np.array_equal(mesh.draw_firsts, mesh.firsts[nonempty])
+    assert np.array_equal(mesh.draw_counts, mesh.counts[nonempty])
+
+@pytest.mark.parametrize("size, seed", [(4, 1), (7, 2), (12, 3)])
+def test_incremental_updates_match_a_full_remesh(size, seed):
+    memory = BufferMemory()
+    with using_backend(memory):
+        body = VoxelBody(size, rng=random.Random(seed))
+        mesh = BodyMesh(body)
+        mesh.update()
+        check_mesh(mesh, memory)
+        picks = np.random.default_rng(seed)
+        for _ in range(40):
+            for i in picks.choice(body.count, size=picks.integers(1, 6), replace=False).tolist():
+                if body.destroyed[i]:
+                    body.restore(i)
+                else:
+                    body.destroy(i)
+            mesh.update()
+            check_mesh(mesh, memory)
+        assert mesh.slice_updates > 0
+
+def test_outgrown_slices_move_then_rebuild():
+    memory = BufferMemory()
+    with using_backend(memory):
+        body = VoxelBody(10, rng=random.Random(4))
+        mesh = BodyMesh(body)
+        mesh.update()
+        first_used = mesh.used
+        relocated = False
+
+        # A checkerboard, a voxel at a time: a solid face is one quad, a
+        # checkered one a quad per exposed cell, so slices outgrow their slack
+        checkered = np.flatnonzero((body.lattice.sum(axis=1) % 2) == 0)
+        for n, i in enumerate(checkered.tolist()):
+            body.destroy(i)
+            mesh.update()
+            if mesh.rebuilds == 1:
+                relocated |= bool((mesh.firsts >= first_used).any())
+            if mesh.rebuilds == 1 or n % 25 == 0:
+                check_mesh(mesh, memory)
+        assert relocated  # Some slice moved to the free space at the end...
+        assert mesh.rebuilds > 1  # ...and once that ran out, the buffer was rebuilt
+        check_mesh(mesh, memory)
+
+def test_reset_rebuilds():
+    memory = BufferMemory()
+    with using_backend(memory):
+        body = VoxelBody(6, rng=random.Random(5))
+        mesh = BodyMesh(body)
+        mesh.update()
+        for i in range(0, body.count, 3):
+            body.destroy(i)
+        body.reset()
+        mesh.update()
+        assert mesh.rebuilds == 2
+        check_mesh(mesh, memory)
@@ -0,0 +1,126 @@
+# What one frame of the renderer sends to GL, counted by the recording backend
+# over the null backend: draw calls per part of the scene, state changes (and
+# that none of them are redundant) and bytes uploaded. A change that adds a
+# draw, a rebind or a per-frame upload shows up here as a failed count.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+from collections import defaultdict
+
+import pytest
+from OpenGL.GL import GL_POINTS, GL_TRIANGLES
+
+from gl_backend import draw_functions
+from instanced_renderer import instance_floats
+from mesher import vertex_floats
+
+# Draw calls of a frame by the program bound when they were made (0 = none:
+# the immediate-mode overlays), as (function name, args)
+def draws_by_program(recording_gl, frame):
+    names = recording_gl.call_names
+    draws = defaultdict(list)
+    program = 0
+    for call_id, args in frame["commands"]:
+        name = names[call_id]
+        if name == "glUseProgram":
+            program = args[0]
+        elif name in draw_functions:
+            draws[program].append((name, args))
+    return draws
+
+def scene_programs(renderer):
+    return {"body": renderer.body_mesh.shader.program if renderer.body_mesh else renderer.cube_renderer.shader.program,
+            "stars": renderer.star_field.shader.program, "grid": renderer.ground_grid.shader.program,
+            "portal": renderer.portal_renderer.shader.program}
+
+@pytest.fixture
+def mesh_renderer(make_renderer, recording_gl):
+    renderer = make_renderer(5, body_render_mode="mesh")
+    renderer.build_deferred()
+    recording_gl.end_frame()  # The star field's static VBO
+    return renderer
+
+def test_each_part_of_the_scene_is_one_draw(mesh_renderer, recording_gl):
+    mesh_renderer.draw_scene()
+    frame = recording_gl.end_frame()
+    draws = draws_by_program(recording_gl, frame)
+    programs = scene_programs(mesh_renderer)
+    for part, program in programs.items():
+        assert len(draws[program]) == 1, part
+    assert set(draws) == set(programs.values())  # Nothing else is drawn
+
+    body_mesh = mesh_renderer.body_mesh
+    name, args = draws[programs["body"]][0]
+    assert (name, args[0], args[-1]) == ("glMultiDrawArrays", GL_TRIANGLES, len(body_mesh.draw_counts))
+    assert draws[programs["stars"]][0][0] == "glMultiDrawArrays"
+    assert draws[programs["stars"]][0][1][0] == GL_POINTS
+    assert draws[programs["grid"]][0][0] == "glDrawArrays"
+    assert draws[programs["portal"]][0][0] == "glDrawArrays"
+
+def test_state_changes(mesh_renderer, recording_gl):
+    mesh_renderer.draw_scene()
+    recording_gl.end_frame()
+    mesh_renderer.draw_scene()
+    frame = recording_gl.end_frame()
+    # Opaque pass: blending off, depth writes on, body and stars (program +
+    # VAO each) and the point size; transparent pass: blending on, blend
+    # function, depth writes off, grid and portal (program + VAO each); then
+    # the defaults back: no program, no VAO, blending off, depth writes on
+    assert frame["state_changes"] == (2 + 2 * 2 + 1) + (3 + 2 * 2) + 4
+    assert frame["redundant_state_changes"] == 0
+    for program in scene_programs(mesh_renderer).values():
+        assert frame["commands"].count((recording_gl.call_ids["glUseProgram"], (program,))) == 1
+
+def test_mesh_uploads_only_what_changed(mesh_renderer, recording_gl):
+    body_mesh = mesh_renderer.body_mesh
+    mesh_renderer.draw_scene()  # First frame: the whole mesh
+    frame = recording_gl.end_frame()
+    assert frame["bytes_uploaded"] == body_mesh.buffer_size * vertex_floats * 4
+    assert frame["by_function"].get("glBufferData") == 1
+
+    mesh_renderer.draw_scene()  # Nothing changed: nothing uploaded
+    assert recording_gl.end_frame()["bytes_uploaded"] == 0
+
+    body = mesh_renderer.sim.cubes
+    body.destroy(body.index(2, 4, 2))  # A voxel off the top face
+    dirty = body_mesh.slices_of(body.index(2, 4, 2))
+    body.debris.clear()
+    mesh_renderer.draw_scene()
+    frame = recording_gl.end_frame()
+    assert "glBufferData" not in frame["by_function"]
+    uploaded = [s for s in dirty if body_mesh.counts[s]]
+    assert frame["by_function"]["glBufferSubData"] == len(uploaded)
+    assert frame["bytes_uploaded"] == int(body_mesh.counts[uploaded].sum()) * vertex_floats * 4
+
+def test_instanced_body_and_debris_uploads(make_renderer, recording_gl):
+    renderer = make_renderer(5, body_render_mode="instanced")
+    renderer.draw_scene()
+    frame = recording_gl.end_frame()
+    body = renderer.sim.cubes
+    assert frame["bytes_uploaded"] == int(body.visible.sum()) * instance_floats * 4  # Streamed every frame
+
+    for i in (0, 1, 2):
+        body.destroy(i)
+    renderer.draw_scene()
+    frame = recording_gl.end_frame()
+    assert frame["by_function"]["glDrawElementsInstanced"] == 2  # Body, debris
+    assert frame["bytes_uploaded"] == (int(body.visible.sum()) + body.debris.count) * instance_floats * 4
+    assert frame["redundant_state_changes"] == 0
+
+def test_flash_overlay(mesh_renderer, recording_gl):
+    sim = mesh_renderer.sim
+    mesh_renderer.render()
+    recording_gl.end_frame()
+    mesh_renderer.render()
+    plain = recording_gl.end_frame()
+
+    sim.flash_timer = 0.1
+    mesh_renderer.render()
+    flashed = recording_gl.end_frame()
+    overlay = draws_by_program(recording_gl, flashed)[0]
+    assert [name for name, _ in overlay] == ["glBegin"]  # One quad, no program
+    assert flashed["bytes_uploaded"] == plain["bytes_uploaded"] == 0
+    # Blending on, depth test off, blend function, and both back afterwards
+    assert flashed["state_changes"] - plain["state_changes"] == 5
+    # ...where the blend function is the one the transparent pass left set
+    assert flashed["redundant_state_changes"] - plain["redundant_state_changes"] == 1
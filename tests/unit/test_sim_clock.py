@@ -0,0 +1,39 @@
+# The fixed-timestep clock: whole ticks out of the accumulator, long frames
+# clamped to max_frame_time, and the interpolation alpha staying in 0..1
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import pytest
+
+from sim_clock import SimClock, lerp
+
+def test_whole_ticks_and_leftover():
+    clock = SimClock(tick_rate=60)
+    assert list(clock.ticks(2.5 / 60)) == [clock.dt, clock.dt]
+    assert clock.tick_count == 2
+    assert clock.sim_time == pytest.approx(2 / 60)
+    assert clock.alpha == pytest.approx(0.5)
+
+def test_long_frames_are_clamped():
+    clock = SimClock(tick_rate=60, max_frame_time=0.25)
+    assert clock.advance(3.0) == 15  # 0.25 s worth of ticks, not 180
+    assert clock.dropped_time == pytest.approx(2.75)
+    assert clock.accumulator < clock.dt
+
+def test_alpha_stays_in_range():
+    clock = SimClock(tick_rate=60)
+    for frame_time in [0.0, 0.001, 0.016, 0.017, 0.033, 0.1, 0.5, 1 / 60, 1 / 144] * 20:
+        list(clock.ticks(frame_time))
+        assert 0.0 <= clock.alpha < 1.0
+
+def test_time_source():
+    now = [10.0]
+    clock = SimClock(tick_rate=64, time_source=lambda: now[0])
+    assert clock.advance() == 0  # The first frame only starts the clock
+    now[0] += 0.125
+    assert clock.advance() == 8
+
+def test_lerp():
+    assert lerp(2.0, 4.0, 0.0) == 2.0
+    assert lerp(2.0, 4.0, 0.25) == 2.5
+    assert lerp(2.0, 4.0, 1.0) == 4.0
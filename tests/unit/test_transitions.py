@@ -0,0 +1,74 @@
+# The transition state machines: phases in order, overlay opacity / zoom scale
+# through them, and callbacks firing exactly once, even when one long step
+# finishes several phases
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import pytest
+
+from transitions import FadeTransition, Transition, ZoomTransition
+
+def test_fade_phases_and_opacity():
+    covered = []
+    fade = FadeTransition(fade_out=0.5, hold=0.25, fade_in=0.5, on_covered=lambda: covered.append(fade.phase))
+    assert not fade.active and fade.phase is None and fade.opacity == 0.0
+    fade.start()
+    seen = []
+    while fade.active:
+        seen.append((fade.phase, fade.opacity))
+        fade.update(0.125)
+    assert [phase for phase, _ in seen] == ["fade_out"] * 4 + ["hold"] * 2 + ["fade_in"] * 4
+    assert [opacity for _, opacity in seen] == [0.0, 0.25, 0.5, 0.75, 1.0, 1.0, 1.0, 0.75, 0.5, 0.25]
+    assert covered == ["hold"]  # Once, as soon as the screen was covered
+    assert fade.opacity == 0.0 and fade.elapsed == 0.0
+
+def test_long_step_finishes_several_phases():
+    calls = []
+    transition = Transition((("a", 0.25), ("b", 0.25), ("c", 0.25)),
+                            {name: (lambda name=name: calls.append(name)) for name in "abc"})
+    transition.start()
+    transition.update(0.625)
+    assert calls == ["a", "b"]
+    assert transition.phase == "c" and transition.progress == pytest.approx(0.5)
+    transition.update(10.0)
+    transition.update(10.0)
+    assert calls == ["a", "b", "c"]
+    assert not transition.active
+
+def test_empty_phases_are_skipped():
+    calls = []
+    fade = FadeTransition(fade_out=0.0, hold=0.0, fade_in=0.5, on_covered=lambda: calls.append(1))
+    fade.start()
+    assert calls == [1]
+    assert fade.phase == "fade_in" and fade.opacity == 1.0
+
+def test_restart_fires_again():
+    calls = []
+    fade = FadeTransition(fade_out=0.25, hold=0.25, fade_in=0.25, on_covered=lambda: calls.append(1))
+    for _ in range(2):
+        fade.start()
+        fade.update(1.0)
+    assert calls == [1, 1]
+
+def test_zoom_scale():
+    done = []
+    zoom = ZoomTransition(duration=1.0, peak_scale=3.0, on_done=lambda: done.append(1))
+    zoom.start()
+    zoom.update(0.25)
+    assert zoom.scale == pytest.approx(2.0)
+    zoom.update(0.25)
+    assert zoom.phase == "zoom_out" and zoom.scale == pytest.approx(3.0)
+    zoom.update(0.25)
+    assert zoom.scale == pytest.approx(2.0)
+    zoom.update(0.25)
+    assert not zoom.active and zoom.scale == 1.0
+    assert done == [1]
+
+def test_fade_draws_only_while_active(recording_gl):
+    fade = FadeTransition(fade_out=0.5, hold=0.25, fade_in=0.5)
+    fade.draw()
+    assert recording_gl.end_frame()["calls"] == 0
+    fade.start()
+    fade.update(0.25)
+    fade.draw()
+    assert recording_gl.end_frame()["by_function"]["glColor4f"] == 1
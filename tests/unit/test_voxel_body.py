@@ -0,0 +1,44 @@
+# The voxel body's destroy / restore: putting broken-off voxels back leaves the
+# body exactly as it was (colours, exposed faces, live counts) and hands their
+# debris particles back to the pool
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import random
+
+import numpy as np
+import pytest
+
+from voxel_body import VoxelBody, destroyed_flash_color
+
+def snapshot(body):
+    return {name: getattr(body, name).copy()
+            for name in ("colors", "face_masks", "visible", "destroyed", "layer_live_counts")}
+
+@pytest.mark.parametrize("size", [1, 4, 5])
+def test_restore_undoes_destroy(size):
+    body = VoxelBody(size, rng=random.Random(size))
+    before = snapshot(body)
+    picked = np.random.default_rng(size).permutation(body.count)[:max(1, body.count // 3)].tolist()
+    for i in picked:
+        body.destroy(i)
+    assert body.live_count == body.count - len(picked)
+    assert np.allclose(body.colors[picked], destroyed_flash_color)
+    assert body.debris.count == len(picked)
+
+    for i in reversed(picked):
+        body.restore(i)
+    after = snapshot(body)
+    for name, array in before.items():
+        assert np.array_equal(after[name], array), name
+    assert body.live_count == body.count
+    assert body.debris.count == 0
+    assert all(body.debris.slot_of(i) == -1 for i in picked)
+
+def test_cube_shim_recolours_after_restoring():
+    body = VoxelBody(3, rng=random.Random(1))
+    cube = body[0][0][0]
+    cube.destroy()
+    cube.reset_animation_state()
+    assert not cube.is_destroyed
+    assert cube.color != list(destroyed_flash_color)
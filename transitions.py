@@ -0,0 +1,161 @@
+# "Cube Libre" - scene transitions
+#
+# Transitions are small state machines advanced by simulation time from the
+# game loop's fixed ticks, so a fade or a zoom never takes over the loop:
+# events keep being pumped, input keeps being read and every displayed frame
+# is one normal scene render with the transition applied on top (an overlay
+# opacity, a scale). Replaces the old flash_screen() loops, which flipped the
+# display 500+ times with waits in between and froze the window meanwhile.
+#
+# A transition is a list of named phases with durations; callbacks can hang
+# off the end of any phase (e.g. reset the body while the screen is white).
+# The state machines themselves need no GL: PyOpenGL is only imported once an
+# overlay is drawn, so the simulation can run (and import) without it.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+from contextlib import contextmanager
+
+class Transition:
+    # phases: (name, seconds) pairs played in order; callbacks maps a phase
+    # name to a function called when that phase is over
+    def __init__(self, phases, callbacks=None):
+        self.phases = list(phases)
+        self.callbacks = dict(callbacks or {})
+        self.index = len(self.phases)  # Not running
+        self.elapsed = 0.0  # Seconds into the current phase
+
+    def start(self):
+        self.index = 0
+        self.elapsed = 0.0
+        self._skip_empty_phases()
+
+    @property
+    def active(self):
+        return self.index < len(self.phases)
+
+    # Name of the running phase, None when idle
+    @property
+    def phase(self):
+        return self.phases[self.index][0] if self.active else None
+
+    # 0..1 through the running phase
+    @property
+    def progress(self):
+        if not self.active:
+            return 1.0
+        return min(self.elapsed / self.phases[self.index][1], 1.0)
+
+    # Advance by delta_time seconds of simulation time; a long step can finish several phases
+    def update(self, delta_time):
+        if not self.active:
+            return
+        self.elapsed += delta_time
+        while self.active and self.elapsed >= self.phases[self.index][1]:
+            self.elapsed -= self.phases[self.index][1]
+            self._finish_phase()
+        if not self.active:
+            self.elapsed = 0.0
+
+    def _finish_phase(self):
+        name = self.phases[self.index][0]
+        self.index += 1
+        callback = self.callbacks.get(name)
+        if callback is not None:
+            callback()
+        self._skip_empty_phases()
+
+    def _skip_empty_phases(self):
+        while self.active and self.phases[self.index][1] <= 0:
+            self._finish_phase()
+
+# Fade the screen out to a colour, hold it, fade back in. on_covered runs
+# when the screen is fully covered (the place to swap out what is underneath).
+class FadeTransition(Transition):
+    def __init__(self, fade_out=0.5, hold=0.1, fade_in=0.5, color=(1.0, 1.0, 1.0), on_covered=None):
+        super().__init__((("fade_out", fade_out), ("hold", hold), ("fade_in", fade_in)),
+                         {"fade_out": on_covered} if on_covered else None)
+        self.color = color
+
+    # Overlay opacity for this frame
+    @property
+    def opacity(self):
+        phase = self.phase
+        if phase == "fade_out":
+            return self.progress
+        if phase == "hold":
+            return 1.0
+        if phase == "fade_in":
+            return 1.0 - self.progress
+        return 0.0
+
+    def draw(self):
+        if self.active:
+            draw_screen_overlay(self.color, self.opacity)
+
+# Zoom the scene in to peak_scale and back out over duration seconds
+class ZoomTransition(Transition):
+    def __init__(self, duration=2.0, peak_scale=2.0, on_done=None):
+        super().__init__((("zoom_in", duration / 2), ("zoom_out", duration / 2)),
+                         {"zoom_out": on_done} if on_done else None)
+        self.peak_scale = peak_scale
+
+    # Scene scale for this frame
+    @property
+    def scale(self):
+        phase = self.phase
+        if phase == "zoom_in":
+            return 1.0 + (self.peak_scale - 1.0) * self.progress
+        if phase == "zoom_out":
+            return 1.0 + (self.peak_scale - 1.0) * (1.0 - self.progress)
+        return 1.0
+
+# Draw on top of whatever has been drawn: blending on, depth testing off and
+# an orthographic projection from left..right, bottom..top, all put back
+# afterwards. The default covers the screen with -1..1 (the flash and fade
+# overlays); the performance HUD passes pixels with y down (0, width, height, 0).
+@contextmanager
+def screen_overlay(left=-1, right=1, bottom=-1, top=1):
+    from OpenGL.GL import GL_BLEND, GL_DEPTH_TEST, GL_MODELVIEW, GL_ONE_MINUS_SRC_ALPHA, GL_PROJECTION, GL_SRC_ALPHA
+
+    from gl_backend import gl
+
+    # Enable blending for transparency; the overlay is never hidden by the scene
+    gl.glEnable(GL_BLEND)
+    gl.glDisable(GL_DEPTH_TEST)
+    gl.glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+    # Set the orthographic projection (gluOrtho2D without GLU)
+    gl.glMatrixMode(GL_PROJECTION)
+    gl.glPushMatrix()
+    gl.glLoadIdentity()
+    gl.glOrtho(left, right, bottom, top, -1, 1)
+
+    gl.glMatrixMode(GL_MODELVIEW)
+    gl.glPushMatrix()
+    gl.glLoadIdentity()
+    try:
+        yield
+    finally:
+        # Restore matrices and depth testing, disable blending
+        gl.glPopMatrix()
+        gl.glMatrixMode(GL_PROJECTION)
+        gl.glPopMatrix()
+        gl.glMatrixMode(GL_MODELVIEW)
+        gl.glEnable(GL_DEPTH_TEST)
+        gl.glDisable(GL_BLEND)
+
+# Full-screen quad in a colour at an opacity, over whatever has been drawn
+def draw_screen_overlay(color, alpha):
+    from OpenGL.GL import GL_QUADS
+
+    from gl_backend import gl
+
+    with screen_overlay():
+        gl.glColor4f(color[0], color[1], color[2], alpha)
+        gl.glBegin(GL_QUADS)
+        gl.glVertex2f(-1, -1)
+        gl.glVertex2f(1, -1)
+        gl.glVertex2f(1, 1)
+        gl.glVertex2f(-1, 1)
+        gl.glEnd()
@@ -0,0 +1,460 @@
+# "Cube Libre" - voxel body store
+#
+# Structure-of-arrays store for the player's body of small cubes.
+# Instead of a triple-nested list of Cube objects (cubes[x][y][z]), every per-cube
+# attribute lives in one contiguous NumPy array, so the per-frame passes
+# (update, collision, "is everything gone?") are single vectorized calls.
+#
+# Flat index layout: i = (ix * size + iy) * size + iz, where ix/iy/iz are list-style
+# grid indices in [0, size). Lattice coordinates follow the original
+# range(-size // 2, size // 2) convention.
+#
+# Intact voxels have no world position of their own: they are integer lattice
+# offsets under a single body transform (position + orientation), so moving the
+# body is O(1) no matter how big it is. A world position is only materialized
+# when a voxel is detached by destroy(); from then on it is a particle in the
+# debris pool (debris.py) and the body only remembers where it broke off.
+#
+# The body also keeps incremental bookkeeping of what is still intact: a total
+# live count, a live count per layer (grid y index) and a per-layer list of the
+# intact voxels (swap-remove on destroy). "Is everything gone?" is a counter
+# compare, and picking a random intact voxel in a layer is O(1).
+#
+# Only the shell of the body is ever drawn: every voxel has a 6-bit face mask of
+# the faces that are not covered by an intact neighbour, and "visible" marks the
+# intact voxels with at least one exposed face. Both are patched locally when a
+# voxel is destroyed or restored (only it and its 6 neighbours change), so the
+# interior is never submitted and nothing is rescanned. Voxels that changed since
+# the renderer last looked are queued in "changed" (see mesher.py), and
+# "generation" goes up on every reset.
+#
+# https://github.com/FlyingFathead/pygame-opengl-polygon-demos
+
+import random
+
+import numpy as np
+
+from debris import DebrisPool
+from event_log import INFO, events
+from sim_clock import lerp
+
+# Gradient endpoints for the per-layer colour ramp
+gradient_start = np.array([1.0, 0.0, 0.0], dtype=np.float32)  # Red at the top
+gradient_end = np.array([0.0, 0.0, 1.0], dtype=np.float32)  # Blue at the bottom
+
+# Colour a destroyed cube flashes to
+destroyed_flash_color = (0.8, 0.8, 0.8)
+
+# Face bit order for the face masks: +z, -z, +y, -y, -x, +x, the same order as
+# the faces (4 vertices each) of the unit cube vertex list in cube_libre/renderer.py
+face_directions = ((0, 0, 1), (0, 0, -1), (0, 1, 0), (0, -1, 0), (-1, 0, 0), (1, 0, 0))
+opposite_faces = (1, 0, 3, 2, 5, 4)
+all_faces = (1 << len(face_directions)) - 1
+
+# Rotation matrix for angle (degrees) around an axis, same convention as glRotatef
+def rotation_matrix(angle, axis):
+    x, y, z = np.asarray(axis, dtype=np.float64) / np.linalg.norm(axis)
+    radians = np.radians(angle)
+    c, s = np.cos(radians), np.sin(radians)
+    t = 1 - c
+    return np.array([
+        [t * x * x + c, t * x * y - s * z, t * x * z + s * y],
+        [t * x * y + s * z, t * y * y + c, t * y * z - s * x],
+        [t * x * z - s * y, t * y * z + s * x, t * z * z + c],
+    ])
+
+def gradient_colors(ys, size):
+    # Vectorized version of gradient_color(y): one RGB row per y value
+    factor = (np.asarray(ys, dtype=np.float32) + size / 2) / size  # Normalize y to range [0, 1]
+    factor = factor[:, None]
+    return gradient_start * (1 - factor) + gradient_end * factor
+
+class VoxelBody:
+    def __init__(self, size, origin=(0.0, 0.0, 0.0), break_velocity_factor=0.3,
+                 spin_speed=3.0, debris=None, rng=None):
+        self.size = size
+        self.count = size ** 3
+        self.origin = tuple(float(v) for v in origin)
+        self.break_velocity_factor = break_velocity_factor
+        self.spin_speed = spin_speed  # Max degrees per second a broken-off cube spins at
+        self.debris = debris if debris is not None else DebrisPool(min(self.count, 4096), owners=self.count)
+        self.rng = rng if rng is not None else random
+
+        # Integer lattice coordinates of every voxel, in grid index order
+        coords = np.arange(-size // 2, size // 2, dtype=np.int32)
+        gx, gy, gz = np.meshgrid(coords, coords, coords, indexing="ij")
+        self.lattice = np.stack([gx.ravel(), gy.ravel(), gz.ravel()], axis=1)
+        self.layer_coords = coords  # Lattice y of every layer
+        self.layer_grid = np.broadcast_to(np.arange(size, dtype=np.int32)[None, :, None], (size, size, size))
+
+        # Live bookkeeping: layer_members[iy, :layer_live_counts[iy]] are the intact
+        # voxels of layer iy, member_slots[i] is where voxel i sits in that list
+        self.live_count = 0
+        self.layer_live_counts = np.empty(size, dtype=np.int32)
+        self.layer_members = np.empty((size, size * size), dtype=np.int32)
+        self.member_slots = np.empty(self.count, dtype=np.int32)
+
+        # Neighbour of every voxel across each face (-1 past the edge of the body)
+        grid = np.arange(self.count, dtype=np.int32).reshape(size, size, size)
+        padded = np.pad(grid, 1, constant_values=-1)
+        self.neighbors = np.empty((self.count, len(face_directions)), dtype=np.int32)
+        for face, (dx, dy, dz) in enumerate(face_directions):
+            self.neighbors[:, face] = padded[1 + dx:1 + dx + size, 1 + dy:1 + dy + size, 1 + dz:1 + dz + size].ravel()
+        self.edge_faces = ((self.neighbors < 0) << np.arange(len(face_directions))).sum(axis=1).astype(np.uint8)
+
+        # Exposed faces of every voxel, and the intact voxels that have any
+        self.face_masks = np.empty(self.count, dtype=np.uint8)
+        self.visible = np.empty(self.count, dtype=bool)
+        self.changed = []  # Voxels destroyed or restored since the renderer last looked
+        self.generation = 0
+
+        # Body transform shared by every intact voxel
+        self.position = np.zeros(3, dtype=np.float64)
+        self.orientation = np.identity(3, dtype=np.float64)
+        self._offsets = None  # Rotated lattice offsets, rebuilt when orientation changes
+
+        n = self.count
+        self.positions = np.empty((n, 3), dtype=np.float32)  # Where detached voxels broke off
+        self.colors = np.empty((n, 3), dtype=np.float32)
+        self.intact_colors = np.empty((n, 3), dtype=np.float32)  # What destroy() overwrote with the flash colour
+        self.destroyed = np.empty(n, dtype=bool)
+
+        # Body position as of the previous simulation tick, for render interpolation
+        self.previous_position = np.zeros(3, dtype=np.float64)
+        self.reset()
+
+    # Put every voxel back in place, intact and at rest
+    def reset(self):
+        self.position[:] = self.origin
+        self.orientation[:] = np.identity(3)
+        self._offsets = None
+        self._axis_aligned = True
+        self.positions.fill(0.0)
+        # All the colours in one call, from a generator seeded off the body's rng
+        np.random.default_rng(self.rng.getrandbits(64)).random(self.colors.shape, dtype=np.float32, out=self.colors)
+        self.destroyed.fill(False)
+        self.face_masks[:] = self.edge_faces
+        np.not_equal(self.face_masks, 0, out=self.visible)
+        self.changed.clear()
+        self.generation += 1
+
+        # Every voxel is live again; layer iy holds all (ix, iz) in index order
+        size = self.size
+        self.live_count = self.count
+        self.layer_live_counts.fill(size * size)
+        ix, iz = np.divmod(np.arange(size * size, dtype=np.int32), size)
+        for iy in range(size):
+            self.layer_members[iy] = self.index(ix, iy, iz)
+        self.member_slots.reshape(size, size, size)[:] = (ix * size + iz).reshape(size, 1, size)
+        self.debris.clear()
+        self.save_previous()
+
+    # Remember the body position as "previous"; call at the start of every tick
+    def save_previous(self):
+        self.previous_position[:] = self.position
+
+    def index(self, ix, iy, iz):
+        return (ix * self.size + iy) * self.size + iz
+
+    # Move the whole body; detached voxels keep flying where they are
+    def translate(self, dx=0.0, dy=0.0, dz=0.0):
+        self.position += (dx, dy, dz)
+
+    # Rotate the whole body around its own centre (degrees, like glRotatef)
+    def rotate(self, angle, x, y, z):
+        self.orientation = rotation_matrix(angle, (x, y, z)) @ self.orientation
+        self._offsets = None
+        self._axis_aligned = np.allclose(self.orientation, np.identity(3))
+
+    # Lattice offsets rotated into world orientation, one row per voxel
+    def offsets(self):
+        if self._offsets is None:
+            self._offsets = self.lattice @ self.orientation.T
+        return self._offsets
+
+    # World position of one voxel: on the body, in flight, or where it broke off
+    def world_position(self, i):
+        if not self.destroyed[i]:
+            return self.position + self.offsets()[i]
+        slot = self.debris.slot_of(i)
+        if slot >= 0:
+            return self.debris.positions[slot].astype(np.float64)
+        return self.positions[i].astype(np.float64)
+
+    # 4x4 column-major body transform, ready for glMultMatrixf.
+    # alpha interpolates between the previous and the current tick;
+    # scale is the world units per lattice step (cube_spacing).
+    def transform_matrix(self, alpha=1.0, scale=1.0):
+        matrix = np.identity(4, dtype=np.float32)
+        matrix[:3, :3] = self.orientation
+        matrix[:3, 3] = lerp(self.previous_position, self.position, alpha) * scale
+        return matrix.T.copy()
+
+    def layer_of(self, i):
+        return (i // self.size) % self.size
+
+    # Take voxel i out of its layer's live list (swap with the last live member)
+    def _unlink(self, i):
+        iy = self.layer_of(i)
+        last = self.layer_live_counts[iy] - 1
+        slot = self.member_slots[i]
+        moved = self.layer_members[iy, last]
+        self.layer_members[iy, slot] = moved
+        self.member_slots[moved] = slot
+        self.layer_members[iy, last] = i
+        self.member_slots[i] = last
+        self.layer_live_counts[iy] = last
+        self.live_count -= 1
+
+    # Put a detached voxel back into its layer's live list
+    def _link(self, i):
+        iy = self.layer_of(i)
+        end = self.layer_live_counts[iy]
+        slot = self.member_slots[i]
+        other = self.layer_members[iy, end]
+        self.layer_members[iy, slot] = other
+        self.member_slots[other] = slot
+        self.layer_members[iy, end] = i
+        self.member_slots[i] = end
+        self.layer_live_counts[iy] = end + 1
+        self.live_count += 1
+
+    # Voxel i left the body: its intact neighbours get the faces it was covering
+    def _expose_neighbors(self, i):
+        self.face_masks[i] = 0
+        self.visible[i] = False
+        for face, j in enumerate(self.neighbors[i]):
+            if j >= 0 and not self.destroyed[j]:
+                self.face_masks[j] |= 1 << opposite_faces[face]
+                self.visible[j] = True
+
+    # Voxel i is back: it covers its intact neighbours and is only exposed towards the rest
+    def _cover_neighbors(self, i):
+        mask = 0
+        for face, j in enumerate(self.neighbors[i]):
+            if j < 0 or self.destroyed[j]:
+                mask |= 1 << face
+            else:
+                self.face_masks[j] &= ~np.uint8(1 << opposite_faces[face])
+                self.visible[j] = self.face_masks[j] != 0
+        self.face_masks[i] = mask
+        self.visible[i] = mask != 0
+
+    # Re-attach a broken-off voxel to the body (its debris particle, if still
+    # flying, goes back to the pool)
+    def restore(self, i):
+        if not self.destroyed[i]:
+            return
+        slot = self.debris.slot_of(i)
+        if slot >= 0:
+            self.debris.release(slot)
+        self.destroyed[i] = False
+        self.colors[i] = self.intact_colors[i]
+        self._link(i)
+        self._cover_neighbors(i)
+        self.changed.append(i)
+
+    # Break a single voxel off the body and hand it to the debris pool
+    def destroy(self, i):
+        if self.destroyed[i]:
+            return  # Already gone
+        events.debug("cube_destroyed", index=i)
+        rng = self.rng
+        factor = self.break_velocity_factor
+        self.positions[i] = self.world_position(i)
+        self.intact_colors[i] = self.colors[i]
+        self.colors[i] = destroyed_flash_color
+        self.destroyed[i] = True
+        self._unlink(i)
+        self._expose_neighbors(i)
+        self.changed.append(i)
+        velocity = (
+            rng.uniform(-0.5, 0.5) * factor,
+            rng.uniform(0.5, 1) * factor,
+            rng.uniform(-0.5, 0.5) * factor,
+        )
+        spin_axis = np.array([rng.uniform(-1, 1) for _ in range(3)])
+        norm = np.linalg.norm(spin_axis)
+        spin_axis = spin_axis / norm if norm > 1e-6 else (0.0, 1.0, 0.0)
+        self.debris.spawn(self.positions[i], velocity,
+                          angular_velocity=rng.uniform(-self.spin_speed, self.spin_speed),
+                          spin_axis=spin_axis, owner=i)
+
+    # Mask of intact voxels at or below the horizon, read off the body transform
+    def colliding(self, horizon_y):
+        return ~self.destroyed & (self.offsets()[:, 1] <= horizon_y - self.position[1])
+
+    # Layers (grid y indices) with at least one intact voxel at or below the horizon
+    def colliding_layers(self, horizon_y):
+        if self._axis_aligned:
+            # Every voxel in a layer sits at the same height: O(size)
+            touching = self.position[1] + self.layer_coords <= horizon_y
+            return np.flatnonzero(touching & (self.layer_live_counts > 0))
+        size = self.size
+        return np.flatnonzero(self.colliding(horizon_y).reshape(size, size, size).any(axis=(0, 2)))
+
+    # Random intact voxel of layer iy (the layer must have one)
+    def random_live_in_layer(self, iy):
+        return int(self.layer_members[iy, self.rng.randrange(self.layer_live_counts[iy])])
+
+    # Destroy one random intact voxel in every layer that touches the horizon.
+    # Returns the number of layers that were hit.
+    def destroy_one_per_layer(self, horizon_y):
+        layers_hit = self.colliding_layers(horizon_y)
+        for iy in layers_hit:
+            if events.enabled(INFO):
+                events.info("horizon_collision", layer=int(iy),
+                            position=tuple(self.world_position(int(self.layer_members[iy, 0]))))
+            self.destroy(self.random_live_in_layer(iy))
+        return len(layers_hit)
+
+    def all_destroyed(self):
+        return self.live_count == 0
+
+    # Draw lists for the surface voxels: body-space offsets, layers (lattice y,
+    # the voxel shader turns them into gradient colours) and exposed face masks.
+    # Interior voxels are covered on all six sides and never make it in here.
+    def surface_draw_lists(self):
+        visible = self.visible
+        return self.lattice[visible], self.lattice[visible, 1], self.face_masks[visible]
+
+    # Old-style grid access: body[x][y][z] and "for row in body: for layer in row: ..."
+    def __getitem__(self, x):
+        return _GridRow(self, _wrap(x, self.size))
+
+    def __iter__(self):
+        return (self[x] for x in range(self.size))
+
+    def __len__(self):
+        return self.size
+
+def _wrap(i, n):
+    # Same index semantics as a Python list of length n
+    if not -n <= i < n:
+        raise IndexError("voxel index out of range")
+    return i % n
+
+class _GridRow:
+    __slots__ = ("body", "ix")
+
+    def __init__(self, body, ix):
+        self.body = body
+        self.ix = ix
+
+    def __getitem__(self, y):
+        return _GridLayer(self.body, self.ix, _wrap(y, self.body.size))
+
+    def __iter__(self):
+        return (self[y] for y in range(self.body.size))
+
+    def __len__(self):
+        return self.body.size
+
+class _GridLayer:
+    __slots__ = ("body", "ix", "iy")
+
+    def __init__(self, body, ix, iy):
+        self.body = body
+        self.ix = ix
+        self.iy = iy
+
+    def __getitem__(self, z):
+        body = self.body
+        return Cube(body, body.index(self.ix, self.iy, _wrap(z, body.size)))
+
+    def __iter__(self):
+        return (self[z] for z in range(self.body.size))
+
+    def __len__(self):
+        return self.body.size
+
+def _world_component(column):
+    def fget(self):
+        return float(self.body.world_position(self.index)[column])
+
+    def fset(self, value):
+        body = self.body
+        if not body.destroyed[self.index]:
+            raise AttributeError("intact cubes follow the body transform; move the body with VoxelBody.translate()")
+        slot = body.debris.slot_of(self.index)
+        if slot >= 0:
+            body.debris.positions[slot, column] = value
+        else:
+            body.positions[self.index, column] = value
+
+    return property(fget, fset)
+
+def _debris_attribute(array_name, default):
+    # Reads through to the cube's debris particle while it is in flight
+    def fget(self):
+        debris = self.body.debris
+        slot = debris.slot_of(self.index) if self.body.destroyed[self.index] else -1
+        if slot < 0:
+            return default() if callable(default) else default
+        value = getattr(debris, array_name)[slot]
+        return value.tolist() if value.ndim else float(value)
+
+    def fset(self, value):
+        debris = self.body.debris
+        slot = debris.slot_of(self.index) if self.body.destroyed[self.index] else -1
+        if slot >= 0:
+            getattr(debris, array_name)[slot] = value
+
+    return property(fget, fset)
+
+def _vector(array_name):
+    def fget(self):
+        return getattr(self.body, array_name)[self.index].tolist()
+
+    def fset(self, value):
+        getattr(self.body, array_name)[self.index] = value
+
+    return property(fget, fset)
+
+# Compatibility shim: a lightweight view onto one voxel that exposes the attributes
+# and methods of the old per-object Cube class. Reads and writes go straight to the
+# body's arrays (or the cube's debris particle once it broke off), so old code keeps
+# working while the hot paths stay vectorized.
+class Cube:
+    __slots__ = ("body", "index")
+
+    def __init__(self, body, index):
+        self.body = body
+        self.index = index
+
+    x = _world_component(0)
+    y = _world_component(1)
+    z = _world_component(2)
+    color = _vector("colors")
+    @property
+    def is_destroyed(self):
+        return bool(self.body.destroyed[self.index])
+
+    @is_destroyed.setter
+    def is_destroyed(self, value):
+        if value:
+            self.body.destroy(self.index)
+        else:
+            self.body.restore(self.index)
+    velocity = _debris_attribute("velocities", lambda: [0.0, 0.0, 0.0])
+    angular_velocity = _debris_attribute("angular_velocities", 0.0)
+    rotation = _debris_attribute("rotations", 0.0)
+    time_since_destroyed = _debris_attribute("ages", 0.0)
+
+    @property
+    def flash_duration(self):
+        return self.body.debris.hold_time
+
+    def random_color(self):
+        rng = self.body.rng
+        return [rng.uniform(0, 1) for _ in range(3)]
+
+    def destroy(self):
+        self.body.destroy(self.index)
+
+    def reset_animation_state(self):
+        self.is_destroyed = False
+        self.color = self.random_color()
+
+    def __repr__(self):
+        return f"Cube({self.x:.2f}, {self.y:.2f}, {self.z:.2f}, destroyed={self.is_destroyed})"